@@ -1,12 +1,29 @@
 # SK8 - v7.1 (Logging, Late Shuvits & New Cards Update)
 
 import random
+import math
+import sys
 import os
+import shutil
 import time
 import logging
+import json
+import queue
+import threading
+import atexit
+import argparse
+import cProfile
+import hashlib
+import base64
+import inspect
+import mmap
+import struct
 from pathlib import Path
-from collections import Counter
-from itertools import combinations
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+from functools import lru_cache, wraps
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor
 
 # --- Game Data & Configuration ---
 
@@ -36,8 +53,9 @@ GRIND_SURFACES = {'tall_ledge', 'hubba', 'flat_bar', 'round_rail', 'down_rail'}
 # Core Trick Set (for validation)
 CORE_TRICKS = FLIP_TRICKS | SHUVIT_TRICKS | GRINDS_SLIDES | SPIN_TRICKS | {'ollie'}
 
-# The main database of tricks used by the game
-TRICKS_DATABASE = {k: max(1, (v - 1)) if k in FLIP_TRICKS else v for k, v in BASE_DIFFICULTIES.items()}
+# The main database of tricks used by the game: flip tricks play FLIP_DISCOUNT easier than their base difficulty.
+FLIP_DISCOUNT = 1
+TRICKS_DATABASE = {k: max(1, (v - FLIP_DISCOUNT)) if k in FLIP_TRICKS else v for k, v in BASE_DIFFICULTIES.items()}
 SPECIAL_CARDS = {
     'wax': {'description': 'Play with a Grind/Slide combo to reduce its difficulty by 2.'},
     'thrasher_magazine': {'description': 'Shuffle your hand (except Ollie) and draw 7 new cards.'},
@@ -48,6 +66,50 @@ SPECIAL_CARDS = {
 }
 ALL_CATEGORIES = {"Flips": FLIP_TRICKS, "Shuvits": SHUVIT_TRICKS, "Grinds": GRINDS_SLIDES, "Spins": SPIN_TRICKS, "Obstacles": OBSTACLES}
 
+# --- Card Registry ---
+# Every card gets a dense integer id. The rule functions work on ids, a per-card category bitmask and flat
+# difficulty arrays; card name strings only matter at the UI edge.
+CAT_FLIP, CAT_SHUVIT, CAT_SPIN, CAT_GRIND, CAT_OBSTACLE, CAT_STAIR, CAT_SURFACE, CAT_STANCE, CAT_SPECIAL, CAT_CORE, CAT_TRICK = (1 << i for i in range(11))
+CAT_LATE = CAT_FLIP | CAT_SHUVIT  # Tricks that can be done Late off an Ollie.
+CARD_NAMES = tuple(sys.intern(c) for c in list(BASE_DIFFICULTIES) + list(STANCES) + list(SPECIAL_CARDS))
+CARD_IDS = {name: i for i, name in enumerate(CARD_NAMES)}
+CARD_DISPLAY_NAMES = tuple(sys.intern(name.replace('_', ' ').title()) for name in CARD_NAMES)
+
+def _category_mask(card):
+    mask = 0
+    for bit, group in ((CAT_FLIP, FLIP_TRICKS), (CAT_SHUVIT, SHUVIT_TRICKS), (CAT_SPIN, SPIN_TRICKS), (CAT_GRIND, GRINDS_SLIDES),
+                       (CAT_OBSTACLE, OBSTACLES), (CAT_STAIR, STAIRS), (CAT_SURFACE, GRIND_SURFACES), (CAT_STANCE, STANCES),
+                       (CAT_SPECIAL, SPECIAL_CARDS), (CAT_CORE, CORE_TRICKS), (CAT_TRICK, TRICKS_DATABASE)):
+        if card in group: mask |= bit
+    return mask
+
+CARD_CATEGORIES = array('H', (_category_mask(c) for c in CARD_NAMES))
+CARD_DIFFICULTY = array('b', (TRICKS_DATABASE.get(c, 0) for c in CARD_NAMES))
+STANCE_COST = array('b', (STANCES.get(c, 0) for c in CARD_NAMES))
+OLLIE, WAX, KICKER_RAMP, PRO_MODEL_DECK = (CARD_IDS[c] for c in ('ollie', 'wax', 'kicker_ramp', 'pro_model_deck'))
+FOCUS, BAIL, SPONSORS, THRASHER_MAGAZINE = (CARD_IDS[c] for c in ('focus', 'bail', 'sponsors', 'thrasher_magazine'))
+
+def card_ids(cards):
+    """Card names to a tuple of card ids."""
+    return tuple(map(CARD_IDS.__getitem__, cards))
+
+def card_names(ids):
+    """Card ids back to a list of card names."""
+    return [CARD_NAMES[i] for i in ids]
+
+_CATEGORY_BITS = {}
+
+def category_bits(category):
+    """A set of card names as a bitset over card ids, so membership is `bits >> card_id & 1`.
+
+    Results are cached per set object; build a new set rather than mutating a category in place."""
+    cached = _CATEGORY_BITS.get(id(category))
+    if cached is not None and cached[0] is category: return cached[1]
+    bits = 0
+    for card in category: bits |= 1 << CARD_IDS[card]
+    _CATEGORY_BITS[id(category)] = (category, bits)
+    return bits
+
 class Skater:
     """Represents a skater with their unique set of abilities."""
     def __init__(self, name, passive_desc, passive_ability, activated_desc, activated_ability, trade_desc, negative_desc, negative_ability):
@@ -79,45 +141,357 @@ SKATERS = [
 ]
 # Game constants
 LETTERS, STARTING_HAND_SIZE, MAX_LETTERS = "SK8", 8, len("SK8")
+DECK_SIZE = 38  # Every themed deck is padded up to this many cards.
+DEFENDER_PENALTY = 2  # Added to a match when the defender lacks any of the combo's trick cards.
+# AI setter search: longest combo considered and wall-clock budget per decision (None = unbounded).
+AI_MAX_COMBO_LENGTH, AI_SEARCH_TIME_BUDGET = 5, 0.05
+# AI valuations for expected-value decisions, measured in letters. The last letter loses the game, so it weighs more.
+AI_LETTER_VALUE, AI_LAST_LETTER_VALUE = 1.0, 3.0
+# Search ('hard') AI: seconds per decision, UCT exploration constant, turns simulated per rollout, combos tried at the root / deeper in the tree.
+SEARCH_THINK_TIME, SEARCH_EXPLORATION, SEARCH_ROLLOUT_TURNS, SEARCH_ROOT_COMBOS, SEARCH_TREE_COMBOS = 0.2, 0.7, 12, 12, 4
+AI_CARD_VALUES, AI_DEFAULT_CARD_VALUE = {'ollie': 0.0, 'focus': 0.15, 'bail': 0.15, 'pro_model_deck': 0.1}, 0.05
+
+# --- Event Log ---
+
+class EventLog:
+    """Structured game events (draw, discard, combo_attempt, roll, letter, ...) written as JSON lines.
+
+    emit() only puts the raw fields on a queue. A background thread drains it in batches, serializes each
+    record and appends to `path`, rotating to path.1 .. path.N once the file grows past max_bytes."""
+    def __init__(self, path, level=logging.DEBUG, max_bytes=5_000_000, backup_count=3, batch_size=512):
+        self.path, self.level, self.max_bytes, self.backup_count, self.batch_size = Path(path), level, max_bytes, backup_count, batch_size
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="sk8-event-log", daemon=True)
+        self._thread.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def emit(self, level, event, fields):
+        self._queue.put((time.time(), level, event, fields))
+
+    def close(self):
+        """Flushes everything queued so far and stops the writer thread."""
+        if self._closed: return
+        self._closed = True
+        self._queue.put(None); self._thread.join(timeout=5)
+
+    def _rotate(self):
+        for i in range(self.backup_count - 1, 0, -1):
+            older = self.path.with_name(f"{self.path.name}.{i}")
+            if older.exists(): older.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+        if self.path.exists(): self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+
+    def _run(self):
+        out = open(self.path, 'a', encoding='utf-8')
+        size = out.tell()
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try: batch.append(self._queue.get_nowait())
+                except queue.Empty: break
+            lines = []
+            for item in batch:
+                if item is None: running = False; continue
+                timestamp, level, event, fields = item
+                lines.append(json.dumps({'t': round(timestamp, 6), 'level': logging.getLevelName(level), 'event': event, **fields}, default=str))
+            if not lines: continue
+            data = '\n'.join(lines) + '\n'
+            if size and size + len(data) > self.max_bytes:
+                out.close(); self._rotate(); out = open(self.path, 'a', encoding='utf-8'); size = 0
+            out.write(data); out.flush(); size += len(data)
+        out.close()
+
+EVENT_LOG = None
+
+def log_event(level, event, **fields):
+    """Queues a structured event if the event log is on and `level` is enabled, and journals it during a journaled game.
+    With neither running it's two comparisons."""
+    if EVENT_LOG is not None and level >= EVENT_LOG.level: EVENT_LOG.emit(level, event, fields)
+    if JOURNAL is not None and event in JOURNAL_EVENTS: JOURNAL.write('e', e=event, **fields)
+
+@contextmanager
+def events_muted():
+    """Turns the event log and the journal off for a silent replay of events that were already written."""
+    global EVENT_LOG, JOURNAL
+    saved, (EVENT_LOG, JOURNAL) = (EVENT_LOG, JOURNAL), (None, None)
+    try: yield
+    finally: EVENT_LOG, JOURNAL = saved
 
-def setup_logging():
-    """Configures logging to a file named sk8.log in the script's directory."""
+def events_enabled(level):
+    """For call sites that need to copy state (e.g. a whole hand) only when someone will read it."""
+    return EVENT_LOG is not None and level >= EVENT_LOG.level
+
+def setup_logging(level=logging.DEBUG):
+    """Starts the JSON-lines event log, sk8.log in the script's directory. Old logs rotate instead of being overwritten."""
+    global EVENT_LOG
     try:
         script_dir = Path(__file__).parent.resolve()
         log_file = script_dir / 'sk8.log'
-        logging.basicConfig(
-            level=logging.DEBUG,
-            format='%(asctime)s - %(levelname)s - %(message)s',
-            filename=log_file,
-            filemode='w'
-        )
+        EVENT_LOG = EventLog(log_file, level)
         print(f"Logging is active. Log file will be saved to: {log_file}")
-        logging.info("--- SK8 Game Log Started ---")
+        log_event(logging.INFO, 'log_started')
         return True
     except Exception as e:
         print(f"Error setting up logging: {e}. Logging will be disabled.")
         return False
 
+# --- Journal ---
+# A journaled game survives a dead terminal. It appends one compact JSON line per answer ('a'), per AI search that ran
+# out of time ('l'), per finished turn ('t') and per rule event in JOURNAL_EVENTS ('e'), plus a snapshot of the whole
+# table ('s') every few turns. Resuming restores the last snapshot and silently replays only the answers after it, up to
+# the last finished turn, so it costs a few turns of rules however long the game has run.
+
+JOURNAL_FILE = Path(__file__).parent / 'sk8.journal'
+JOURNAL_EVENTS = frozenset({'draw', 'discard', 'discard_temporary', 'reshuffle', 'combo_attempt', 'set_result', 'match_target',
+                            'match_result', 'roll', 'letter', 'last_chance', 'advantage', 'special', 'ability', 'pass'})
+JOURNAL = None  # The GameJournal that log events go to while its game is being played.
+
+class GameJournal:
+    """The append-only journal of one game at `path`.
+
+    Lines reach the OS before every prompt and at the end of every turn, so they outlive the process. fsync, which can
+    take milliseconds, only runs every sync_turns turns, at snapshots and when the game ends."""
+    def __init__(self, path=JOURNAL_FILE, snapshot_every=10, sync_turns=5):
+        self.path, self.snapshot_every, self.sync_turns = Path(path), snapshot_every, sync_turns
+        self.file, self.last_turn = None, None
+
+    def start(self, game):
+        """Starts a new journal for `game`, replacing any old one."""
+        self.close(); self.file = open(self.path, 'w', encoding='utf-8'); self.last_turn = None
+        self.write('g', mode=game.game_mode, seed=game.seed, skaters=[s.name for s in game.preset_skaters] if game.preset_skaters else None,
+                   decks=game.decks, search_seats=[i for i, p in enumerate(game.players) if p.search_ai])
+
+    def write(self, kind, /, **fields):
+        self.file.write(json.dumps({'k': kind, **fields}, separators=(',', ':'), default=str) + '\n')
+
+    def flush(self): self.file.flush()
+
+    def turn(self, game):
+        """Marks a turn boundary: a point resume() can restart from."""
+        if game.turn_count == self.last_turn: return
+        self.last_turn = game.turn_count
+        self.write('t', n=game.turn_count, d=len(game.decisions), s=game.search_count)
+        snapshot = game.turn_count and game.turn_count % self.snapshot_every == 0
+        if snapshot: self.write('s', state=game.snapshot())
+        self.file.flush()
+        if snapshot or game.turn_count % self.sync_turns == 0: os.fsync(self.file.fileno())
+
+    def finish(self, game):
+        """Marks the game as over, so it is never resumed."""
+        self.write('end', winner=game.players.index(game.winner) if game.winner else None, turns=game.turn_count); self.close()
+
+    def close(self):
+        if self.file is None: return
+        self.file.flush(); os.fsync(self.file.fileno()); self.file.close(); self.file = None
+
+    def read(self):
+        """What resume() needs from the file: the header, every answer and search limit, the last turn boundary as
+        (turn, answers, searches, byte offset) and the last snapshot. None if there is no unfinished game to resume."""
+        if not self.path.exists(): return None
+        saved = {'header': None, 'answers': [], 'limits': {}, 'boundary': None, 'snapshot': None}
+        offset = 0
+        with open(self.path, 'rb') as f:
+            for raw in f:
+                try: line = json.loads(raw) if raw.endswith(b'\n') else None
+                except ValueError: line = None
+                if line is None: break  # A line cut short by a crash ends the usable journal.
+                offset += len(raw)
+                kind = line['k']
+                if kind == 'a': saved['answers'].append(line['a'])
+                elif kind == 'l': saved['limits'][line['i']] = line['n']
+                elif kind == 't': saved['boundary'] = (line['n'], line['d'], line['s'], offset)
+                elif kind == 's': saved['snapshot'] = line['state']; saved['boundary'] = saved['boundary'][:3] + (offset,)
+                elif kind == 'g': saved['header'] = line
+                elif kind == 'end': return None
+        return saved if saved['header'] and saved['boundary'] else None
+
+    def reopen(self, offset, turn):
+        """Drops everything after byte `offset` (the part of a turn that will be played again) and appends from there."""
+        self.close()
+        with open(self.path, 'r+b') as f: f.truncate(offset)
+        self.file, self.last_turn = open(self.path, 'a', encoding='utf-8'), turn
+
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
-def roll_dice(with_advantage=False):
+class Presenter:
+    """Silent front end used for headless play. It never prints, sleeps or blocks."""
+    def show(self, text="", player=None):
+        """Shows a line. With `player`, it is for them alone (their hand, their menus); a front end that serves more
+        than one person shows it only to them."""
+    def clear(self): pass
+    def pause(self, seconds): pass
+    def ask(self, prompt, player=None):
+        """Reads a line of input. `player` is who is being asked, for front ends that serve more than one person."""
+        raise RuntimeError(f"Headless game asked a human for input: {prompt!r}")
+
+PACING = {'instant': 0.0, 'fast': 0.3, 'cinematic': 1.0}  # How much of each of the game's pauses is actually waited out.
+
+class TerminalPresenter(Presenter):
+    """Default front end: draws to the terminal, paces the game and reads from stdin.
+
+    On an ANSI terminal, each screen (everything shown between two clear() calls) is drawn over the last one with
+    cursor moves. Only the lines that changed are rewritten, so a redraw is one write with no `clear` subprocess
+    and no flicker. A screen taller than the terminal just scrolls until the next clear(). Output that isn't a
+    terminal gets plain text."""
+    def __init__(self, pacing='fast', out=None):
+        self.pace, self.out = PACING[pacing], out or sys.stdout
+        self.ansi = self.out.isatty() and os.environ.get('TERM') != 'dumb'
+        if self.ansi and os.name == 'nt': os.system('')  # Turns on ANSI escape handling in the Windows console.
+        # screen: the lines currently drawn from the top row down; row: the next line of this screen to draw.
+        # Until the first clear(), or once a screen overflows, nothing is anchored to the top and output just scrolls.
+        self.screen, self.row, self.scrolling, self.size = [], 0, True, None
+
+    def _height(self, line, width): return max(1, -(-len(line) // width))
+    def _unanchor(self): self.scrolling = True; self.screen.clear()
+
+    def _draw(self, lines):
+        out = []
+        for line in lines:
+            i = self.row; self.row += 1
+            if self.scrolling: out.append(line + "\n"); continue
+            (width, height), screen = self.size, self.screen
+            top = sum(self._height(l, width) for l in screen[:i])
+            if top + self._height(line, width) >= height:
+                # Too tall for the terminal: the rest of this screen scrolls as plain text.
+                out.append(f"\x1b[{top + 1};1H\x1b[J{line}\n"); self._unanchor(); continue
+            if i < len(screen) and screen[i] == line: continue
+            if i < len(screen) and self._height(screen[i], width) == self._height(line, width) == 1: erase = "\x1b[2K"
+            else: erase = "\x1b[J"; del screen[i:]
+            out.append(f"\x1b[{top + 1};1H{erase}{line}")
+            if i < len(screen): screen[i] = line
+            else: screen.append(line)
+        self.out.write(''.join(out))
+
+    def _settle(self):
+        """Parks the cursor under the current screen and wipes whatever the previous screen left below it.
+        Returns the cursor's row, or None if output isn't anchored to the top."""
+        top = None
+        if self.ansi and not self.scrolling:
+            top = sum(self._height(l, self.size[0]) for l in self.screen[:self.row])
+            self.out.write(f"\x1b[{top + 1};1H\x1b[J"); del self.screen[self.row:]
+        self.out.flush()
+        return top
+
+    def show(self, text="", player=None):
+        if not self.ansi: print(text, file=self.out); return
+        self._draw(str(text).split('\n')); self.out.flush()
+
+    def clear(self):
+        if not self.ansi: return
+        size = tuple(shutil.get_terminal_size())
+        if self.scrolling or size != self.size:
+            self.out.write("\x1b[H\x1b[2J"); self.screen, self.scrolling, self.size = [], False, size
+        self.row = 0
+
+    def pause(self, seconds):
+        self._settle()
+        if self.pace: time.sleep(seconds * self.pace)
+
+    def ask(self, prompt, player=None):
+        if not self.ansi: return input(prompt)
+        *above, prompt = prompt.split('\n')
+        self._draw(above); top = self._settle()
+        # If the prompt or the answer echoed after it reaches the bottom row, the terminal scrolls under us.
+        if top is not None and top + self._height(prompt, self.size[0]) >= self.size[1]: self._unanchor(); top = None
+        answer = input(prompt)
+        if top is not None:
+            if top + self._height(prompt + answer, self.size[0]) >= self.size[1]: self._unanchor()
+            else: self.screen.append(prompt + answer)
+        self.row += 1
+        return answer
+
+class Decision:
+    """What a paused game is waiting for: `kind` ('set', 'roll', 'bail', 'focus', 'ability', ...) names the
+    choice, `prompt` is the text to put to `player` (None when it isn't any one player's call)."""
+    __slots__ = ('kind', 'prompt', 'player')
+    def __init__(self, kind, prompt, player=None): self.kind, self.prompt, self.player = kind, prompt, player
+    def __repr__(self): return f"Decision({self.kind!r}, {self.prompt!r}, {self.player.name if self.player else None!r})"
+
+def roll_dice(with_advantage=False, ui=None, rng=random):
     if with_advantage:
-        rolls = sorted([random.randint(1, 8) for _ in range(3)])
+        rolls = sorted([rng.randint(1, 8) for _ in range(3)])
         result = sum(rolls[1:])
-        logging.debug(f"Rolling with advantage. Rolls: {rolls}. Dropped: {rolls[0]}. Result: {result}")
-        print(f"(Rolled {rolls[0]}, {rolls[1]}, {rolls[2]} and dropped a {rolls[0]})")
+        log_event(logging.DEBUG, 'roll', advantage=True, rolls=rolls, result=result)
+        if ui: ui.show(f"(Rolled {rolls[0]}, {rolls[1]}, {rolls[2]} and dropped a {rolls[0]})")
         return result
-    roll1 = random.randint(1, 8)
-    roll2 = random.randint(1, 8)
+    roll1 = rng.randint(1, 8)
+    roll2 = rng.randint(1, 8)
     result = roll1 + roll2
-    logging.debug(f"Standard roll. Rolls: [{roll1}, {roll2}]. Result: {result}")
+    log_event(logging.DEBUG, 'roll', advantage=False, rolls=[roll1, roll2], result=result)
     return result
 
+# --- Dice Odds ---
+# Exact success chances for roll_dice, precomputed once so AI decisions are table lookups.
+
+DIE_SIDES = 8
+
+def _at_least_table(totals):
+    """P(total >= target) for every target 0..max(totals)+1, from a list of equally likely totals."""
+    counts = Counter(totals)
+    table, running = [], len(totals)
+    for target in range(max(counts) + 2):
+        table.append(running / len(totals)); running -= counts.get(target, 0)
+    return tuple(table)
+
+_FACES = range(1, DIE_SIDES + 1)
+STANDARD_ROLL_ODDS = _at_least_table([a + b for a in _FACES for b in _FACES])
+ADVANTAGE_ROLL_ODDS = _at_least_table([a + b + c - min(a, b, c) for a in _FACES for b in _FACES for c in _FACES])
+
+def roll_chance(target, advantage=False):
+    """Chance a single roll_dice() call meets `target`."""
+    table = ADVANTAGE_ROLL_ODDS if advantage else STANDARD_ROLL_ODDS
+    if target <= 0: return 1.0
+    return table[target] if target < len(table) else 0.0
+
+def success_chance(target, advantage=False, rerolls=0):
+    """Chance of meeting `target` when each failure may be re-rolled up to `rerolls` times
+    (Focus, the last-letter extra chance, or both)."""
+    return 1.0 - (1.0 - roll_chance(target, advantage)) ** (1 + rerolls)
+
+def set_chance(target, bailed=False):
+    """Chance a setter lands. A Bail forces a re-roll of a success, so both rolls must land."""
+    p = roll_chance(target)
+    return p * p if bailed else p
+
+# --- Draw Odds ---
+# Exact chances of drawing cards from a category. The counts come from the per-category tallies every CardPile keeps,
+# and the hypergeometric tables are cached per (pile size, cards in the category, cards drawn), so a query is a lookup.
+
+@lru_cache(maxsize=8192)
+def hypergeometric_odds(population, successes, draws):
+    """P(at least k of the cards drawn are successes) for k = 0..draws+1, drawing `draws` of `population` cards
+    without replacement when `successes` of them count."""
+    draws = min(draws, population)
+    ways = [math.comb(successes, k) * math.comb(population - successes, draws - k) for k in range(draws + 1)]
+    total, table, tail = math.comb(population, draws), [0.0], 0
+    for count in reversed(ways): tail += count; table.append(tail / total)
+    return tuple(reversed(table))
+
+def draw_chance(deck_size, deck_hits, discard_size, discard_hits, draws, at_least=1):
+    """Chance `draws` cards include at least `at_least` hits when they are drawn like Player.draw_card does:
+    from the deck, then from the reshuffled discard pile once the deck runs out."""
+    if draws > deck_size: at_least -= deck_hits; deck_size, deck_hits, draws = discard_size, discard_hits, draws - deck_size
+    if at_least <= 0: return 1.0
+    table = hypergeometric_odds(deck_size, deck_hits, draws)
+    return table[at_least] if at_least < len(table) else 0.0
+
+def next_draw_chance(player, category, draws=1, at_least=1):
+    """Chance `player`'s next `draws` cards include at least `at_least` from `category` (a CAT_* bit or a card-name category set)."""
+    deck, discard = player.deck, player.discard_pile
+    return draw_chance(len(deck), deck.category_count(category), len(discard), discard.category_count(category), draws, at_least)
+
+def hold_chance(player, category, hand_size=STARTING_HAND_SIZE, at_least=1):
+    """Chance `player` holds at least `at_least` cards from `category` once their hand is drawn up to `hand_size`,
+    as at the start of a set turn."""
+    return next_draw_chance(player, category, max(0, hand_size - len(player.hand)), at_least - player.hand.category_count(category))
+
 def get_combo_display_name_single(card, count):
-    if count <= 1: return card.replace('_', ' ').title()
+    name = CARD_DISPLAY_NAMES[CARD_IDS[card]] if card in CARD_IDS else card.replace('_', ' ').title()
+    if count <= 1: return name
     prefixes = {2: "Double", 3: "Triple", 4: "Quad"}
-    return f"{prefixes.get(count, f'{count}x')} {card.replace('_', ' ').title()}"
+    return f"{prefixes.get(count, f'{count}x')} {name}"
 
 def get_combo_display_name(combo):
     """Generates a full display name for a trick combo, handling special cases like Late Flips based on order."""
@@ -165,200 +539,1054 @@ def get_combo_display_name(combo):
 
     return ' + '.join(display_parts) if display_parts else "a basic move"
 
-def create_themed_deck(skater: Skater):
+def themed_deck_core(skater: Skater):
+    """The fixed part of a skater's deck: the base cards plus their specialty pack."""
     base_deck = ['bs_180', 'fs_180', 'pop_shuvit', 'wax', 'thrasher_magazine', 'thrasher_magazine', 'focus', 'pro_model_deck', 'sponsors', 'sponsors', 'bail', 'fakie', 'nollie', 'switch']
     specialty_packs = {
         "Flip Pro": ['kickflip']*3 + ['heelflip']*2 + ['treflip', 'varial_kickflip', 'hardflip', 'inward_heelflip'] + ['tall_ledge', '3_stair'] + ['focus', 'sponsors'],
         "Grind Specialist": ['fifty_fifty']*2 + ['boardslide']*2 + ['lipslide', 'crooked_grind', 'salad_grind', 'willy_grind'] + ['tall_ledge']*2 + ['flat_bar', 'down_rail', 'hubba'] + ['wax', 'wax', 'bail'],
         "Spot Finder": ['tall_ledge']*2 + ['flat_bar']*2 + ['round_rail', 'down_rail', 'hubba', '3_stair']*2 + ['5_stair', 'kicker_ramp'] + ['kickflip', 'boardslide'] + ['thrasher_magazine', 'bail'],
     }
-    final_deck = base_deck + specialty_packs.get(skater.name, [])
-    num_to_add = 38 - len(final_deck)
-    if num_to_add > 0:
-        deck_pool = [k for k in TRICKS_DATABASE.keys()] + list(STANCES.keys())
-        final_deck.extend(random.sample(deck_pool, num_to_add))
-    random.shuffle(final_deck)
+    return base_deck + specialty_packs.get(skater.name, [])
+
+FILLER_POOL = tuple(TRICKS_DATABASE) + tuple(STANCES)  # Cards a deck's filler is drawn from, one copy each.
+
+def filler_size(skater: Skater): return max(0, DECK_SIZE - len(themed_deck_core(skater)))
+
+def create_themed_deck(skater: Skater, rng=random, filler=None):
+    """A shuffled deck of DECK_SIZE cards. The core is padded with `filler` if given (see load_tuned_decks),
+    otherwise with a fresh random sample of FILLER_POOL."""
+    final_deck = themed_deck_core(skater)
+    num_to_add = DECK_SIZE - len(final_deck)
+    if filler is not None: final_deck.extend(filler)
+    elif num_to_add > 0: final_deck.extend(rng.sample(FILLER_POOL, num_to_add))
+    rng.shuffle(final_deck)
     return final_deck
 
+# --- Tuned Decks ---
+# sk8_decks.py evolves each skater's filler and saves the winners to sk8_decks.json. Games load it at startup;
+# a skater without a tuned entry keeps the random filler.
+
+TUNED_DECKS_FILE = Path(__file__).parent / 'sk8_decks.json'
+TUNED_DECKS = {}  # Skater name -> filler card list; the default for every new SkateGame.
+
+def check_filler(skater: Skater, filler):
+    """Raises ValueError unless `filler` can pad `skater`'s deck: filler_size cards, each from FILLER_POOL, no repeats."""
+    if len(filler) != filler_size(skater): raise ValueError(f"{skater.name} needs {filler_size(skater)} filler cards, got {len(filler)}")
+    unknown = [c for c in filler if c not in FILLER_POOL]
+    if unknown: raise ValueError(f"Not filler cards: {', '.join(unknown)}")
+    if len(set(filler)) != len(filler): raise ValueError(f"Filler for {skater.name} repeats a card")
+
+def load_tuned_decks(path=TUNED_DECKS_FILE):
+    """Makes the decks saved in `path` the default for new games, if the file exists. Returns {skater name: filler}."""
+    global TUNED_DECKS
+    path = Path(path)
+    if not path.exists(): return TUNED_DECKS
+    by_name = {s.name: s for s in SKATERS}
+    decks = {name: list(filler) for name, filler in json.loads(path.read_text())['decks'].items() if name in by_name}
+    for name, filler in decks.items(): check_filler(by_name[name], filler)
+    TUNED_DECKS = decks
+    log_event(logging.INFO, 'tuned_decks', path=str(path), skaters=sorted(decks))
+    return TUNED_DECKS
+
+# --- Combo Rules ---
+
+def validate_combo_ids(combo):
+    """Checks a combo of card ids against the trick rules in one pass and returns (is_valid, message)."""
+    cats = CARD_CATEGORIES
+    union = stance_count = surface_count = mixed = 0
+    stair = grind = shuvit = -1
+    for cid in combo:
+        m = cats[cid]; union |= m
+        if m & CAT_STANCE: stance_count += 1
+        if m & CAT_SURFACE: surface_count += 1
+        if m & CAT_STAIR:
+            if stair >= 0 and stair != cid: mixed |= CAT_STAIR
+            stair = cid
+        if m & CAT_GRIND:
+            if grind >= 0 and grind != cid: mixed |= CAT_GRIND
+            grind = cid
+        if m & CAT_SHUVIT:
+            if shuvit >= 0 and shuvit != cid: mixed |= CAT_SHUVIT
+            shuvit = cid
+    broken = _broken_combo_rule(combo, union, stance_count, surface_count, mixed, KICKER_RAMP in combo, WAX in combo, OLLIE in combo)
+    return (False, broken) if broken else (True, "Valid combo!")
+
+def _broken_combo_rule(combo, union, stance_count, surface_count, mixed, kicker, wax, ollie):
+    """The message for the first trick rule a combo breaks, or None. Takes the combo's category union, stance and
+    grind surface counts, the CAT_STAIR/CAT_GRIND/CAT_SHUVIT bits of `mixed` for categories with more than one
+    card type, and whether a Kicker Ramp, Wax and Ollie are in it; only the first two cards are looked at."""
+    if not union & (CAT_TRICK | CAT_STANCE): return "You must select at least one trick card."
+    if union & CAT_OBSTACLE and not union & CAT_CORE: return "You must perform a trick (like an Ollie, Flip, etc.) to use an Obstacle."
+    if stance_count > 1: return "Cannot use more than one Stance."
+    if stance_count and not CARD_CATEGORIES[combo[0]] & CAT_STANCE: return "A Stance card must be played first."
+    if stance_count and len(combo) == 1: return "A stance card must modify a trick."
+    if stance_count and not CARD_CATEGORIES[combo[1]] & CAT_CORE: return "A Stance must be followed by a valid trick card."
+    if mixed & CAT_STAIR: return "Cannot combine different stair sets."
+    if surface_count > 1: return "Cannot use more than one grind surface."
+    if kicker and union & CAT_STAIR: return "Cannot combine a kicker with stairs."
+    if mixed & CAT_GRIND: return "Can't do more than one type of grind."
+    if wax and not union & CAT_GRIND: return "'Wax' only works with grinds or slides."
+    if mixed & CAT_SHUVIT: return "Cannot combine more than one type of Shuvit."
+    # This allows late flips and late shuvits (which contain an ollie), but not a flip card and shuvit card together
+    if union & CAT_FLIP and union & CAT_SHUVIT and not ollie: return "Cannot combine a Flip and a Shuvit card. Use Varial Flips instead."
+    return None
+
+def validate_combo(combo):
+    """Checks a combo of card names against the trick rules and returns (is_valid, message)."""
+    return validate_combo_ids(card_ids(combo))
+
+# --- Combo Search ---
+
+# Cards that can go into a set combo. Thrasher Magazine and Sponsors are played on their own, and Focus/Bail do nothing in a combo.
+COMBO_CARD_IDS = frozenset(i for i, m in enumerate(CARD_CATEGORIES) if m & (CAT_TRICK | CAT_STANCE)) | {WAX, PRO_MODEL_DECK}
+# Categories a combo holds at most one card of, and at most one card type of (see ComboSearch).
+_ONE_CARD, _ONE_TYPE = CAT_STANCE | CAT_SURFACE, CAT_STAIR | CAT_GRIND | CAT_SHUVIT
+# Cards a matcher needs in hand to avoid the defender penalty, apart from the Ollie, which never leaves a hand.
+MATCH_CARD_IDS = frozenset(i for i, m in enumerate(CARD_CATEGORIES) if m & (CAT_TRICK | CAT_STANCE) and i != OLLIE)
+
+@lru_cache(maxsize=65536)
+def _combo_orderings(cards):
+    return _build_combo_orderings(cards)
+
+def combo_orderings(cards):
+    """The orderings of a multiset of card ids that the rules can tell apart.
+
+    A stance always leads. Order only matters beyond that for Late tricks, so we return one plain order
+    (Ollie parked at the end) plus one 'ollie, trick' variant per Flip/Shuvit type when an Ollie is present.
+    Results are cached per sorted multiset."""
+    return _combo_orderings(tuple(sorted(cards)))
+
+def _build_combo_orderings(cards):
+    cats = CARD_CATEGORIES
+    stance = [c for c in cards if cats[c] & CAT_STANCE]
+    rest = sorted(c for c in cards if not cats[c] & CAT_STANCE)
+    ollies = [c for c in rest if c == OLLIE]
+    others = [c for c in rest if c != OLLIE]
+    lead = next((c for c in others if cats[c] & CAT_CORE), None)
+    if lead is not None: others.remove(lead); plain = tuple(stance + [lead] + others + ollies)
+    else: plain = tuple(stance + ollies + others)
+    orderings = [plain]
+    if ollies:
+        for trick in sorted(set(c for c in rest if cats[c] & CAT_LATE)):
+            tail = list(rest); tail.remove(OLLIE); tail.remove(trick)
+            late = tuple(stance + [OLLIE, trick] + tail)
+            if late not in orderings: orderings.append(late)
+    return orderings
+
+class ComboSearch:
+    """Depth-first search over the unique card multisets of a hand, up to max_len cards.
+
+    Branches that break an order-free rule of validate_combo (one stance, one grind surface, one stair
+    size, no kicker with stairs, one grind type, one shuvit type) are cut as soon as the offending card is
+    added. Each surviving multiset is expanded with combo_orderings() and fully validated. The search stops
+    early once time_budget seconds have passed or max_nodes nodes have been visited; `timed_out` records
+    whether that happened.
+    Combos are handled as tuples of card ids throughout."""
+    def __init__(self, hand, max_len=AI_MAX_COMBO_LENGTH, time_budget=None, max_nodes=None):
+        if isinstance(hand, CardPile): counts = {cid: hand.counts[cid] for cid in COMBO_CARD_IDS if hand.counts[cid]}
+        else: counts = Counter(cid for cid in card_ids(hand) if cid in COMBO_CARD_IDS)
+        self.kinds = sorted(counts)
+        self.counts = [counts[c] for c in self.kinds]
+        self.max_len, self.time_budget, self.max_nodes = max_len, time_budget, max_nodes
+        self.nodes, self.timed_out = 0, False
+
+    def _walk(self, emit):
+        """Calls emit(cards) for each multiset the search reaches, as a sorted tuple of card ids, until it stops."""
+        self.nodes, self.timed_out = 0, False
+        deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        kinds, counts, cats = self.kinds, self.counts, CARD_CATEGORIES
+        kicker = kinds.index(KICKER_RAMP) if KICKER_RAMP in kinds else None
+        used = [0] * len(kinds)
+        chosen = []  # Cards are added in id order, so this stays sorted.
+
+        def visit(start, union):
+            if self.timed_out: return
+            self.nodes += 1
+            if deadline is not None and self.nodes % 32 == 0 and time.perf_counter() > deadline:
+                self.timed_out = True; return
+            if self.max_nodes is not None and self.nodes >= self.max_nodes:
+                self.timed_out = True; return
+            if chosen: emit(tuple(chosen))
+            if len(chosen) >= self.max_len: return
+            for j in range(start, len(kinds)):
+                if used[j] >= counts[j]: continue
+                card = kinds[j]; m = cats[card]
+                # `union` is the categories already chosen: one stance and one grind surface at most, one card type per
+                # stair, grind and shuvit category, and no kicker with stairs.
+                if m & union & _ONE_CARD or (m & union & _ONE_TYPE and not used[j]): continue
+                if (card == KICKER_RAMP and union & CAT_STAIR) or (m & CAT_STAIR and kicker is not None and used[kicker]): continue
+                used[j] += 1; chosen.append(card)
+                visit(j, union | m)
+                chosen.pop(); used[j] -= 1
+
+        visit(0, 0)
+
+    def best(self, score):
+        """Returns (best_combo, best_score) over every valid ordering, or ((), None). score(combo) returns a number or
+        None to reject the combo; ties go to the combo found first."""
+        best_combo, best_score = (), None
+        def consider(cards):
+            nonlocal best_combo, best_score
+            for combo in valid_orderings(cards):
+                value = score(combo)
+                if value is not None and (best_score is None or value > best_score): best_combo, best_score = combo, value
+        self._walk(consider)
+        return best_combo, best_score
+
+    def all(self):
+        """Every valid ordered combo in the hand, as tuples of card ids."""
+        found = []
+        self._walk(lambda cards: found.extend(valid_orderings(cards)))
+        return found
+
+    def sets(self, skater):
+        """Every valid ordered combo in the hand with its set difficulty for `skater`, as [(combo ids, difficulty)] in
+        the order ComboIndex.all(..., as_set=True) gives them."""
+        found = []
+        self._walk(lambda cards: found.extend(set_orderings(cards, skater)))
+        return found
+
+# --- Difficulty Engine ---
+
+def combo_difficulty_ids(combo, skater, ignore_negative_ability=False, explanation=None):
+    """Scores a combo of card ids for a skater. Explanation lines are appended only when an `explanation` list is passed in."""
+    cats, names, display = CARD_CATEGORIES, CARD_NAMES, CARD_DISPLAY_NAMES
+    total_difficulty = 0
+
+    # Check for stanced and regular late tricks
+    trick = -1
+    if len(combo) >= 3 and cats[combo[0]] & CAT_STANCE and combo[1] == OLLIE and cats[combo[2]] & CAT_LATE: trick = combo[2]
+    elif len(combo) >= 2 and combo[0] == OLLIE and cats[combo[1]] & CAT_LATE: trick = combo[1]
+    if trick >= 0 and CARD_DIFFICULTY[trick] > 0:
+        late_bonus = CARD_DIFFICULTY[trick]
+        total_difficulty += late_bonus
+        if explanation is not None: explanation.append(f"  - Late {'Flip' if cats[trick] & CAT_FLIP else 'Shuvit'} Bonus (x2 {display[trick]}): +{late_bonus}")
+
+    card_counts, union, stance = {}, 0, -1
+    for cid in combo:
+        card_counts[cid] = card_counts.get(cid, 0) + 1
+        m = cats[cid]; union |= m
+        if stance < 0 and m & CAT_STANCE: stance = cid
+
+    if stance >= 0:
+        total_difficulty += STANCE_COST[stance]
+        if explanation is not None: explanation.append(f"  - {display[stance]} Stance: +{STANCE_COST[stance]}")
+
+    if union & CAT_GRIND and not union & CAT_SURFACE:
+        total_difficulty += 2
+        if explanation is not None: explanation.append("  - Flatground Grind (Low Ledge): +2")
+
+    passive, neg = skater.passive_ability, skater.negative_ability
+    passive_bits = category_bits(passive['category']) if passive['type'] == 'difficulty_modifier' else 0
+    neg_bits = category_bits(neg['category']) if neg['type'] == 'difficulty_modifier' and not ignore_negative_ability else 0
+    for cid, count in card_counts.items():
+        m = cats[cid]
+        if not m & CAT_TRICK: continue
+        base_difficulty = CARD_DIFFICULTY[cid]
+        duplicate_bonus = count * (count + 1) // 2 - 1 if m & (CAT_STAIR | CAT_FLIP) and count > 1 else 0
+        in_passive, in_negative = passive_bits >> cid & 1, neg_bits >> cid & 1
+        current_mods = duplicate_bonus + (passive['amount'] if in_passive else 0) + (neg['amount'] if in_negative else 0)
+        total_difficulty += (base_difficulty * count) + current_mods
+        if explanation is not None:
+            mod_explanation = []
+            if duplicate_bonus: mod_explanation.append(f"Duplicate: +{duplicate_bonus}")
+            if in_passive: mod_explanation.append(f"Passive: {passive['amount']}")
+            if in_negative: mod_explanation.append(f"Negative: +{neg['amount']}")
+            explanation.append(f"  - {get_combo_display_name_single(names[cid], count)}: {base_difficulty}{' x' + str(count) if count > 1 else ''}{' (' + ', '.join(mod_explanation) + ')' if mod_explanation else ''}")
+
+    if WAX in combo:
+        total_difficulty -= 2
+        if explanation is not None: explanation.append("  - Wax Card: -2")
+    return max(1, total_difficulty)
+
+def combo_difficulty_breakdown(combo, skater, ignore_negative_ability=False, explanation=None):
+    """combo_difficulty_ids() for a combo of card names."""
+    return combo_difficulty_ids(card_ids(combo), skater, ignore_negative_ability, explanation)
+
+class DifficultyEngine:
+    """Memoizes combo difficulty per (ordered combo, skater, ignore_negative) with bounded LRU eviction.
+
+    Entries are keyed on card id tuples. Skaters are keyed by identity, so call clear() after mutating a
+    Skater's abilities in place. Safe to share between threads (the match server runs games on a thread pool):
+    the cache is only touched under a lock, and a miss is computed outside it."""
+    def __init__(self, maxsize=65536):
+        self.maxsize, self.hits, self.misses = maxsize, 0, 0
+        self._cache, self._lock = OrderedDict(), threading.Lock()
+
+    def difficulty_ids(self, combo, skater, ignore_negative_ability=False):
+        key = (combo, skater, ignore_negative_ability)
+        cache = self._cache
+        with self._lock:
+            difficulty = cache.get(key)
+            if difficulty is not None:
+                self.hits += 1; cache.move_to_end(key)
+                return difficulty
+            self.misses += 1
+        difficulty = combo_difficulty_ids(combo, skater, ignore_negative_ability)
+        with self._lock:
+            cache[key] = difficulty
+            if len(cache) > self.maxsize: cache.popitem(last=False)
+        return difficulty
+
+    def difficulty(self, combo, skater, ignore_negative_ability=False):
+        return self.difficulty_ids(card_ids(combo), skater, ignore_negative_ability)
+
+    def explain(self, combo, skater, ignore_negative_ability=False):
+        explanation = []
+        combo_difficulty_breakdown(combo, skater, ignore_negative_ability, explanation)
+        return explanation
+
+    def cache_info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._cache), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock: self._cache.clear(); self.hits = self.misses = 0
+
+DIFFICULTY_ENGINE = DifficultyEngine()
+
+def set_difficulty_ids(combo, skater):
+    """The difficulty of setting `combo` as `skater`: a Pro Model Deck in the combo drops their negative ability. The
+    game, GameState.apply and the AI scorers all ask this."""
+    return DIFFICULTY_ENGINE.difficulty_ids(combo, skater, PRO_MODEL_DECK in combo)
+
+def defender_penalty(combo, held):
+    """What a matcher adds to `combo` (card ids): DEFENDER_PENALTY unless they hold every trick and stance card in it.
+    `held` maps a card id to how many they hold, e.g. CardPile.counts or a Counter of a SeatState hand. Wax and Pro
+    Model Deck don't count, and neither does the Ollie, which never leaves a hand. The live game and GameState both ask this."""
+    needs = Counter(c for c in combo if c in MATCH_CARD_IDS)
+    return 0 if all(held[c] >= n for c, n in needs.items()) else DEFENDER_PENALTY
+
+# Every AI set decision walks the sub-multisets of its hand, and across hands the same small multisets come up again
+# and again, so their valid orderings and set difficulties are cached here rather than re-validated per combo.
+@lru_cache(maxsize=65536)
+def valid_orderings(cards):
+    """combo_orderings() of a sorted multiset of card ids, less the ones validate_combo_ids rejects."""
+    return tuple(combo for combo in _combo_orderings(cards) if validate_combo_ids(combo)[0])
+
+@lru_cache(maxsize=65536)
+def set_orderings(cards, skater):
+    """valid_orderings() of a sorted multiset, each with its set difficulty for `skater`. Call cache_clear() after
+    changing the rules."""
+    return tuple((combo, set_difficulty_ids(combo, skater)) for combo in valid_orderings(cards))
+
+class DifficultyExplanation:
+    """The "Difficulty Calculation" lines for a combo, built on first iteration or str()."""
+    def __init__(self, combo, skater, ignore_negative_ability=False):
+        self.combo, self.skater, self.ignore_negative_ability = tuple(combo), skater, ignore_negative_ability
+        self._lines = None
+
+    def lines(self):
+        if self._lines is None: self._lines = DIFFICULTY_ENGINE.explain(self.combo, self.skater, self.ignore_negative_ability)
+        return self._lines
+
+    def __iter__(self): return iter(self.lines())
+    def __str__(self): return ' '.join(self.lines())
+
+# --- Incremental Combos ---
+
+class ComboEvaluator:
+    """A combo built up one card id at a time, for live "current difficulty" feedback while a combo is picked and for
+    searches that extend combos in order.
+
+    push() and pop() are O(1). They keep the category union, the stance/surface/stair/grind/shuvit tracking and
+    the per-card part of the difficulty (base x count, duplicate bonuses, passive and negative modifiers) up to
+    date, saving what they overwrite on an undo stack. check(), difficulty and can_extend() read that state in
+    O(1) and agree exactly with validate_combo_ids and combo_difficulty_ids on the same ordered combo.
+
+    In this tree it drives build_combo_index's walk over multisets. The AI's live search (ComboSearch) keeps its own,
+    lighter state, and display_name() is not kept up to date: it is rebuilt in O(n) when asked for."""
+    __slots__ = ('cards', 'counts', 'union', 'stances', 'stance', 'surfaces', 'stair', 'grind', 'shuvit', 'mixed', 'trick_total',
+                 '_passive', '_negative', '_undo')
+
+    def __init__(self, skater=None, ignore_negative_ability=False, combo=()):
+        """`skater` supplies the passive and negative modifiers; without one, difficulty is the bare card math."""
+        self.cards, self.counts, self._undo = [], [0] * len(CARD_NAMES), []
+        self.union = self.stances = self.surfaces = self.mixed = self.trick_total = 0
+        self.stance = self.stair = self.grind = self.shuvit = -1
+        self._passive = self._negative = (0, 0)
+        if skater is not None:
+            passive, neg = skater.passive_ability, skater.negative_ability
+            if passive['type'] == 'difficulty_modifier': self._passive = (category_bits(passive['category']), passive['amount'])
+            if neg['type'] == 'difficulty_modifier' and not ignore_negative_ability: self._negative = (category_bits(neg['category']), neg['amount'])
+        for cid in combo: self.push(cid)
+
+    def push(self, cid):
+        m = CARD_CATEGORIES[cid]
+        self._undo.append((self.union, self.stances, self.stance, self.surfaces, self.stair, self.grind, self.shuvit, self.mixed, self.trick_total))
+        self.cards.append(cid)
+        count = self.counts[cid] = self.counts[cid] + 1
+        self.union |= m
+        if m & CAT_STANCE:
+            if not self.stances: self.stance = cid
+            self.stances += 1
+        if m & CAT_SURFACE: self.surfaces += 1
+        if m & CAT_STAIR:
+            if 0 <= self.stair != cid: self.mixed |= CAT_STAIR
+            self.stair = cid
+        if m & CAT_GRIND:
+            if 0 <= self.grind != cid: self.mixed |= CAT_GRIND
+            self.grind = cid
+        if m & CAT_SHUVIT:
+            if 0 <= self.shuvit != cid: self.mixed |= CAT_SHUVIT
+            self.shuvit = cid
+        if m & CAT_TRICK:
+            # The n-th copy of a Flip or stair adds n to the duplicate bonus; modifiers apply once per card type.
+            step = CARD_DIFFICULTY[cid] + (count if count > 1 and m & (CAT_STAIR | CAT_FLIP) else 0)
+            if count == 1:
+                (passive_bits, passive), (neg_bits, neg) = self._passive, self._negative
+                step += (passive if passive_bits >> cid & 1 else 0) + (neg if neg_bits >> cid & 1 else 0)
+            self.trick_total += step
+
+    def pop(self):
+        """Takes the last card back off and returns its id."""
+        cid = self.cards.pop(); self.counts[cid] -= 1
+        self.union, self.stances, self.stance, self.surfaces, self.stair, self.grind, self.shuvit, self.mixed, self.trick_total = self._undo.pop()
+        return cid
+
+    def __len__(self): return len(self.cards)
+
+    @property
+    def combo(self): return tuple(self.cards)
+
+    def check(self, order=None):
+        """(is_valid, message), as validate_combo_ids would return for the combo so far, or for `order`: the same
+        cards in another order (only the stance rules look at the order, and they only read the first two cards)."""
+        counts = self.counts
+        broken = _broken_combo_rule(self.cards if order is None else order, self.union, self.stances, self.surfaces, self.mixed, counts[KICKER_RAMP], counts[WAX], counts[OLLIE])
+        return (False, broken) if broken else (True, "Valid combo!")
+
+    @property
+    def valid(self): return self.check()[0]
+
+    @property
+    def difficulty(self):
+        """combo_difficulty_ids() of the combo so far."""
+        cards, cats, total = self.cards, CARD_CATEGORIES, self.trick_total
+        if len(cards) >= 3 and cats[cards[0]] & CAT_STANCE and cards[1] == OLLIE and cats[cards[2]] & CAT_LATE: total += CARD_DIFFICULTY[cards[2]]
+        elif len(cards) >= 2 and cards[0] == OLLIE and cats[cards[1]] & CAT_LATE: total += CARD_DIFFICULTY[cards[1]]
+        if self.stances: total += STANCE_COST[self.stance]
+        if self.union & CAT_GRIND and not self.union & CAT_SURFACE: total += 2
+        if self.counts[WAX]: total -= 2
+        return max(1, total)
+
+    def can_extend(self, cid):
+        """False if adding `cid` breaks an order-free rule (one stance, one grind surface, one stair size, no kicker
+        with stairs, one grind type, one shuvit type) that no further card could fix."""
+        m = CARD_CATEGORIES[cid]
+        if m & CAT_STANCE: return not self.stances
+        if m & CAT_SURFACE: return not self.surfaces
+        if m & CAT_STAIR: return not self.counts[KICKER_RAMP] and not self.mixed & CAT_STAIR and self.stair in (-1, cid)
+        if cid == KICKER_RAMP: return not self.union & CAT_STAIR
+        if m & CAT_GRIND: return not self.mixed & CAT_GRIND and self.grind in (-1, cid)
+        if m & CAT_SHUVIT: return not self.mixed & CAT_SHUVIT and self.shuvit in (-1, cid)
+        return True
+
+    def display_name(self):
+        """get_combo_display_name() of the combo so far, rebuilt in O(n) on each call since naming depends on the whole
+        order (a late flip is an Ollie and a flip anywhere in the combo). For showing a pick, not for search loops."""
+        return get_combo_display_name(card_names(self.cards))
+
+# --- AI Scoring ---
+
+def combo_set_scorer(skater, opponent_letters):
+    """A score(combo, difficulty=None) callback that rates a set by expected value, as if the opponent matched at our
+    own difficulty; pass the combo's set difficulty when it is already known (as ComboIndex.all gives it).
+    Search move ordering and rollouts rank by this, since it depends only on the hand and caches well (see
+    set_candidates); the setter AI's own choice uses the opponent-aware SetScorer.
+
+    A set is worth (chance we land it) x (chance the opponent then misses at the defender penalty, with
+    their last-letter re-roll) letters, less the cards we expect to lose."""
+    opponent_rerolls = 1 if len(opponent_letters) == MAX_LETTERS - 1 else 0
+    letter_value = AI_LAST_LETTER_VALUE if opponent_rerolls else AI_LETTER_VALUE
+    top = len(STANDARD_ROLL_ODDS)
+    set_value = [roll_chance(d) * (1 - success_chance(d + DEFENDER_PENALTY, rerolls=opponent_rerolls)) * letter_value for d in range(top + 1)]
+    def score(combo, difficulty=None):
+        difficulty = min(set_difficulty_ids(combo, skater) if difficulty is None else difficulty, top)
+        land = roll_chance(difficulty)
+        lost = len(combo) - combo.count(OLLIE)
+        return set_value[difficulty] - AI_DEFAULT_CARD_VALUE * (land * min(lost, 1) + (1 - land) * lost)
+    return score
+
+@lru_cache(maxsize=65536)
+def hold_all_chance(population, draws, needs):
+    """Chance `draws` cards dealt at random from `population` include at least `needed` copies of every card in
+    `needs`, a tuple of (copies in the population, needed) pairs. A known hand is the case draws == population."""
+    if not needs: return 1.0
+    (copies, needed), rest = needs[0], needs[1:]
+    total, ways = 0.0, math.comb(population, draws)
+    for k in range(needed, min(copies, draws) + 1):
+        p = math.comb(copies, k) * math.comb(population - copies, draws - k) / ways
+        if p: total += p * hold_all_chance(population - copies, draws - k, rest)
+    return total
+
+def skater_modifiers(skater, ignore_negative_ability=False):
+    """Per card id, what the skater's difficulty modifiers add to a combo holding that card (see combo_difficulty_ids)."""
+    mods = [0] * len(CARD_NAMES)
+    for ability in (skater.passive_ability,) if ignore_negative_ability else (skater.passive_ability, skater.negative_ability):
+        if ability['type'] != 'difficulty_modifier': continue
+        bits = category_bits(ability['category'])
+        for cid, m in enumerate(CARD_CATEGORIES):
+            if m & CAT_TRICK and bits >> cid & 1: mods[cid] += ability['amount']
+    return mods
+
+@lru_cache(maxsize=64)
+def modifier_offsets(skater, defender, relieved=False):
+    """Per card id, how much more a combo holding it costs `defender` than `skater` (without their negative ability if
+    `relieved`, as when the combo holds a Pro Model Deck): (with the defender's negative ability, without it). A combo's
+    offset is the sum over its distinct cards. Call cache_clear() after changing abilities."""
+    mine = skater_modifiers(skater, relieved)
+    return (tuple(d - m for d, m in zip(skater_modifiers(defender), mine)),
+            tuple(d - m for d, m in zip(skater_modifiers(defender, True), mine)))
+
+@lru_cache(maxsize=1024)
+def match_odds(focus, rerolls, size):
+    """(plain, with advantage) tables of a defender's match chance for targets 0..size-1, given `rerolls` and the
+    chance `focus` that they hold Focus for one more."""
+    return tuple(tuple(focus * success_chance(t, adv, rerolls + 1) + (1 - focus) * success_chance(t, adv, rerolls) for t in range(size))
+                 for adv in (False, True))
+
+class SetScorer:
+    """Rates a setter's combos by expected value against the defender who has to match them. choose() takes every
+    candidate in a hand at once and only fully scores the ones whose cheap bound() could still win.
+
+    A set is worth (chance we land it) x (chance the defender misses) letters, less the cards we expect to lose. The
+    defender's target is the combo's difficulty for their skater (without their negative ability if they hold Pro
+    Model Deck), plus DEFENDER_PENALTY unless they hold every trick card in it. Holding any of them, the Ollie
+    included, lets them spend one for advantage, and Focus and a last letter add re-rolls. Unless the defender's hand
+    is `known`, it is taken to be a random draw of its size from their hand and deck together, the cards
+    determinize() re-deals; holding Focus, Pro Model Deck and the combo's cards are treated as independent.
+
+    Difficulties for the two skaters differ only by their modifiers on the distinct trick cards in a combo, so the
+    defender's is the setter's plus a per-card offset (a second set of offsets covers combos holding Pro Model Deck,
+    which the setter plays without their negative ability). Everything that doesn't depend on the combo is looked up once
+    here, and holding chances are shared by every combo that needs the same cards."""
+    def __init__(self, skater, defender, known=False):
+        """`defender` is the matcher's SeatState (SeatState.from_player for a Player)."""
+        self.skater, self.defender = skater, defender.skater
+        self.copies = copies = [0] * len(CARD_NAMES)
+        for card in defender.hand if known else defender.hand + defender.deck: copies[card] += 1
+        copies[OLLIE] = 0  # The Ollie never leaves a hand.
+        self.population, self.hand_size = sum(copies), len(defender.hand) - defender.hand.count(OLLIE)
+        rerolls = 1 if len(defender.letters) == MAX_LETTERS - 1 else 0
+        self.letter_value = AI_LETTER_VALUE if not rerolls else AI_LAST_LETTER_VALUE
+        focus, self.pro = self._holds_any((FOCUS,)), self._holds_any((PRO_MODEL_DECK,))
+        self.top = len(STANDARD_ROLL_ODDS)
+        self.cap, self.land = self.top + DEFENDER_PENALTY, [roll_chance(d) for d in range(self.top + 1)]
+        self.plain, self.advantaged = match_odds(focus, rerolls, self.cap + 1)
+        self.unaided = match_odds(0.0, rerolls, self.cap + 1)  # Without Focus, for bound().
+        self.offsets = (modifier_offsets(skater, defender.skater), modifier_offsets(skater, defender.skater, True))
+        self.holdings = {}
+
+    def _holds_any(self, cards):
+        return hypergeometric_odds(self.population, sum(map(self.copies.__getitem__, cards)), self.hand_size)[1]
+
+    def _holdings(self, needs):
+        """(chance the defender holds every card in `needs`, chance they hold at least one), for a sorted tuple of card ids."""
+        copies, distinct = self.copies, set(needs)
+        if len(distinct) == len(needs): pattern = tuple(sorted([(copies[c], 1) for c in needs]))
+        else: pattern = tuple(sorted([(copies[c], needs.count(c)) for c in distinct]))
+        held = hold_all_chance(self.population, self.hand_size, pattern)
+        found = self.holdings[needs] = (held, self._holds_any(distinct) if needs else held)
+        return found
+
+    def _targets(self, combo, difficulty, distinct):
+        """The defender's difficulty for the combo, with and without their negative ability."""
+        if difficulty > 1:
+            shift, relief = self.offsets[PRO_MODEL_DECK in distinct]
+            return max(1, difficulty + sum(map(shift.__getitem__, distinct))), max(1, difficulty + sum(map(relief.__getitem__, distinct)))
+        # The setter's difficulty may have been clamped at 1, so work the defender's out directly.
+        return DIFFICULTY_ENGINE.difficulty_ids(combo, self.defender), DIFFICULTY_ENGINE.difficulty_ids(combo, self.defender, True)
+
+    def _net(self, combo, difficulty, miss):
+        land = self.land[min(difficulty, self.top)]
+        lost = len(combo) - combo.count(OLLIE)
+        return land * miss * self.letter_value - AI_DEFAULT_CARD_VALUE * (land * min(lost, 1) + (1 - land) * lost)
+
+    def score(self, combo, difficulty=None):
+        if difficulty is None: difficulty = set_difficulty_ids(combo, self.skater)
+        distinct = set(combo)
+        target, relieved = self._targets(combo, difficulty, distinct)
+        needs = tuple(sorted(filter(MATCH_CARD_IDS.__contains__, combo)))
+        held, any_held = self.holdings.get(needs) or self._holdings(needs)
+        if OLLIE in distinct: any_held = 1.0
+        plain, advantaged, cap = self.plain, self.advantaged, self.cap
+        penalized = min(target + DEFENDER_PENALTY, cap)
+        match = held * advantaged[min(target, cap)] + (any_held - held) * advantaged[penalized] + (1 - any_held) * plain[penalized]
+        if self.pro and relieved != target:
+            penalized = min(relieved + DEFENDER_PENALTY, cap)
+            relieved_match = held * advantaged[min(relieved, cap)] + (any_held - held) * advantaged[penalized] + (1 - any_held) * plain[penalized]
+            match = self.pro * max(match, relieved_match) + (1 - self.pro) * match
+        return self._net(combo, difficulty, 1 - match)
+
+    def bound(self, combo, difficulty):
+        """An upper bound on score() that skips the holding odds: the defender takes the penalty, has no Focus or Pro
+        Model Deck, and has advantage only if the combo has an Ollie."""
+        distinct = set(combo)
+        if difficulty <= 1: target = max(self._targets(combo, difficulty, distinct))
+        else:
+            shift, relief = self.offsets[PRO_MODEL_DECK in distinct]
+            target = difficulty + sum(map(shift.__getitem__, distinct))
+            if self.pro: target = max(target, difficulty + sum(map(relief.__getitem__, distinct)))
+        land = self.land[min(difficulty, self.top)]
+        lost = len(combo) - combo.count(OLLIE)
+        miss = 1 - self.unaided[OLLIE in distinct][min(max(1, target) + DEFENDER_PENALTY, self.cap)]
+        return land * miss * self.letter_value - AI_DEFAULT_CARD_VALUE * (land * min(lost, 1) + (1 - land) * lost)
+
+    def choose(self, candidates):
+        """The best of `candidates` ((combo, set difficulty) pairs in search order, e.g. from ComboIndex.all(as_set=True)) as
+        (combo, value), or ((), None); ties go to the earlier one, as in ComboSearch.best. Candidates are scored in
+        order of their bound(), and the rest are skipped once none of them can beat the best so far."""
+        bounds = [self.bound(combo, difficulty) for combo, difficulty in candidates]
+        best, best_value = None, None
+        for i in sorted(range(len(candidates)), key=bounds.__getitem__, reverse=True):
+            if best_value is not None and bounds[i] < best_value - 1e-9: break
+            value = self.score(*candidates[i])
+            if best_value is None or value > best_value or (value == best_value and i < best): best, best_value = i, value
+        return (candidates[best][0], best_value) if best is not None else ((), None)
+
+    def best(self, hand, max_len=AI_MAX_COMBO_LENGTH):
+        """(best combo, value) in `hand` (card ids or a CardPile), from the combo index when it covers the setter."""
+        if not isinstance(hand, CardPile): hand = card_names(hand)
+        if COMBO_INDEX is not None and COMBO_INDEX.covers(self.skater): return self.choose(COMBO_INDEX.all(hand, self.skater, max_len=max_len, as_set=True))
+        return self.choose(ComboSearch(hand, max_len).sets(self.skater))
+
+# --- Combo Index ---
+# Every valid ordered combo of up to AI_MAX_COMBO_LENGTH cards, with its difficulty for each of SKATERS (with and without
+# the negative ability), enumerated once by build_combo_index() and memory-mapped by load_combo_index(). Processes that
+# load the same file share its pages.
+#
+# Layout: a fixed header (magic, root offset, node and combo counts, JSON metadata), then a trie over sorted card
+# multisets, children before parents. Each node is [n_children u8][n_combos u8][child card ids u8 x n][child offsets u32 x n]
+# then n_combos records of [length u8][card ids u8 x 5][difficulties i8 x 2 per skater]. Nodes, and the records in each
+# node, are in the order ComboSearch visits them, so a walk over a hand finds the same best combo it would.
+
+COMBO_INDEX_FILE = Path(__file__).parent / 'sk8_combos.idx'
+COMBO_INDEX_MAGIC, COMBO_INDEX_VERSION = b'SK8CMBX\0', 1
+_INDEX_HEADER = struct.Struct('<8sIIII')  # magic, root offset, nodes, combos, metadata length
+_INDEX_RECORD = struct.Struct(f'<B{AI_MAX_COMBO_LENGTH}s{2 * len(SKATERS)}b')
+COMBO_INDEX = None
+
+def combo_rules_fingerprint(max_len=AI_MAX_COMBO_LENGTH):
+    """A hash of everything an index depends on: card tables, skater modifiers and the source of the rule functions."""
+    def ability(a): return (a['type'], category_bits(a['category']) if a['type'] == 'difficulty_modifier' else None, a.get('amount'))
+    parts = [COMBO_INDEX_VERSION, max_len, CARD_NAMES, list(CARD_CATEGORIES), list(CARD_DIFFICULTY), list(STANCE_COST), sorted(COMBO_CARD_IDS),
+             [(s.name, ability(s.passive_ability), ability(s.negative_ability)) for s in SKATERS]]
+    parts += [inspect.getsource(f) for f in (validate_combo_ids, _broken_combo_rule, combo_difficulty_ids, _build_combo_orderings)]
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+def build_combo_index(path=COMBO_INDEX_FILE, max_len=AI_MAX_COMBO_LENGTH):
+    """Writes the combo index to `path` (via a temporary file) and returns its path. Takes a minute or so."""
+    if max_len != AI_MAX_COMBO_LENGTH: raise ValueError(f"Index records hold {AI_MAX_COMBO_LENGTH} cards.")
+    path, kinds = Path(path), sorted(COMBO_CARD_IDS)
+    building, totals = ComboEvaluator(), Counter()
+    meta = json.dumps({'version': COMBO_INDEX_VERSION, 'max_len': max_len, 'skaters': [s.name for s in SKATERS],
+                       'fingerprint': combo_rules_fingerprint(max_len)}).encode()
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as out:
+        out.write(_INDEX_HEADER.pack(COMBO_INDEX_MAGIC, 0, 0, 0, len(meta)) + meta)
+        def emit(start):
+            """Writes the subtree for the multiset in `building` and returns its offset, or None if it holds no valid combo."""
+            records = []
+            if building.cards:
+                for combo in combo_orderings(building.cards):
+                    if not validate_combo_ids(combo)[0]: continue
+                    difficulties = [combo_difficulty_ids(combo, skater, ignore) for skater in SKATERS for ignore in (False, True)]
+                    records.append(_INDEX_RECORD.pack(len(combo), bytes(combo), *difficulties))
+            children = []
+            if len(building) < max_len:
+                for j in range(start, len(kinds)):
+                    if not building.can_extend(kinds[j]): continue
+                    building.push(kinds[j]); offset = emit(j); building.pop()
+                    if offset is not None: children.append((kinds[j], offset))
+            if not records and not children: return None
+            offset = out.tell()
+            out.write(bytes((len(children), len(records))) + bytes(c for c, _ in children)
+                      + struct.pack(f'<{len(children)}I', *(o for _, o in children)) + b''.join(records))
+            totals['nodes'] += 1; totals['combos'] += len(records)
+            return offset
+        root = emit(0)
+        out.seek(0); out.write(_INDEX_HEADER.pack(COMBO_INDEX_MAGIC, root, totals['nodes'], totals['combos'], len(meta)))
+    tmp.replace(path)
+    return path
+
+class ComboIndex:
+    """A memory-mapped combo index (see build_combo_index). Opening it reads only the header."""
+    def __init__(self, path=COMBO_INDEX_FILE):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f: self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.root, self.nodes, self.combos, meta_len = _INDEX_HEADER.unpack_from(self._mm, 0)
+        if magic != COMBO_INDEX_MAGIC: raise ValueError(f"{self.path} is not an SK8 combo index.")
+        self.meta = json.loads(self._mm[_INDEX_HEADER.size:_INDEX_HEADER.size + meta_len])
+        self._slots = {name: 2 * i for i, name in enumerate(self.meta['skaters'])}
+        self._children = {}
+
+    def close(self): self._mm.close()
+
+    @property
+    def stale(self):
+        """True if the rules or skaters have changed since the index was built."""
+        return self.meta['fingerprint'] != combo_rules_fingerprint(self.meta['max_len'])
+
+    def covers(self, skater): return skater in SKATERS and skater.name in self._slots
+
+    def walk(self, hand, skater, emit, ignore_negative_ability=False, max_len=None, as_set=False):
+        """Calls emit(combo, difficulty) for every valid ordered combo in `hand` (a CardPile or card names), in
+        ComboSearch order. Combos are tuples of card ids. With `as_set`, a combo holding a Pro Model Deck gets its
+        difficulty without the negative ability, as set_difficulty_ids gives it."""
+        counts = hand.counts if isinstance(hand, CardPile) else Counter(card_ids(hand))
+        used, mm, record, children = [0] * len(CARD_NAMES), self._mm, _INDEX_RECORD, self._children
+        column = 2 + self._slots[skater.name] + bool(ignore_negative_ability)
+        depth_left = self.meta['max_len'] if max_len is None else max_len
+        def visit(pos, depth_left):
+            n_children, n_combos = mm[pos], mm[pos + 1]
+            child_format = children.get(n_children) or children.setdefault(n_children, struct.Struct(f'<{n_children}B{n_children}I'))
+            child = child_format.unpack_from(mm, pos + 2)
+            pos += 2 + child_format.size
+            # Every combo under a node holds the same cards, so the column is picked once per node.
+            col = column | 1 if as_set and used[PRO_MODEL_DECK] else column
+            for _ in range(n_combos):
+                fields = record.unpack_from(mm, pos); pos += record.size
+                emit(tuple(fields[1][:fields[0]]), fields[col])
+            if depth_left:
+                for i in range(n_children):
+                    card = child[i]
+                    if used[card] < counts[card]:
+                        used[card] += 1; visit(child[n_children + i], depth_left - 1); used[card] -= 1
+        visit(self.root, depth_left)
+
+    def all(self, hand, skater, ignore_negative_ability=False, max_len=None, as_set=False):
+        """Every legal combo in the hand with its difficulty for `skater`, as [(combo ids, difficulty)]."""
+        found = []
+        self.walk(hand, skater, lambda combo, difficulty: found.append((combo, difficulty)), ignore_negative_ability, max_len, as_set)
+        return found
+
+def load_combo_index(path=COMBO_INDEX_FILE):
+    """Maps the combo index for AI set decisions if `path` exists and matches the current rules; returns it or None."""
+    global COMBO_INDEX
+    if COMBO_INDEX is not None and COMBO_INDEX.path == Path(path): return COMBO_INDEX
+    if not Path(path).exists(): return None
+    index = ComboIndex(path)
+    if index.stale:
+        log_event(logging.WARNING, 'combo_index_stale', path=str(path)); index.close(); return None
+    COMBO_INDEX = index
+    return index
+
+# --- Cards & Players ---
+
+CARD_CATEGORY_BITS = tuple(tuple(b for b in range(CAT_TRICK.bit_length()) if m >> b & 1) for m in CARD_CATEGORIES)
+_NAMED_CATEGORY_MASKS = ((FLIP_TRICKS, CAT_FLIP), (SHUVIT_TRICKS, CAT_SHUVIT), (SPIN_TRICKS, CAT_SPIN), (GRINDS_SLIDES, CAT_GRIND),
+                         (OBSTACLES, CAT_OBSTACLE), (STAIRS, CAT_STAIR), (GRIND_SURFACES, CAT_SURFACE), (STANCES, CAT_STANCE))
+
+class CardPile:
+    """An ordered pile of cards (hand, deck or discard pile) with per-card counts and per-category tallies.
+
+    The list keeps draw/display order; counts and tallies are updated on every add/remove so membership,
+    multiplicity and "how many Grinds are in here" never scan the pile."""
+    __slots__ = ('cards', 'counts', 'tallies')
+    def __init__(self, cards=()):
+        self.cards, self.counts, self.tallies = [], [0] * len(CARD_NAMES), [0] * CAT_TRICK.bit_length()
+        for card in cards: self.append(card)
+
+    def _tally(self, card, delta):
+        cid = CARD_IDS[card]
+        self.counts[cid] += delta
+        for bit in CARD_CATEGORY_BITS[cid]: self.tallies[bit] += delta
+
+    def append(self, card): self.cards.append(card); self._tally(card, 1)
+    def extend(self, cards):
+        for card in cards: self.append(card)
+
+    def pop(self):
+        card = self.cards.pop(); self._tally(card, -1)
+        return card
+
+    def remove(self, card):
+        """Removes one copy of `card`; returns False (instead of raising) if there is none."""
+        if not self.counts[CARD_IDS[card]]: return False
+        self.cards.remove(card); self._tally(card, -1)
+        return True
+
+    def shuffle(self, rng=random): rng.shuffle(self.cards)
+    def count(self, card): return self.counts[CARD_IDS[card]] if card in CARD_IDS else 0
+
+    def category_count(self, category):
+        """Cards in the pile from `category` (a CAT_* bit or one of the card-name category sets)."""
+        if not isinstance(category, int):
+            category = next((bit for group, bit in _NAMED_CATEGORY_MASKS if group is category), category)
+        if isinstance(category, int): return self.tallies[category.bit_length() - 1]
+        return sum(self.counts[CARD_IDS[card]] for card in category)
+
+    def cards_in(self, category):
+        """Every copy of every card in `category` that is in the pile, in card order."""
+        return [card for card in sorted(category) for _ in range(self.count(card))]
+
+    def __contains__(self, card): return card in CARD_IDS and self.counts[CARD_IDS[card]] > 0
+    def __len__(self): return len(self.cards)
+    def __iter__(self): return iter(self.cards)
+    def __getitem__(self, index): return self.cards[index]
+    def __repr__(self): return repr(self.cards)
+
 class Player:
-    def __init__(self, name, is_ai=False):
-        self.name, self.letters, self.skater, self.deck, self.discard_pile = name, "", None, [], []
+    def __init__(self, name, is_ai=False, ui=None, rng=None, search_ai=None):
+        self.name, self.letters, self.skater, self.deck, self.discard_pile = name, "", None, CardPile(), CardPile()
         self.is_ai = is_ai
-        self.hand = ['ollie']
+        self.search_ai = search_ai  # A SearchAI makes this an AI player "hard"; None keeps the expected-value rules.
+        self.ui = ui or Presenter()
+        self.rng = rng or random
+        self.hand = CardPile(['ollie'])
         self.temporary_cards = []
     
     def draw_card(self, num_cards=1):
         drawn_cards = []
         for _ in range(num_cards):
             if not self.deck and self.discard_pile:
-                logging.info(f"{self.name}'s deck is empty. Reshuffling {len(self.discard_pile)} cards.")
-                print(f"\n{self.name}'s deck is empty! Reshuffling discard pile...")
-                self.deck = self.discard_pile[:]; self.discard_pile = []
-                random.shuffle(self.deck)
-                time.sleep(1.5)
+                log_event(logging.INFO, 'reshuffle', player=self.name, cards=len(self.discard_pile))
+                self.ui.show(f"\n{self.name}'s deck is empty! Reshuffling discard pile...")
+                self.deck, self.discard_pile = self.discard_pile, CardPile()
+                self.deck.shuffle(self.rng)
+                self.ui.pause(1.5)
             if self.deck:
                 card = self.deck.pop()
                 self.hand.append(card)
                 drawn_cards.append(card)
-        logging.debug(f"{self.name} drew: {drawn_cards}")
+        log_event(logging.DEBUG, 'draw', player=self.name, cards=drawn_cards)
         return drawn_cards
 
     def discard_cards(self, cards_to_discard):
         actual_discards = [c for c in cards_to_discard if c != 'ollie']
         for card in actual_discards:
-            if card in self.hand:
-                self.hand.remove(card)
+            if self.hand.remove(card):
                 self.discard_pile.append(card)
                 if card in self.temporary_cards:
                     self.temporary_cards.remove(card)
-        if actual_discards: logging.debug(f"{self.name} discarded: {actual_discards}")
+        if actual_discards: log_event(logging.DEBUG, 'discard', player=self.name, cards=actual_discards)
+
+    def take_from_deck(self, card):
+        """Moves one `card` from the deck into the hand, then reshuffles the deck."""
+        self.deck.remove(card); self.hand.append(card); self.deck.shuffle(self.rng)
+
+    def shuffle_hand_into_deck(self):
+        """Puts every card in hand except the Ollie back into the deck and reshuffles it."""
+        for card in [c for c in self.hand if c != 'ollie']:
+            self.hand.remove(card); self.deck.append(card)
+        self.deck.shuffle(self.rng)
     
     def has_any_cards_for_trick(self, trick_combo):
         return any(card in self.hand for card in trick_combo)
 
     def has_all_cards_for_trick(self, trick_combo):
-        return all(self.hand.count(card) >= Counter(trick_combo).get(card, 0) for card in set(trick_combo))
+        return all(self.hand.count(card) >= needed for card, needed in Counter(trick_combo).items())
+
+def _rng_state(rng):
+    """A random.Random's state as JSON-friendly data."""
+    version, internal, gauss = rng.getstate()
+    return [version, base64.b64encode(array('I', internal).tobytes()).decode(), gauss]
+
+def _set_rng_state(rng, saved):
+    version, internal, gauss = saved
+    rng.setstate((version, tuple(array('I', base64.b64decode(internal))), gauss))
 
 class SkateGame:
-    def __init__(self, game_mode):
-        self.players = [Player("You")]
-        if game_mode == 'pve': self.players.append(Player("Rival AI", is_ai=True))
-        else: self.players.append(Player("Player 2"))
+    def __init__(self, game_mode, ui=None, skaters=None, seed=None, search_limits=None, decks=None, journal=None):
+        """game_mode is 'pve', 'pvp' or 'eve' (AI vs AI). `skaters` optionally fixes each seat's Skater, `decks`
+        maps skater names to deck fillers (default: TUNED_DECKS), and a GameJournal makes the game resumable.
+
+        Randomness comes from separate streams derived from `seed` (a fresh one if None): each player's rng builds and
+        shuffles their deck, their set_dice and match_dice roll their sets and matches, and self.rng makes the remaining
+        picks. So two runs of a seed under different rules (see rule_variant) keep dealing each seat the same draws and
+        the same luck on its n-th set or match, even after their choices part ways. Every answer read from the front
+        end goes into self.decisions, so record() is enough to replay the game."""
+        self.ui = ui or TerminalPresenter()
+        self.game_mode = game_mode
+        self.seed = seed if seed is not None else random.randrange(2**63)
+        self.rng = random.Random(self.seed)
+        seat_rngs = [random.Random(f"{self.seed}/seat{i}") for i in range(2)]
+        self.decisions = []
+        # AI combo searches are numbered; those that hit their time budget are recorded as {index: nodes searched}.
+        # A replay passes the recorded limits in and runs every search without a clock.
+        self.search_count, self.search_limits, self.replaying = 0, dict(search_limits or {}), search_limits is not None
+        if game_mode == 'eve': self.players = [Player("AI 1", is_ai=True, ui=self.ui, rng=seat_rngs[0]), Player("AI 2", is_ai=True, ui=self.ui, rng=seat_rngs[1])]
+        else:
+            self.players = [Player("You", ui=self.ui, rng=seat_rngs[0])]
+            if game_mode == 'pve': self.players.append(Player("Rival AI", is_ai=True, ui=self.ui, rng=seat_rngs[1]))
+            else: self.players.append(Player("Player 2", ui=self.ui, rng=seat_rngs[1]))
+        for i, player in enumerate(self.players):
+            player.set_dice, player.match_dice = (random.Random(f"{self.seed}/seat{i}/{kind}") for kind in ('set', 'match'))
+        self.preset_skaters = skaters
+        self.decks = dict(TUNED_DECKS if decks is None else decks)
         self.game_over, self.setter_index = False, 0
         self.trick_to_match, self.difficulty_to_beat = None, 0
         self.last_turn_summary = ""
+        self.winner, self.turn_count = None, 0
+        self.journal, self.started = journal, False
+
+    def run(self, max_turns=None):
+        """Plays the game to the end (or until max_turns) through self.ui and returns the winning Player, if any."""
+        steps = self.play(max_turns)
+        try:
+            decision = next(steps)
+            while True: decision = steps.send(self.ui.ask(decision.prompt, decision.player))
+        except StopIteration as stop: return stop.value
+
+    def play(self, max_turns=None):
+        """The game as a generator: it yields a Decision whenever a human has to answer and takes the answer back
+        through send(). Returns the winning Player, if any. Nothing blocks, so any number of games can sit paused."""
+        global JOURNAL
+        if self.started:  # Picking up a stopped or resumed game: say again which skater each player is.
+            log_event(logging.INFO, 'game_resumed', mode=self.game_mode, seed=self.seed, turn=self.turn_count,
+                      skaters={p.name: p.skater.name for p in self.players})
+        else: log_event(logging.INFO, 'game_start', mode=self.game_mode, seed=self.seed); profile_count('games')
+        if self.journal:
+            if not self.started: self.journal.start(self)
+            JOURNAL = self.journal
+        try:
+            if not self.started: yield from self.setup_game(); self.started = True
+            while not self.game_over:
+                if self.journal: self.journal.turn(self)
+                if max_turns is not None and self.turn_count >= max_turns:
+                    log_event(logging.INFO, 'game_stopped', turns=self.turn_count); break
+                self.turn_count += 1; profile_count('turns')
+                if self.trick_to_match: yield from self.matcher_turn()
+                else: yield from self.setter_turn()
+                for player in self.players:
+                    if len(player.letters) >= MAX_LETTERS:
+                        self.game_over = True
+                        winner = self.players[1 - self.players.index(player)]
+                        self.winner = winner
+                        log_event(logging.INFO, 'game_over', loser=player.name, winner=winner.name, turns=self.turn_count)
+                        self.ui.clear(); self.ui.show(f"\nGAME OVER! {player.name} got S-K-8!\n{winner.name} wins the game!"); break
+        finally:  # Also when the game stops early or its generator is dropped, so later games don't write into this journal.
+            if self.journal and JOURNAL is self.journal: JOURNAL = None
+        if events_enabled(logging.INFO): log_event(logging.INFO, 'game_record', **self.record())
+        if self.journal and self.game_over: self.journal.finish(self)
+        return self.winner
+
+    def decide(self, kind, prompt, player=None):
+        """Pauses on a Decision (use with `yield from`); the answer sent back is logged and returned."""
+        if self.journal: self.journal.flush()
+        answer = yield Decision(kind, prompt, player)
+        self.log_decision(answer)
+        return answer
+
+    def log_decision(self, answer):
+        self.decisions.append(answer)
+        if self.journal: self.journal.write('a', a=answer)
 
-    def run(self):
-        self.setup_game()
-        while not self.game_over:
-            if self.trick_to_match: self.matcher_turn()
-            else: self.setter_turn()
-            for player in self.players:
-                if len(player.letters) >= MAX_LETTERS:
-                    self.game_over = True
-                    winner = self.players[1 - self.players.index(player)]
-                    logging.info(f"GAME OVER! {player.name} got S-K-8. Winner: {winner.name}")
-                    clear_screen(); print(f"\nGAME OVER! {player.name} got S-K-8!\n{winner.name} wins the game!"); break
+    def set_ui(self, ui):
+        self.ui = ui
+        for player in self.players: player.ui = ui
+
+    def snapshot(self):
+        """The table between two turns as JSON-friendly data, for restore()."""
+        return {
+            'turn': self.turn_count, 'decisions': len(self.decisions), 'searches': self.search_count, 'setter': self.setter_index,
+            'trick': self.trick_to_match, 'difficulty': self.difficulty_to_beat, 'summary': self.last_turn_summary,
+            'rng': _rng_state(self.rng),
+            'players': [{'skater': p.skater.name, 'letters': p.letters, 'hand': list(p.hand), 'deck': list(p.deck),
+                         'discard': list(p.discard_pile), 'temporary': list(p.temporary_cards),
+                         'rng': [_rng_state(r) for r in (p.rng, p.set_dice, p.match_dice)]} for p in self.players],
+        }
+
+    def restore(self, snapshot, decisions):
+        """Puts back a snapshot() taken after `decisions` (the answers up to that point), in place of setup_game()."""
+        by_name = {s.name: s for s in SKATERS}
+        self.turn_count, self.search_count, self.setter_index = snapshot['turn'], snapshot['searches'], snapshot['setter']
+        self.trick_to_match, self.difficulty_to_beat, self.last_turn_summary = snapshot['trick'], snapshot['difficulty'], snapshot['summary']
+        _set_rng_state(self.rng, snapshot['rng'])
+        for player, saved in zip(self.players, snapshot['players']):
+            for rng, state in zip((player.rng, player.set_dice, player.match_dice), saved['rng']): _set_rng_state(rng, state)
+            player.skater, player.letters, player.temporary_cards = by_name[saved['skater']], saved['letters'], list(saved['temporary'])
+            player.hand, player.deck, player.discard_pile = CardPile(saved['hand']), CardPile(saved['deck']), CardPile(saved['discard'])
+        self.decisions, self.started = list(decisions), True
+
+    @classmethod
+    def resume(cls, journal, ui=None):
+        """The unfinished game in `journal`, silently replayed from its last snapshot to the start of its last
+        unfinished turn and ready to run() on `ui`. None if there is nothing to resume or it no longer replays."""
+        saved = journal.read()
+        if saved is None: return None
+        header, (turn, answers, searches, offset), snapshot = saved['header'], saved['boundary'], saved['snapshot']
+        by_name = {s.name: s for s in SKATERS}
+        skaters = tuple(by_name[name] for name in header['skaters']) if header['skaters'] else None
+        limits = {int(index): nodes for index, nodes in saved['limits'].items() if int(index) < searches}
+        start = snapshot['decisions'] if snapshot else 0
+        game = cls(header['mode'], ui=ReplayPresenter(saved['answers'][start:answers]), skaters=skaters, seed=header['seed'],
+                   search_limits=limits, decks=header['decks'])
+        for seat in header['search_seats']: game.players[seat].search_ai = SearchAI()
+        if snapshot: game.restore(snapshot, saved['answers'][:start])
+        try:
+            with events_muted(): game.run(max_turns=turn)  # Those turns' events are already in the log and the journal.
+        except ReplayDiverged: return None  # The rules changed under the journal.
+        if game.game_over or game.turn_count != turn or len(game.decisions) != answers: return None
+        game.replaying, game.journal = False, journal
+        game.set_ui(ui or TerminalPresenter())
+        journal.reopen(offset, turn)
+        return game
+
+    def record(self):
+        """Everything replay() needs to re-run this game, as plain JSON-friendly data."""
+        return {
+            'mode': self.game_mode, 'seed': self.seed,
+            'skaters': [s.name for s in self.preset_skaters] if self.preset_skaters else None, 'decks': dict(self.decks),
+            'decisions': list(self.decisions), 'search_limits': dict(self.search_limits),
+            'search_seats': [i for i, p in enumerate(self.players) if p.search_ai],
+            'turns': self.turn_count, 'winner': self.players.index(self.winner) if self.winner else None,
+        }
 
     def setup_game(self):
-        clear_screen(); print("Welcome to SK8 - v1.0"); time.sleep(1)
-        self.skater_selection()
+        self.ui.clear(); self.ui.show("Welcome to SK8 - v1.0"); self.ui.pause(1)
+        if self.preset_skaters:
+            for player, skater in zip(self.players, self.preset_skaters): player.skater = skater
+        else: yield from self.skater_selection()
         for player in self.players:
-            player.deck = create_themed_deck(player.skater)
-            logging.info(f"{player.name} (as {player.skater.name}) created a deck with {len(player.deck)} cards.")
+            player.deck = CardPile(create_themed_deck(player.skater, player.rng, self.decks.get(player.skater.name)))
+            log_event(logging.INFO, 'deck', player=player.name, skater=player.skater.name, size=len(player.deck))
         self.deal_cards()
-        clear_screen(); print("Skaters are locked in!")
-        for player in self.players: print(f"- {player.name} {'are' if player.name == 'You' else 'is'} the {player.skater.name}")
-        input("\nPress Enter to start...");
+        self.ui.clear(); self.ui.show("Skaters are locked in!")
+        for player in self.players: self.ui.show(f"- {player.name} {'are' if player.name == 'You' else 'is'} the {player.skater.name}")
+        if not all(p.is_ai for p in self.players): (yield from self.decide('start', "\nPress Enter to start..."));
 
     def skater_selection(self):
         available_skaters = list(SKATERS)
         for player in self.players:
             if player.is_ai:
-                chosen_skater = random.choice(available_skaters)
+                chosen_skater = self.rng.choice(available_skaters)
                 player.skater = chosen_skater
                 available_skaters.remove(chosen_skater)
-                logging.info(f"AI player {player.name} randomly selected {chosen_skater.name}")
-                print(f"{player.name} has chosen the {player.skater.name}!"); time.sleep(1.5); continue
-            clear_screen(); print(f"\n{player.name}, choose your skater:")
-            for i, skater in enumerate(available_skaters): print(f"  {i+1}: {skater.name}\n     {skater.passive_desc}\n     {skater.activated_desc}\n     {skater.trade_desc}\n     {skater.negative_desc}")
+                log_event(logging.INFO, 'skater', player=player.name, skater=chosen_skater.name, ai=True)
+                self.ui.show(f"{player.name} has chosen the {player.skater.name}!"); self.ui.pause(1.5); continue
+            self.ui.clear(); self.ui.show(f"\n{player.name}, choose your skater:")
+            for i, skater in enumerate(available_skaters): self.ui.show(f"  {i+1}: {skater.name}\n     {skater.passive_desc}\n     {skater.activated_desc}\n     {skater.trade_desc}\n     {skater.negative_desc}")
             while True:
                 try:
-                    choice_str = input("> ")
+                    choice_str = (yield from self.decide('skater', "> ", player))
                     if not choice_str: continue
                     choice = int(choice_str)
                     if 1 <= choice <= len(available_skaters):
                         chosen_skater = available_skaters.pop(choice - 1)
                         player.skater = chosen_skater
-                        logging.info(f"Human player {player.name} chose {chosen_skater.name}")
+                        log_event(logging.INFO, 'skater', player=player.name, skater=chosen_skater.name, ai=False)
                         break
-                except (ValueError, IndexError): print("Invalid input.")
+                except (ValueError, IndexError): self.ui.show("Invalid input.")
 
     def deal_cards(self):
         for _ in range(STARTING_HAND_SIZE - 1):
             for player in self.players: player.draw_card()
             
     def display_status(self):
-        clear_screen()
-        if self.last_turn_summary: print(f"Last Turn: {self.last_turn_summary}\n")
-        for p in self.players: print(f"{p.name} ({p.skater.name}, {len(p.deck)} cards left): {p.letters or '(-)'}")
-        print("-" * 30)
+        self.ui.clear()
+        if self.last_turn_summary: self.ui.show(f"Last Turn: {self.last_turn_summary}\n")
+        for p in self.players: self.ui.show(f"{p.name} ({p.skater.name}, {len(p.deck)} cards left): {p.letters or '(-)'}")
+        self.ui.show("-" * 30)
         
     def calculate_combo_difficulty(self, combo, player, ignore_negative_ability=False):
-        total_difficulty, explanation = 0, []
-        combo_worklist = list(combo)
-    
-        late_bonus = 0
-        late_trick_type = ""
-        # Check for stanced and regular late tricks
-        if len(combo_worklist) >= 3 and combo_worklist[0] in STANCES and combo_worklist[1] == 'ollie' and (combo_worklist[2] in FLIP_TRICKS or combo_worklist[2] in SHUVIT_TRICKS):
-            trick = combo_worklist[2]
-            late_bonus = TRICKS_DATABASE.get(trick, 0)
-            late_trick_type = "Flip" if trick in FLIP_TRICKS else "Shuvit"
-        elif len(combo_worklist) >= 2 and combo_worklist[0] == 'ollie' and (combo_worklist[1] in FLIP_TRICKS or combo_worklist[1] in SHUVIT_TRICKS):
-            trick = combo_worklist[1]
-            late_bonus = TRICKS_DATABASE.get(trick, 0)
-            late_trick_type = "Flip" if trick in FLIP_TRICKS else "Shuvit"
-
-        if late_bonus > 0:
-            total_difficulty += late_bonus
-            explanation.append(f"  - Late {late_trick_type} Bonus (x2 {trick.replace('_',' ').title()}): +{late_bonus}")
-        
-        card_counts = Counter(combo_worklist)
-        stance = next((c for c in combo_worklist if c in STANCES), None)
-        
-        if stance:
-            total_difficulty += STANCES[stance]
-            explanation.append(f"  - {stance.title()} Stance: +{STANCES[stance]}")
-            
-        if any(c in GRINDS_SLIDES for c in combo_worklist) and not any(c in GRIND_SURFACES for c in combo_worklist):
-            total_difficulty += 2; explanation.append("  - Flatground Grind (Low Ledge): +2")
-            
-        for card, count in card_counts.items():
-            if card not in TRICKS_DATABASE: continue
-            base_difficulty, current_mods, mod_explanation = TRICKS_DATABASE[card], 0, []
-            if (card in STAIRS or card in FLIP_TRICKS) and count > 1:
-                bonus = sum(range(2, count + 1)); current_mods += bonus; mod_explanation.append(f"Duplicate: +{bonus}")
-            passive = player.skater.passive_ability
-            if passive['type'] == 'difficulty_modifier' and card in passive['category']:
-                current_mods += passive['amount']; mod_explanation.append(f"Passive: {passive['amount']}")
-            if not ignore_negative_ability:
-                neg = player.skater.negative_ability
-                if neg['type'] == 'difficulty_modifier' and card in neg['category']:
-                    current_mods += neg['amount']; mod_explanation.append(f"Negative: +{neg['amount']}")
-            total_difficulty += (base_difficulty * count) + current_mods
-            explanation.append(f"  - {get_combo_display_name_single(card, count)}: {base_difficulty}{' x' + str(count) if count > 1 else ''}{' (' + ', '.join(mod_explanation) + ')' if mod_explanation else ''}")
-            
-        if 'wax' in combo: total_difficulty -= 2; explanation.append("  - Wax Card: -2")
-        return max(1, total_difficulty), explanation
+        """Returns (difficulty, explanation). The explanation lines are only built if they are read."""
+        ignore_negative_ability = bool(ignore_negative_ability)
+        difficulty = DIFFICULTY_ENGINE.difficulty(combo, player.skater, ignore_negative_ability)
+        return difficulty, DifficultyExplanation(combo, player.skater, ignore_negative_ability)
 
-    def validate_combo(self, combo):
-        if not any(c in TRICKS_DATABASE or c in STANCES for c in combo):
-            return False, "You must select at least one trick card."
-        
-        if any(c in OBSTACLES for c in combo):
-            if not any(c in CORE_TRICKS for c in combo):
-                return False, "You must perform a trick (like an Ollie, Flip, etc.) to use an Obstacle."
-
-        stance_cards = [c for c in combo if c in STANCES]
-        if len(stance_cards) > 1: return False, "Cannot use more than one Stance."
-        if stance_cards and combo.index(stance_cards[0]) != 0: return False, "A Stance card must be played first."
-        if stance_cards and len(combo) == 1: return False, "A stance card must modify a trick."
-        if stance_cards and len(combo) > 1 and combo[1] not in CORE_TRICKS:
-            return False, "A Stance must be followed by a valid trick card."
-            
-        if len(set(c for c in combo if c in STAIRS)) > 1: return False, "Cannot combine different stair sets."
-        if sum(1 for c in combo if c in GRIND_SURFACES) > 1: return False, "Cannot use more than one grind surface."
-        if 'kicker_ramp' in combo and any(c in STAIRS for c in combo): return False, "Cannot combine a kicker with stairs."
-        if len(set(c for c in combo if c in GRINDS_SLIDES)) > 1: return False, "Can't do more than one type of grind."
-        if 'wax' in combo and not any(c in GRINDS_SLIDES for c in combo): return False, "'Wax' only works with grinds or slides."
-        if len(set(c for c in combo if c in SHUVIT_TRICKS)) > 1: return False, "Cannot combine more than one type of Shuvit."
-        if any(c in FLIP_TRICKS for c in combo) and any(c in SHUVIT_TRICKS for c in combo):
-            # This allows late flips and late shuvits (which contain an ollie), but not a flip card and shuvit card together
-            if 'ollie' not in combo:
-                return False, "Cannot combine a Flip and a Shuvit card. Use Varial Flips instead."
-
-        return True, "Valid combo!"
+    def validate_combo(self, combo): return validate_combo(combo)
 
     def switch_setter(self): self.setter_index = (self.setter_index + 1) % len(self.players)
 
@@ -366,290 +1594,995 @@ class SkateGame:
         if player.temporary_cards:
             unused_temp = [card for card in player.temporary_cards if card in player.hand]
             if unused_temp:
-                logging.info(f"{player.name} is discarding unused temporary cards: {unused_temp}")
-                print(f"\nDiscarding unused temporary cards: {', '.join(unused_temp)}")
-                player.discard_cards(unused_temp); time.sleep(1.5)
+                log_event(logging.INFO, 'discard_temporary', player=player.name, cards=unused_temp)
+                self.ui.show(f"\nDiscarding unused temporary cards: {', '.join(unused_temp)}")
+                player.discard_cards(unused_temp); self.ui.pause(1.5)
             player.temporary_cards = []
 
     def setter_turn(self):
         setter = self.players[self.setter_index]
-        logging.info(f"--- SETTER TURN START --- Player: {setter.name}")
+        log_event(logging.INFO, 'turn_start', turn=self.turn_count, role='setter', player=setter.name)
         cards_to_draw = STARTING_HAND_SIZE - len(setter.hand)
         if cards_to_draw > 0:
-            logging.debug(f"{setter.name} needs to draw {cards_to_draw} card(s).")
+            log_event(logging.DEBUG, 'draw_up', player=setter.name, count=cards_to_draw)
             setter.draw_card(cards_to_draw)
-        logging.debug(f"{setter.name}'s current hand: {setter.hand}")
-        if setter.is_ai: self.ai_setter_turn(setter)
-        else: self.human_setter_turn(setter)
+        if events_enabled(logging.DEBUG): log_event(logging.DEBUG, 'hand', player=setter.name, hand=list(setter.hand))
+        if setter.is_ai: yield from self.ai_setter_turn(setter)
+        else: yield from self.human_setter_turn(setter)
         self.end_of_turn_cleanup(setter)
-        logging.info(f"--- SETTER TURN END --- Player: {setter.name}")
+        log_event(logging.INFO, 'turn_end', role='setter', player=setter.name)
 
     def human_setter_turn(self, setter):
         while True:
             self.display_status()
-            print(f"\nYour turn to set ({setter.skater.name}). Your input order matters!")
+            self.ui.show(f"\nYour turn to set ({setter.skater.name}). Your input order matters!")
             for i, card in enumerate(setter.hand):
-                if card in SPECIAL_CARDS: print(f"  {i+1}: {card.replace('_', ' ').title()} - ({SPECIAL_CARDS[card]['description']})")
-                elif card in STANCES: print(f"  {i+1}: {card.replace('_', ' ').title()} (Stance)")
-                else: print(f"  {i+1}: {card.replace('_', ' ').title()} (D: {TRICKS_DATABASE.get(card, 'N/A')})")
-            print("-" * 30)
+                if card in SPECIAL_CARDS: self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()} - ({SPECIAL_CARDS[card]['description']})", setter)
+                elif card in STANCES: self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()} (Stance)", setter)
+                else: self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()} (D: {TRICKS_DATABASE.get(card, 'N/A')})", setter)
+            self.ui.show("-" * 30, setter)
             
-            action_choice = input("Enter card numbers to set a trick, or (a)bility > ").lower()
-            logging.debug(f"{setter.name} entered raw input: '{action_choice}'")
+            action_choice = (yield from self.decide('set', "Enter card numbers to set a trick, or (a)bility > ", setter)).lower()
+            log_event(logging.DEBUG, 'input', player=setter.name, text=action_choice)
             
             try:
                 if action_choice == 'a':
-                    logging.info(f"{setter.name} chose to use an ability.")
-                    self.ability_menu(setter); return
+                    log_event(logging.INFO, 'ability_menu', player=setter.name)
+                    yield from self.ability_menu(setter); return
                 indices = [int(i) - 1 for i in action_choice.split()]
                 combo = [setter.hand[i] for i in indices]
 
                 if 'thrasher_magazine' in combo:
-                    if len(combo) > 1: print("\nThrasher Magazine must be played by itself."); time.sleep(2); continue
-                    logging.info(f"{setter.name} played Thrasher Magazine.")
-                    print("\nShuffling your hand and drawing 7 new cards...");
-                    hand_to_shuffle = [c for c in setter.hand if c != 'ollie']; setter.discard_cards(hand_to_shuffle + ['thrasher_magazine'])
-                    setter.deck.extend(hand_to_shuffle); random.shuffle(setter.deck); setter.draw_card(num_cards=7); continue
+                    if len(combo) > 1: self.ui.show("\nThrasher Magazine must be played by itself.", setter); self.ui.pause(2); continue
+                    log_event(logging.INFO, 'special', player=setter.name, card='thrasher_magazine')
+                    self.play_thrasher_magazine(setter); continue
                 
                 if 'sponsors' in combo:
-                    if len(combo) > 1: print("\nSponsors must be played by itself."); time.sleep(2); continue
-                    logging.info(f"{setter.name} played Sponsors.")
-                    print("\nDrawing 2 temporary cards from your sponsors..."); setter.discard_cards(['sponsors']); 
+                    if len(combo) > 1: self.ui.show("\nSponsors must be played by itself.", setter); self.ui.pause(2); continue
+                    log_event(logging.INFO, 'special', player=setter.name, card='sponsors')
+                    self.ui.show("\nDrawing 2 temporary cards from your sponsors..."); setter.discard_cards(['sponsors']); 
                     new_cards = setter.draw_card(num_cards=2); setter.temporary_cards.extend(new_cards); continue
                 
                 is_valid, message = self.validate_combo(combo)
                 if not is_valid:
-                    logging.warning(f"Invalid combo attempted by {setter.name}: {combo}. Reason: {message}")
-                    print(f"\nINVALID COMBO: {message}"); time.sleep(2); continue
+                    log_event(logging.WARNING, 'invalid_combo', player=setter.name, combo=combo, reason=message)
+                    self.ui.show(f"\nINVALID COMBO: {message}", setter); self.ui.pause(2); continue
                 
-                logging.info(f"{setter.name} is attempting combo: {combo}")
                 self.trick_to_match = combo
                 self.difficulty_to_beat, explanation = self.calculate_combo_difficulty(combo, setter, 'pro_model_deck' in combo)
-                logging.info(f"Calculated difficulty: {self.difficulty_to_beat}. Explanation: {' '.join(explanation)}")
-
-                clear_screen(); print("--- ATTEMPTING TRICK ---")
-                print(f"Trick: {get_combo_display_name(self.trick_to_match)}\n\nDifficulty Calculation:")
-                for line in explanation: print(line)
-                print(f"\nFinal Difficulty: {self.difficulty_to_beat}")
-                input(f"\nYou must roll a {self.difficulty_to_beat} or higher. Press Enter to roll..."); roll = roll_dice()
-                print(f"You rolled a {roll}!")
+                log_event(logging.INFO, 'combo_attempt', player=setter.name, combo=combo, difficulty=self.difficulty_to_beat, explanation=explanation)
+
+                self.ui.clear(); self.ui.show("--- ATTEMPTING TRICK ---")
+                self.ui.show(f"Trick: {get_combo_display_name(self.trick_to_match)}\n\nDifficulty Calculation:")
+                for line in explanation: self.ui.show(line)
+                self.ui.show(f"\nFinal Difficulty: {self.difficulty_to_beat}")
+                (yield from self.decide('roll', f"\nYou must roll a {self.difficulty_to_beat} or higher. Press Enter to roll...", setter)); roll = roll_dice(ui=self.ui, rng=setter.set_dice)
+                self.ui.show(f"You rolled a {roll}!")
                 
                 opponent = self.players[(self.setter_index + 1) % len(self.players)]
                 if roll >= self.difficulty_to_beat and 'bail' in opponent.hand:
-                    if opponent.is_ai or 'y' in input(f"{opponent.name} has a Bail card! Force a re-roll? (y/n) > ").lower():
-                        logging.info(f"{opponent.name} played Bail, forcing a re-roll.")
-                        print(f"\n{opponent.name} plays Bail! You have to re-roll..."); opponent.discard_cards(['bail']); time.sleep(1)
-                        roll = roll_dice(); print(f"Your re-roll is... {roll}!")
+                    if (self.ai_should_bail(opponent, self.difficulty_to_beat) if opponent.is_ai else 'y' in (yield from self.decide('bail', f"{opponent.name} has a Bail card! Force a re-roll? (y/n) > ", opponent)).lower()):
+                        log_event(logging.INFO, 'special', player=opponent.name, card='bail')
+                        self.ui.show(f"\n{opponent.name} plays Bail! You have to re-roll..."); opponent.discard_cards(['bail']); self.ui.pause(1)
+                        roll = roll_dice(ui=self.ui, rng=setter.set_dice); self.ui.show(f"Your re-roll is... {roll}!")
                 
                 if roll >= self.difficulty_to_beat:
-                    print("You landed it!")
-                    logging.info(f"Trick SET successfully by {setter.name}. Roll: {roll} >= Difficulty: {self.difficulty_to_beat}")
+                    self.ui.show("You landed it!")
+                    log_event(logging.INFO, 'set_result', player=setter.name, landed=True, roll=roll, difficulty=self.difficulty_to_beat)
                     self.last_turn_summary = f"{setter.name} landed a {get_combo_display_name(self.trick_to_match)}."
                     trick_cards = [c for c in self.trick_to_match if c in TRICKS_DATABASE or c in STANCES or c in OBSTACLES]
                     specials = [c for c in self.trick_to_match if c in SPECIAL_CARDS]
                     discards = specials
                     if any(c != 'ollie' for c in trick_cards):
-                        random_trick = random.choice([c for c in trick_cards if c != 'ollie'])
+                        random_trick = self.rng.choice([c for c in trick_cards if c != 'ollie'])
                         discards.append(random_trick)
-                        print(f"Cost: discard 1 random trick: {random_trick.replace('_', ' ').title()}")
+                        self.ui.show(f"Cost: discard 1 random trick: {random_trick.replace('_', ' ').title()}")
                     setter.discard_cards(discards)
                 else:
-                    print("Bailed! You lose the cards.")
-                    logging.info(f"Trick SET FAILED by {setter.name}. Roll: {roll} < Difficulty: {self.difficulty_to_beat}")
+                    self.ui.show("Bailed! You lose the cards.")
+                    log_event(logging.INFO, 'set_result', player=setter.name, landed=False, roll=roll, difficulty=self.difficulty_to_beat)
                     self.last_turn_summary = f"{setter.name} bailed their set."
                     setter.discard_cards(self.trick_to_match); self.trick_to_match = None; self.switch_setter()
-                time.sleep(3); break
-            except (ValueError, IndexError): print("\nInvalid input."); time.sleep(2)
+                self.ui.pause(3); break
+            except (ValueError, IndexError): self.ui.show("\nInvalid input.", setter); self.ui.pause(2)
+
+    def play_thrasher_magazine(self, player):
+        self.ui.show("\nShuffling your hand and drawing 7 new cards...");
+        # The magazine itself is discarded; the rest of the hand goes back into the deck (not the discard pile as well).
+        player.discard_cards(['thrasher_magazine']); player.shuffle_hand_into_deck(); player.draw_card(num_cards=7)
+
+    def ai_letter_value(self, player):
+        return AI_LAST_LETTER_VALUE if len(player.letters) == MAX_LETTERS - 1 else AI_LETTER_VALUE
+
+    def ai_choose_combo(self, ai_player):
+        """Combo with the best expected value against the opponent (see SetScorer), or [] if none is valid."""
+        opponent = self.players[1 - self.players.index(ai_player)]
+        scorer = SetScorer(ai_player.skater, SeatState.from_player(opponent))
+        # A replayed search stops after the same number of nodes the recorded one managed within its time budget.
+        index, self.search_count = self.search_count, self.search_count + 1
+        # The index holds every combo, so it never runs out of time. Only a replay of a search that did falls back to searching.
+        if COMBO_INDEX is not None and COMBO_INDEX.covers(ai_player.skater) and index not in self.search_limits:
+            return card_names(scorer.choose(COMBO_INDEX.all(ai_player.hand, ai_player.skater, max_len=AI_MAX_COMBO_LENGTH, as_set=True))[0])
+        if self.replaying: search = ComboSearch(ai_player.hand, AI_MAX_COMBO_LENGTH, max_nodes=self.search_limits.get(index))
+        else: search = ComboSearch(ai_player.hand, AI_MAX_COMBO_LENGTH, AI_SEARCH_TIME_BUDGET)
+        best_combo, _ = scorer.choose(search.sets(ai_player.skater))
+        profile_count('combo_search_nodes', search.nodes)
+        if search.timed_out:
+            self.search_limits[index] = search.nodes
+            if self.journal: self.journal.write('l', i=index, n=search.nodes)
+            log_event(logging.INFO, 'search_timeout', player=ai_player.name, nodes=search.nodes)
+        return card_names(best_combo)
+
+    def ai_search_action(self, ai_player, state):
+        """Asks the player's SearchAI for a move. The move goes into the decision log, so a replay reads it back instead of searching."""
+        if self.replaying:
+            # Replays are driven straight from a ReplayPresenter, so the recorded move can be read in place.
+            answer = self.ui.ask(f"{ai_player.name} searches > ", ai_player); self.log_decision(answer)
+            return tuple(tuple(x) if isinstance(x, list) else x for x in answer)
+        action = ai_player.search_ai.choose(state)
+        log_event(logging.DEBUG, 'search', player=ai_player.name, action=action, iterations=ai_player.search_ai.iterations)
+        self.log_decision(action)
+        return action
+
+    def ai_play_special(self, ai_player, card):
+        log_event(logging.INFO, 'special', player=ai_player.name, card=card)
+        if card == 'sponsors':
+            self.ui.show(f"{ai_player.name} plays Sponsors and draws 2 temporary cards."); ai_player.discard_cards(['sponsors'])
+            ai_player.temporary_cards.extend(ai_player.draw_card(num_cards=2))
+        else: self.ui.show(f"{ai_player.name} plays Thrasher Magazine."); self.play_thrasher_magazine(ai_player)
+
+    def search_setter_combo(self, ai_player):
+        """The SearchAI's set for this turn (after any Sponsors / Thrasher Magazine it plays), or [] to pass."""
+        while True:
+            action = self.ai_search_action(ai_player, GameState.from_game(self))
+            if action[0] == 'sponsors': self.ai_play_special(ai_player, 'sponsors')
+            elif action[0] == 'thrasher': self.ai_play_special(ai_player, 'thrasher_magazine')
+            elif action[0] == 'set': return card_names(action[1])
+            else: return []
+
+    def ai_should_bail(self, ai_player, setter_difficulty):
+        """Forcing a re-roll pays off if the setter then misses and we would otherwise have missed the match."""
+        if ai_player.search_ai:
+            state = GameState.from_game(self)._replace(phase='bail', difficulty=setter_difficulty, roll=setter_difficulty)
+            return self.ai_search_action(ai_player, state)[1]
+        trick = card_ids(self.trick_to_match)
+        my_difficulty = DIFFICULTY_ENGINE.difficulty_ids(trick, ai_player.skater) + defender_penalty(trick, ai_player.hand.counts)
+        rerolls = 1 if len(ai_player.letters) == MAX_LETTERS - 1 else 0
+        gain = (1 - roll_chance(setter_difficulty)) * (1 - success_chance(my_difficulty, rerolls=rerolls)) * self.ai_letter_value(ai_player)
+        return gain > AI_CARD_VALUES['bail']
 
     def ai_setter_turn(self, ai_player):
-        self.display_status(); print(f"\n--- {ai_player.name}'s Turn ---"); time.sleep(1.5)
-        best_combo, best_difficulty = [], -1
-        for i in range(1, min(len(ai_player.hand), 4)):
-            for combo in combinations([c for c in ai_player.hand if c != 'ollie'], i):
-                combo_list = list(combo)
-                if self.validate_combo(combo_list)[0]:
-                    difficulty, _ = self.calculate_combo_difficulty(combo_list, ai_player)
-                    specialty_score = sum(1 for c in combo_list if c in ai_player.skater.passive_ability['category'])
-                    score = difficulty + specialty_score * 2
-                    if score > best_difficulty and difficulty < 14: best_difficulty = score; best_combo = combo_list
+        self.display_status(); self.ui.show(f"\n--- {ai_player.name}'s Turn ---"); self.ui.pause(1.5)
+        if ai_player.search_ai: best_combo = self.search_setter_combo(ai_player)
+        else:
+            best_combo = self.ai_choose_combo(ai_player)
+            # Like a human setter, dig for new cards with Sponsors or Thrasher Magazine (once each) rather than pass or
+            # fall back on a bare Ollie, which never cycles the hand.
+            used = set()
+            while all(c == 'ollie' for c in best_combo) and any(c in ai_player.hand and c not in used for c in ('sponsors', 'thrasher_magazine')):
+                card = 'sponsors' if 'sponsors' in ai_player.hand and 'sponsors' not in used else 'thrasher_magazine'
+                used.add(card); self.ai_play_special(ai_player, card)
+                best_combo = self.ai_choose_combo(ai_player)
         if not best_combo:
-            logging.info(f"AI {ai_player.name} could not find a suitable combo and passed the turn.")
-            print(f"{ai_player.name} has no good combos, passing turn."); self.switch_setter(); time.sleep(2); return
+            log_event(logging.INFO, 'pass', player=ai_player.name)
+            self.ui.show(f"{ai_player.name} has no good combos, passing turn."); self.switch_setter(); self.ui.pause(2); return
         self.trick_to_match = best_combo
-        self.difficulty_to_beat, _ = self.calculate_combo_difficulty(best_combo, ai_player)
-        logging.info(f"AI {ai_player.name} is attempting combo: {best_combo} with difficulty {self.difficulty_to_beat}")
-        print(f"{ai_player.name} is setting a {get_combo_display_name(self.trick_to_match)} (Difficulty: {self.difficulty_to_beat}).")
-        time.sleep(3); print(f"\n{ai_player.name} is rolling..."); roll = roll_dice(); print(f"They rolled a {roll}!"); time.sleep(2)
+        self.difficulty_to_beat = set_difficulty_ids(card_ids(best_combo), ai_player.skater)
+        log_event(logging.INFO, 'combo_attempt', player=ai_player.name, combo=best_combo, difficulty=self.difficulty_to_beat)
+        self.ui.show(f"{ai_player.name} is setting a {get_combo_display_name(self.trick_to_match)} (Difficulty: {self.difficulty_to_beat}).")
+        self.ui.pause(3); self.ui.show(f"\n{ai_player.name} is rolling..."); roll = roll_dice(ui=self.ui, rng=ai_player.set_dice); self.ui.show(f"They rolled a {roll}!"); self.ui.pause(2)
+        opponent = self.players[(self.setter_index + 1) % len(self.players)]
+        if roll >= self.difficulty_to_beat and 'bail' in opponent.hand:
+            if (self.ai_should_bail(opponent, self.difficulty_to_beat) if opponent.is_ai else 'y' in (yield from self.decide('bail', f"{opponent.name} has a Bail card! Force a re-roll? (y/n) > ", opponent)).lower()):
+                log_event(logging.INFO, 'special', player=opponent.name, card='bail')
+                self.ui.show(f"\n{opponent.name} plays Bail! {ai_player.name} has to re-roll..."); opponent.discard_cards(['bail']); self.ui.pause(1)
+                roll = roll_dice(ui=self.ui, rng=ai_player.set_dice); self.ui.show(f"Their re-roll is... {roll}!")
         if roll >= self.difficulty_to_beat:
-            print("They landed it! The trick is set.")
-            logging.info(f"AI trick SET successfully. Roll: {roll} >= Difficulty: {self.difficulty_to_beat}")
+            self.ui.show("They landed it! The trick is set.")
+            log_event(logging.INFO, 'set_result', player=ai_player.name, landed=True, roll=roll, difficulty=self.difficulty_to_beat)
             self.last_turn_summary = f"{ai_player.name} landed a {get_combo_display_name(self.trick_to_match)}."
             trick_cards = [c for c in self.trick_to_match if (c in TRICKS_DATABASE or c in STANCES) and c != 'ollie']
             specials = [c for c in self.trick_to_match if c in SPECIAL_CARDS]
             discards = specials
-            if trick_cards: discards.append(random.choice(trick_cards))
+            if trick_cards: discards.append(self.rng.choice(trick_cards))
             ai_player.discard_cards(discards)
         else:
-            print("They bailed! The turn passes.")
-            logging.info(f"AI trick SET FAILED. Roll: {roll} < Difficulty: {self.difficulty_to_beat}")
+            self.ui.show("They bailed! The turn passes.")
+            log_event(logging.INFO, 'set_result', player=ai_player.name, landed=False, roll=roll, difficulty=self.difficulty_to_beat)
             self.last_turn_summary = f"{ai_player.name} bailed their set."
             ai_player.discard_cards(self.trick_to_match); self.trick_to_match = None; self.switch_setter()
-        time.sleep(3)
+        self.ui.pause(3)
 
     def matcher_turn(self):
         matcher = self.players[(self.setter_index + 1) % len(self.players)]
-        logging.info(f"--- MATCHER TURN START --- Player: {matcher.name}")
-        logging.info(f"Trick to match: {self.trick_to_match}")
+        log_event(logging.INFO, 'turn_start', turn=self.turn_count, role='matcher', player=matcher.name, trick=self.trick_to_match)
         if matcher.is_ai: self.ai_matcher_turn(matcher)
-        else: self.human_matcher_turn(matcher)
+        else: yield from self.human_matcher_turn(matcher)
         self.end_of_turn_cleanup(matcher)
-        logging.info(f"--- MATCHER TURN END --- Player: {matcher.name}")
+        log_event(logging.INFO, 'turn_end', role='matcher', player=matcher.name)
 
     def human_matcher_turn(self, matcher):
-        self.display_status(); print(f"\n--- Your Turn to Match ---")
-        print(f"You need to match: {get_combo_display_name(self.trick_to_match)}"); time.sleep(1)
+        self.display_status(); self.ui.show(f"\n--- Your Turn to Match ---")
+        self.ui.show(f"You need to match: {get_combo_display_name(self.trick_to_match)}"); self.ui.pause(1)
         ignore_neg = False
-        if 'pro_model_deck' in matcher.hand and 'y' in input("Use 'Pro Model Deck'? (y/n) > ").lower():
-            logging.info(f"{matcher.name} used Pro Model Deck."); ignore_neg = True
+        if 'pro_model_deck' in matcher.hand and 'y' in (yield from self.decide('pro_model_deck', "Use 'Pro Model Deck'? (y/n) > ", matcher)).lower():
+            log_event(logging.INFO, 'special', player=matcher.name, card='pro_model_deck'); ignore_neg = True
             matcher.discard_cards(['pro_model_deck'])
         base_difficulty, explanation = self.calculate_combo_difficulty(self.trick_to_match, matcher, ignore_neg)
         trick_only_combo = [c for c in self.trick_to_match if c in TRICKS_DATABASE or c in STANCES]
-        print("\nDifficulty Calculation:"); [print(line) for line in explanation]
-        if not matcher.has_all_cards_for_trick(trick_only_combo):
-            difficulty = base_difficulty + 2; print("  - Defender Penalty (No cards): +2")
-            logging.info(f"Applying defender penalty, final difficulty: {difficulty}")
-        else:
-            difficulty = base_difficulty; print("  - No Defender Penalty (You have all cards!)")
-            logging.info(f"No defender penalty, final difficulty: {difficulty}")
-        print(f"Your Final Target: {difficulty}")
+        self.ui.show("\nDifficulty Calculation:"); [self.ui.show(line) for line in explanation]
+        penalty = defender_penalty(card_ids(self.trick_to_match), matcher.hand.counts)
+        difficulty = base_difficulty + penalty
+        self.ui.show(f"  - Defender Penalty (No cards): +{penalty}" if penalty else "  - No Defender Penalty (You have all cards!)")
+        log_event(logging.INFO, 'match_target', player=matcher.name, difficulty=difficulty, penalty=penalty)
+        self.ui.show(f"Your Final Target: {difficulty}")
         use_advantage = False
         if matcher.has_any_cards_for_trick(trick_only_combo):
-            print("You have a required card! You can spend one to roll with ADVANTAGE.")
-            if 'y' in input("Spend a card for advantage? (y/n) > ").lower():
-                 use_advantage = True; logging.info(f"{matcher.name} is spending a card to roll with advantage.")
-        input("Press Enter to roll..."); roll = roll_dice(with_advantage=use_advantage); print(f"You rolled a {roll}!")
-        if roll < difficulty and 'focus' in matcher.hand and 'y' in input("Failed. Use 'Focus' to re-roll? (y/n) > ").lower():
-            logging.info(f"{matcher.name} used Focus for a re-roll.")
-            matcher.discard_cards(['focus']); roll = roll_dice(with_advantage=use_advantage); print(f"New roll: {roll}!")
+            self.ui.show("You have a required card! You can spend one to roll with ADVANTAGE.", matcher)
+            if 'y' in (yield from self.decide('advantage', "Spend a card for advantage? (y/n) > ", matcher)).lower():
+                 use_advantage = True; log_event(logging.INFO, 'advantage', player=matcher.name)
+        (yield from self.decide('roll', "Press Enter to roll...", matcher)); roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=matcher.match_dice); self.ui.show(f"You rolled a {roll}!")
+        if roll < difficulty and 'focus' in matcher.hand and 'y' in (yield from self.decide('focus', "Failed. Use 'Focus' to re-roll? (y/n) > ", matcher)).lower():
+            log_event(logging.INFO, 'special', player=matcher.name, card='focus')
+            matcher.discard_cards(['focus']); roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=matcher.match_dice); self.ui.show(f"New roll: {roll}!")
         if roll < difficulty and len(matcher.letters) == MAX_LETTERS - 1:
-            print("\nYou're on your last letter! You get one more chance to land this.")
-            logging.info(f"{matcher.name} is on K and gets a last chance re-roll.")
-            input("Press Enter for your last chance roll...")
-            roll = roll_dice(with_advantage=use_advantage); print(f"Last chance roll... a {roll}!")
-        time.sleep(2)
+            self.ui.show("\nYou're on your last letter! You get one more chance to land this.")
+            log_event(logging.INFO, 'last_chance', player=matcher.name)
+            (yield from self.decide('roll', "Press Enter for your last chance roll...", matcher))
+            roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=matcher.match_dice); self.ui.show(f"Last chance roll... a {roll}!")
+        self.ui.pause(2)
         if roll >= difficulty:
-            print("Nice! You landed it.")
-            logging.info(f"{matcher.name} MATCHED the trick. Roll: {roll} >= Difficulty: {difficulty}")
+            self.ui.show("Nice! You landed it.")
+            log_event(logging.INFO, 'match_result', player=matcher.name, landed=True, roll=roll, difficulty=difficulty)
             self.last_turn_summary = f"{matcher.name} matched the trick."; self.switch_setter()
         else:
-            print("Ah, you missed it! You get a letter.")
-            logging.warning(f"{matcher.name} FAILED to match the trick. Roll: {roll} < Difficulty: {difficulty}. They get a letter.")
-            matcher.letters += LETTERS[len(matcher.letters)]
+            self.ui.show("Ah, you missed it! You get a letter.")
+            log_event(logging.WARNING, 'match_result', player=matcher.name, landed=False, roll=roll, difficulty=difficulty)
+            matcher.letters += LETTERS[len(matcher.letters)]; log_event(logging.WARNING, 'letter', player=matcher.name, letters=matcher.letters)
             self.last_turn_summary = f"{matcher.name} bailed and got a letter."
-        self.trick_to_match = None; time.sleep(3)
+        self.trick_to_match = None; self.ui.pause(3)
     
     def ai_matcher_turn(self, ai_player):
-        self.display_status(); print(f"\n--- {ai_player.name}'s Turn to Match ---")
-        print(f"They need to match: {get_combo_display_name(self.trick_to_match)}"); time.sleep(2)
-        difficulty, _ = self.calculate_combo_difficulty(self.trick_to_match, ai_player)
-        if not ai_player.has_all_cards_for_trick(self.trick_to_match): difficulty += 2
-        logging.info(f"AI {ai_player.name}'s final target difficulty is {difficulty}")
-        print(f"Final Target: {difficulty}"); time.sleep(2)
-        use_advantage = ai_player.has_any_cards_for_trick(self.trick_to_match) and difficulty > 7
-        if use_advantage:
-            card_to_spend = next((c for c in ai_player.hand if c in self.trick_to_match), None)
+        self.display_status(); self.ui.show(f"\n--- {ai_player.name}'s Turn to Match ---")
+        self.ui.show(f"They need to match: {get_combo_display_name(self.trick_to_match)}"); self.ui.pause(2)
+        # Every choice below compares exact success chances (see Dice Odds) against the value of the card it costs,
+        # unless the player has a SearchAI, which picks Pro Model Deck, the advantage card and Focus by search instead.
+        searched = self.ai_search_action(ai_player, GameState.from_game(self)) if ai_player.search_ai else None
+        penalty = defender_penalty(card_ids(self.trick_to_match), ai_player.hand.counts)
+        last_chance = 1 if len(ai_player.letters) == MAX_LETTERS - 1 else 0
+        planned_rerolls = last_chance + (1 if 'focus' in ai_player.hand else 0)
+        letter_value = self.ai_letter_value(ai_player)
+        difficulty = DIFFICULTY_ENGINE.difficulty(self.trick_to_match, ai_player.skater) + penalty
+        if 'pro_model_deck' in ai_player.hand:
+            relieved = DIFFICULTY_ENGINE.difficulty(self.trick_to_match, ai_player.skater, True) + penalty
+            gain = (success_chance(relieved, rerolls=planned_rerolls) - success_chance(difficulty, rerolls=planned_rerolls)) * letter_value
+            if (searched[1] if searched else gain > AI_CARD_VALUES['pro_model_deck']):
+                ai_player.discard_cards(['pro_model_deck']); difficulty = relieved
+                log_event(logging.INFO, 'special', player=ai_player.name, card='pro_model_deck'); self.ui.show(f"{ai_player.name} plays Pro Model Deck!")
+        log_event(logging.INFO, 'match_target', player=ai_player.name, difficulty=difficulty, penalty=penalty)
+        self.ui.show(f"Final Target: {difficulty}"); self.ui.pause(2)
+        if searched:
+            card_to_spend = CARD_NAMES[searched[2]] if searched[2] is not None else None
+            use_advantage = card_to_spend is not None
+        else:
+            use_advantage = False
+            card_to_spend = next((c for c in ai_player.hand if c in self.trick_to_match and CARD_CATEGORIES[CARD_IDS[c]] & _TRICK_OR_STANCE), None)
             if card_to_spend:
-                ai_player.discard_cards([card_to_spend])
-                logging.info(f"AI {ai_player.name} spends a {card_to_spend} for advantage!")
-                print(f"{ai_player.name} spends a {card_to_spend} for advantage!")
-        roll = roll_dice(with_advantage=use_advantage); print(f"\n{ai_player.name} rolls a {roll}!")
-        if roll < difficulty and 'focus' in ai_player.hand and difficulty > 8:
-            ai_player.discard_cards(['focus']); logging.info(f"AI {ai_player.name} uses Focus to re-roll!")
-            print(f"{ai_player.name} uses Focus to re-roll!")
-            roll = roll_dice(with_advantage=use_advantage); print(f"New roll: {roll}!")
+                gain = (success_chance(difficulty, True, planned_rerolls) - success_chance(difficulty, False, planned_rerolls)) * letter_value
+                use_advantage = gain > AI_CARD_VALUES.get(card_to_spend, AI_DEFAULT_CARD_VALUE)
+        if use_advantage:
+            ai_player.discard_cards([card_to_spend])
+            log_event(logging.INFO, 'advantage', player=ai_player.name, card=card_to_spend)
+            self.ui.show(f"{ai_player.name} spends a {card_to_spend} for advantage!")
+        roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=ai_player.match_dice); self.ui.show(f"\n{ai_player.name} rolls a {roll}!")
+        # After a miss, Focus adds one roll on top of any last-letter chance: it only matters if all of those would miss.
+        p = roll_chance(difficulty, use_advantage)
+        if roll < difficulty and 'focus' in ai_player.hand and (
+                self.ai_search_action(ai_player, GameState.from_game(self)._replace(phase='focus', target=difficulty, advantage=use_advantage, roll=roll))[1]
+                if searched else p * (1 - p) ** last_chance * letter_value > AI_CARD_VALUES['focus']):
+            ai_player.discard_cards(['focus']); log_event(logging.INFO, 'special', player=ai_player.name, card='focus')
+            self.ui.show(f"{ai_player.name} uses Focus to re-roll!")
+            roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=ai_player.match_dice); self.ui.show(f"New roll: {roll}!")
         if roll < difficulty and len(ai_player.letters) == MAX_LETTERS - 1:
-            print(f"\n{ai_player.name} is on K and gets a last chance re-roll!")
-            logging.info(f"AI {ai_player.name} is on K and gets a last chance re-roll.")
-            time.sleep(2); roll = roll_dice(with_advantage=use_advantage); print(f"Last chance roll... a {roll}!")
-        time.sleep(2)
+            self.ui.show(f"\n{ai_player.name} is on K and gets a last chance re-roll!")
+            log_event(logging.INFO, 'last_chance', player=ai_player.name)
+            self.ui.pause(2); roll = roll_dice(with_advantage=use_advantage, ui=self.ui, rng=ai_player.match_dice); self.ui.show(f"Last chance roll... a {roll}!")
+        self.ui.pause(2)
         if roll >= difficulty:
-            print("They landed it!"); logging.info(f"AI {ai_player.name} MATCHED the trick. Roll: {roll} >= Difficulty: {difficulty}")
+            self.ui.show("They landed it!"); log_event(logging.INFO, 'match_result', player=ai_player.name, landed=True, roll=roll, difficulty=difficulty)
             self.last_turn_summary = f"{ai_player.name} matched the trick."; self.switch_setter()
         else:
-            print("They bailed! They get a letter."); logging.warning(f"AI {ai_player.name} FAILED to match. Roll: {roll} < Difficulty: {difficulty}. They get a letter.")
-            ai_player.letters += LETTERS[len(ai_player.letters)]; self.last_turn_summary = f"{ai_player.name} bailed and got a letter."
-        self.trick_to_match = None; time.sleep(3)
+            self.ui.show("They bailed! They get a letter."); log_event(logging.WARNING, 'match_result', player=ai_player.name, landed=False, roll=roll, difficulty=difficulty)
+            ai_player.letters += LETTERS[len(ai_player.letters)]; log_event(logging.WARNING, 'letter', player=ai_player.name, letters=ai_player.letters); self.last_turn_summary = f"{ai_player.name} bailed and got a letter."
+        self.trick_to_match = None; self.ui.pause(3)
         
     def ability_menu(self, player):
-        print(f"\n--- ABILITY MENU ---")
-        print(f"1: {player.skater.activated_desc}"); print(f"2: {player.skater.trade_desc}"); print("3: Cancel")
-        choice = input("> ")
-        if choice == '1': self.activate_skater_ability(player)
-        elif choice == '2': self.activate_trade_ability(player)
+        self.ui.show(f"\n--- ABILITY MENU ---", player)
+        self.ui.show(f"1: {player.skater.activated_desc}", player); self.ui.show(f"2: {player.skater.trade_desc}", player); self.ui.show("3: Cancel", player)
+        ability = player.skater.activated_ability
+        category_name = next((k for k, v in ALL_CATEGORIES.items() if v == ability['category']), "Unknown")
+        self.ui.show(f"(Odds of drawing a {category_name} card anyway in your next {ability['cost']} draws: {next_draw_chance(player, ability['category'], ability['cost']):.0%})", player)
+        choice = (yield from self.decide('ability', "> ", player))
+        if choice == '1': yield from self.activate_skater_ability(player)
+        elif choice == '2': yield from self.activate_trade_ability(player)
         else: return
         
     def activate_skater_ability(self, player):
         ability = player.skater.activated_ability
-        if len([c for c in player.hand if c != 'ollie']) < ability['cost']: print(f"\nNeed at least {ability['cost']} discardable cards."); time.sleep(2); return
+        if len([c for c in player.hand if c != 'ollie']) < ability['cost']: self.ui.show(f"\nNeed at least {ability['cost']} discardable cards.", player); self.ui.pause(2); return
         search_category = ability['category']
         category_name = next((k for k, v in ALL_CATEGORIES.items() if v == search_category), "Unknown").replace('_', ' ').title()
-        self.display_status(); print(f"\nChoose {ability['cost']} cards to discard to search for a {category_name} card.")
+        self.display_status(); self.ui.show(f"\nChoose {ability['cost']} cards to discard to search for a {category_name} card.", player)
         discardable_hand = [c for c in player.hand if c != 'ollie']
-        for i, card in enumerate(discardable_hand): print(f"  {i+1}: {card.replace('_', ' ').title()}")
+        for i, card in enumerate(discardable_hand): self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()}", player)
         try:
-            indices = sorted([int(i) - 1 for i in input("> ").split()], reverse=True)
-            if len(indices) != ability['cost']: print(f"Must choose exactly {ability['cost']} cards."); time.sleep(2); return
+            indices = sorted([int(i) - 1 for i in (yield from self.decide('ability_discards', "> ", player)).split()], reverse=True)
+            if len(indices) != ability['cost']: self.ui.show(f"Must choose exactly {ability['cost']} cards.", player); self.ui.pause(2); return
             cards_to_discard = [discardable_hand[i] for i in indices]
             player.discard_cards(cards_to_discard)
-            available_cards = [card for card in player.deck if card in search_category]
-            if not available_cards: print(f"\nNo {category_name} cards left in your deck!"); self.switch_setter(); time.sleep(3); return
-            print(f"\nFound these {category_name} cards. Choose one:"); [print(f"  {i+1}: {card.replace('_', ' ').title()}") for i, card in enumerate(available_cards)]
+            available_cards = player.deck.cards_in(search_category)
+            if not available_cards: self.ui.show(f"\nNo {category_name} cards left in your deck!", player); self.switch_setter(); self.ui.pause(3); return
+            self.ui.show(f"\nFound these {category_name} cards. Choose one:", player); [self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()}", player) for i, card in enumerate(available_cards)]
             while True:
                 try:
-                    choice = int(input("> "))
+                    choice = int((yield from self.decide('ability_pick', "> ", player)))
                     if 1 <= choice <= len(available_cards):
                         chosen_card = available_cards[choice-1]
-                        player.deck.remove(chosen_card); player.hand.append(chosen_card); random.shuffle(player.deck)
-                        logging.info(f"{player.name} used their main ability, discarding {cards_to_discard} to find {chosen_card}.")
-                        print(f"\nYou took '{chosen_card.replace('_', ' ').title()}' and added it to your hand."); break
-                except (ValueError, IndexError): print("Invalid input.")
-            self.switch_setter(); time.sleep(3)
-        except (ValueError, IndexError): print("\nInvalid input."); time.sleep(2)
+                        player.take_from_deck(chosen_card)
+                        log_event(logging.INFO, 'ability', player=player.name, kind='search', discarded=cards_to_discard, found=chosen_card)
+                        self.ui.show(f"\nYou took '{chosen_card.replace('_', ' ').title()}' and added it to your hand.", player); break
+                except (ValueError, IndexError): self.ui.show("Invalid input.", player)
+            self.switch_setter(); self.ui.pause(3)
+        except (ValueError, IndexError): self.ui.show("\nInvalid input.", player); self.ui.pause(2)
 
     def activate_trade_ability(self, player):
-        print("\n--- TRADE ABILITY ---")
+        self.ui.show("\n--- TRADE ABILITY ---", player)
         expertise_category = player.skater.activated_ability['category']
         expertise_name = next((k for k, v in ALL_CATEGORIES.items() if v == expertise_category), "Unknown").replace('_', ' ').title()
         cards_to_trade = [card for card in player.hand if card in expertise_category]
-        if not cards_to_trade: print(f"You don't have any {expertise_name} cards to trade!"); time.sleep(2); return
-        self.display_status(); print(f"Choose one of your {expertise_name} cards to discard:")
-        for i, card in enumerate(cards_to_trade): print(f"  {i+1}: {card.replace('_', ' ').title()}")
+        if not cards_to_trade: self.ui.show(f"You don't have any {expertise_name} cards to trade!", player); self.ui.pause(2); return
+        self.display_status(); self.ui.show(f"Choose one of your {expertise_name} cards to discard:", player)
+        for i, card in enumerate(cards_to_trade): self.ui.show(f"  {i+1}: {card.replace('_', ' ').title()}", player)
         try:
-            choice = int(input("> "))
+            choice = int((yield from self.decide('trade_card', "> ", player)))
             card_to_discard = cards_to_trade[choice - 1]
-        except (ValueError, IndexError): print("Invalid selection."); time.sleep(2); return
-        print("\nWhat type of card do you want to find?")
+        except (ValueError, IndexError): self.ui.show("Invalid selection.", player); self.ui.pause(2); return
+        self.ui.show("\nWhat type of card do you want to find?", player)
         other_categories = {k:v for k,v in ALL_CATEGORIES.items() if v != expertise_category}
         valid_trade_options = {}
         for i, (cat_name, cat_set) in enumerate(other_categories.items()):
-            count = sum(1 for card in player.deck if card in cat_set)
-            print(f"  {i+1}: {cat_name} ({count} available)")
+            count = player.deck.category_count(cat_set)
+            self.ui.show(f"  {i+1}: {cat_name} ({count} available, {next_draw_chance(player, cat_set):.0%} on your next draw)", player)
             if count > 0: valid_trade_options[i+1] = (cat_name, cat_set)
         try:
-            choice = int(input("> "))
-            if choice not in valid_trade_options: print("Invalid selection or no cards available in that category."); time.sleep(2); return
+            choice = int((yield from self.decide('trade_category', "> ", player)))
+            if choice not in valid_trade_options: self.ui.show("Invalid selection or no cards available in that category.", player); self.ui.pause(2); return
             target_category_name, target_category = valid_trade_options[choice]
-            available_cards = [card for card in player.deck if card in target_category]
-            found_card = random.choice(available_cards)
-            player.discard_cards([card_to_discard]); player.deck.remove(found_card); player.hand.append(found_card); random.shuffle(player.deck)
-            logging.info(f"{player.name} used their trade ability, trading {card_to_discard} to find {found_card}.")
-            print(f"You traded '{card_to_discard.replace('_',' ').title()}' and drew a '{found_card.replace('_',' ').title()}'!")
-        except(ValueError, IndexError): print("Invalid selection."); time.sleep(2); return
-        self.switch_setter(); time.sleep(3)
+            found_card = player.rng.choice(player.deck.cards_in(target_category))
+            player.discard_cards([card_to_discard]); player.take_from_deck(found_card)
+            log_event(logging.INFO, 'ability', player=player.name, kind='trade', discarded=[card_to_discard], found=found_card)
+            self.ui.show(f"You traded '{card_to_discard.replace('_',' ').title()}' and drew a '{found_card.replace('_',' ').title()}'!", player)
+        except(ValueError, IndexError): self.ui.show("Invalid selection.", player); self.ui.pause(2); return
+        self.switch_setter(); self.ui.pause(3)
+
+# --- Game State ---
+# An immutable snapshot of a game for lookahead: every pile is a tuple of card ids, so fork() is free and
+# apply() only rebuilds the seat an action touches. Dice and shuffles come from the rng passed to apply().
+
+class SeatState(namedtuple('SeatState', 'skater letters hand deck discard temporary')):
+    """One player's side of a GameState. The deck is drawn from its end, like Player.deck."""
+    __slots__ = ()
+
+    @classmethod
+    def from_player(cls, player):
+        return cls(player.skater, player.letters, card_ids(player.hand), card_ids(player.deck), card_ids(player.discard_pile), card_ids(player.temporary_cards))
+
+    def draw(self, n, rng):
+        """Returns (seat, drawn); an empty deck is refilled from the shuffled discard pile."""
+        hand, deck, discard, drawn = list(self.hand), list(self.deck), self.discard, []
+        for _ in range(n):
+            if not deck and discard: deck, discard = list(discard), (); rng.shuffle(deck)
+            if deck: card = deck.pop(); hand.append(card); drawn.append(card)
+        return self._replace(hand=tuple(hand), deck=tuple(deck), discard=discard), drawn
+
+    def discard_cards(self, cards):
+        """Same rules as Player.discard_cards: the Ollie stays, missing cards are skipped."""
+        hand, discard, temporary = list(self.hand), list(self.discard), list(self.temporary)
+        for card in cards:
+            if card == OLLIE or card not in hand: continue
+            hand.remove(card); discard.append(card)
+            if card in temporary: temporary.remove(card)
+        return self._replace(hand=tuple(hand), discard=tuple(discard), temporary=tuple(temporary))
+
+    def take_from_deck(self, card, rng):
+        deck = list(self.deck); deck.remove(card); rng.shuffle(deck)
+        return self._replace(hand=self.hand + (card,), deck=tuple(deck))
+
+    def shuffle_hand_into_deck(self, rng):
+        deck = list(self.deck) + [c for c in self.hand if c != OLLIE]; rng.shuffle(deck)
+        return self._replace(hand=tuple(c for c in self.hand if c == OLLIE), deck=tuple(deck))
+
+def _state_roll(advantage, rng):
+    """roll_dice() without the logging, for lookahead."""
+    if advantage:
+        rolls = sorted((rng.randint(1, 8), rng.randint(1, 8), rng.randint(1, 8)))
+        return rolls[1] + rolls[2]
+    return rng.randint(1, 8) + rng.randint(1, 8)
+
+_TRICK_OR_STANCE = CAT_TRICK | CAT_STANCE
+
+class GameState(namedtuple('GameState', 'seats setter phase trick difficulty roll advantage target turn winner')):
+    """A whole game position. `phase` says who acts next and which actions apply():
+
+      'set'   the setter (hand already drawn up): ('set', combo), ('sponsors',), ('thrasher',), ('pass',),
+              ('search', discards, card) or ('trade', card, category_name) for the skater abilities
+      'bail'  the matcher, after the setter landed while they hold Bail: ('bail', use)
+      'match' the matcher: ('match', use_pro_model_deck, advantage_card or None)
+      'focus' the matcher, after missing while they hold Focus: ('focus', use)
+      'over'  nobody; `winner` is the winning seat
+
+    Cards are ids from the Card Registry. Turns are counted the way SkateGame.run counts them."""
+    __slots__ = ()
+
+    @classmethod
+    def new(cls, skaters, rng=random):
+        """Opening position: themed decks, 7 cards dealt to each seat in turn, seat 0 to set on turn 1."""
+        seats = [SeatState(skater, "", (OLLIE,), card_ids(create_themed_deck(skater, rng, TUNED_DECKS.get(skater.name))), (), ()) for skater in skaters]
+        for _ in range(STARTING_HAND_SIZE - 1):
+            for i in range(len(seats)): seats[i] = seats[i].draw(1, rng)[0]
+        return cls(tuple(seats), 0, 'set', None, 0, 0, False, 0, 1, None)
+
+    @classmethod
+    def from_game(cls, game):
+        """Snapshot of a live SkateGame before a matcher turn, or during a setter turn once the hand is drawn up."""
+        seats = tuple(SeatState.from_player(p) for p in game.players)
+        if game.game_over: phase = 'over'
+        else: phase = 'match' if game.trick_to_match else 'set'
+        trick = card_ids(game.trick_to_match) if game.trick_to_match else None
+        winner = game.players.index(game.winner) if game.winner else None
+        return cls(seats, game.setter_index, phase, trick, game.difficulty_to_beat if trick else 0, 0, False, 0, game.turn_count, winner)
+
+    @property
+    def actor(self):
+        """Seat that makes the next decision."""
+        return self.setter if self.phase == 'set' else 1 - self.setter
+
+    def fork(self):
+        """States are immutable, so a fork is the state itself; apply() always returns a new one."""
+        return self
+
+    def legal_actions(self, max_len=AI_MAX_COMBO_LENGTH):
+        """Actions for the current phase. Skater abilities are left out (apply() still takes them)."""
+        seat = self.seats[self.actor]
+        if self.phase == 'set':
+            actions = [('set', combo) for combo in ComboSearch(card_names(seat.hand), max_len).all()]
+            if SPONSORS in seat.hand: actions.append(('sponsors',))
+            if THRASHER_MAGAZINE in seat.hand: actions.append(('thrasher',))
+            actions.append(('pass',))
+            return actions
+        if self.phase in ('bail', 'focus'): return [(self.phase, False), (self.phase, True)]
+        if self.phase == 'match':
+            spendable = [None] + sorted({c for c in self.trick if CARD_CATEGORIES[c] & _TRICK_OR_STANCE and c in seat.hand})
+            pro_options = (False, True) if PRO_MODEL_DECK in seat.hand else (False,)
+            return [('match', pro, card) for pro in pro_options for card in spendable]
+        return []
+
+    def _with_seat(self, index, seat):
+        seats = list(self.seats); seats[index] = seat
+        return self._replace(seats=tuple(seats))
+
+    def match_target(self, pro=False):
+        """What the matcher has to roll for the trick: its difficulty for their skater (without their negative ability
+        if they play Pro Model Deck) plus defender_penalty()."""
+        seat = self.seats[1 - self.setter]
+        return DIFFICULTY_ENGINE.difficulty_ids(self.trick, seat.skater, pro) + defender_penalty(self.trick, Counter(seat.hand))
+
+    def apply(self, action, rng=random):
+        """Returns the state after `action`; chance events (rolls, shuffles, random discards) are drawn from rng."""
+        kind, phase = action[0], self.phase
+        if phase == 'set':
+            seat = self.seats[self.setter]
+            if kind == 'sponsors':
+                seat, drawn = seat.discard_cards((SPONSORS,)).draw(2, rng)
+                return self._with_seat(self.setter, seat._replace(temporary=seat.temporary + tuple(drawn)))
+            if kind == 'thrasher':
+                seat, _ = seat.discard_cards((THRASHER_MAGAZINE,)).shuffle_hand_into_deck(rng).draw(7, rng)
+                return self._with_seat(self.setter, seat)
+            if kind == 'pass': return self._with_seat(self.setter, seat)._end_set_turn(False, rng)
+            if kind == 'search':
+                _, discards, card = action
+                seat = seat.discard_cards(discards)
+                if card is not None: seat = seat.take_from_deck(card, rng)
+                return self._with_seat(self.setter, seat)._end_set_turn(False, rng)
+            if kind == 'trade':
+                _, card, category_name = action
+                bits = category_bits(ALL_CATEGORIES[category_name])
+                found = rng.choice([c for c in seat.deck if bits >> c & 1])
+                seat = seat.discard_cards((card,)).take_from_deck(found, rng)
+                return self._with_seat(self.setter, seat)._end_set_turn(False, rng)
+            if kind == 'set':
+                combo = tuple(action[1])
+                difficulty = set_difficulty_ids(combo, seat.skater)
+                state = self._replace(trick=combo, difficulty=difficulty)
+                roll = _state_roll(False, rng)
+                if roll >= difficulty and BAIL in self.seats[1 - self.setter].hand: return state._replace(phase='bail', roll=roll)
+                return state._resolve_set(roll, rng)
+        elif phase == 'bail' and kind == 'bail':
+            state, roll = self, self.roll
+            if action[1]:
+                state = self._with_seat(1 - self.setter, self.seats[1 - self.setter].discard_cards((BAIL,)))
+                roll = _state_roll(False, rng)
+            return state._resolve_set(roll, rng)
+        elif phase == 'match' and kind == 'match':
+            _, pro, card = action
+            matcher = 1 - self.setter
+            seat = self.seats[matcher]
+            pro = pro and PRO_MODEL_DECK in seat.hand
+            target = self.match_target(pro)
+            if pro: seat = seat.discard_cards((PRO_MODEL_DECK,))
+            advantage = card is not None and card in self.trick and bool(CARD_CATEGORIES[card] & _TRICK_OR_STANCE) and card in seat.hand
+            if advantage: seat = seat.discard_cards((card,))
+            state = self._with_seat(matcher, seat)._replace(target=target, advantage=advantage)
+            roll = _state_roll(advantage, rng)
+            if roll < target and FOCUS in seat.hand: return state._replace(phase='focus', roll=roll)
+            return state._resolve_match(roll, rng)
+        elif phase == 'focus' and kind == 'focus':
+            state, roll = self, self.roll
+            if action[1]:
+                state = self._with_seat(1 - self.setter, self.seats[1 - self.setter].discard_cards((FOCUS,)))
+                roll = _state_roll(self.advantage, rng)
+            return state._resolve_match(roll, rng)
+        raise ValueError(f"Action {action!r} does not apply in phase {phase!r}")
+
+    def _resolve_set(self, roll, rng):
+        seat = self.seats[self.setter]
+        if roll >= self.difficulty:
+            # Like the human setter: specials go, plus one random trick card other than the Ollie.
+            discards = [c for c in self.trick if CARD_CATEGORIES[c] & CAT_SPECIAL]
+            tricks = [c for c in self.trick if CARD_CATEGORIES[c] & _TRICK_OR_STANCE and c != OLLIE]
+            if tricks: discards.append(rng.choice(tricks))
+            return self._with_seat(self.setter, seat.discard_cards(discards))._end_set_turn(True, rng)
+        return self._with_seat(self.setter, seat.discard_cards(self.trick))._end_set_turn(False, rng)
+
+    def _resolve_match(self, roll, rng):
+        matcher = 1 - self.setter
+        seat = self.seats[matcher]
+        if roll < self.target and len(seat.letters) == MAX_LETTERS - 1: roll = _state_roll(self.advantage, rng)
+        if roll >= self.target: state = self._replace(setter=matcher)
+        else: state = self._with_seat(matcher, seat._replace(letters=seat.letters + LETTERS[len(seat.letters)]))
+        state = state._cleanup(matcher)._replace(trick=None, difficulty=0, roll=0, advantage=False, target=0)
+        if len(state.seats[matcher].letters) >= MAX_LETTERS: return state._replace(phase='over', winner=1 - matcher)
+        return state._start_set_turn(rng)
+
+    def _cleanup(self, index):
+        """end_of_turn_cleanup: unused Sponsors cards are discarded."""
+        seat = self.seats[index]
+        if not seat.temporary: return self
+        unused = [c for c in seat.temporary if c in seat.hand]
+        return self._with_seat(index, seat.discard_cards(unused)._replace(temporary=()))
+
+    def _end_set_turn(self, landed, rng):
+        state = self._cleanup(self.setter)._replace(roll=0)
+        if landed: return state._replace(phase='match', turn=self.turn + 1)
+        return state._replace(trick=None, difficulty=0, setter=1 - self.setter)._start_set_turn(rng)
+
+    def _start_set_turn(self, rng):
+        """The next turn is a set: the setter draws back up to a full hand first, as in setter_turn."""
+        state = self._replace(phase='set', turn=self.turn + 1)
+        seat = state.seats[state.setter]
+        missing = STARTING_HAND_SIZE - len(seat.hand)
+        if missing <= 0: return state
+        return state._with_seat(state.setter, seat.draw(missing, rng)[0])
+
+# --- Search AI ---
+# Determinized Monte Carlo tree search over GameState. Each iteration re-deals the cards the searching player
+# can't see, walks an open-loop tree (nodes are action sequences, so dice and draws are re-sampled every
+# time), then finishes with a cheap rollout policy. Extra workers search independent trees in other processes
+# and their root statistics are merged in.
+
+class SearchNode:
+    __slots__ = ('children', 'visits', 'value')
+    def __init__(self): self.children, self.visits, self.value = {}, 0, 0.0
+
+@lru_cache(maxsize=20000)
+def set_candidates(hand, skater, opponent_letters, max_len, keep):
+    """Best `keep` combos of a sorted hand of ids by combo_set_scorer, best first."""
+    score = combo_set_scorer(skater, opponent_letters)
+    if COMBO_INDEX is not None and COMBO_INDEX.covers(skater): found = COMBO_INDEX.all(card_names(hand), skater, max_len=max_len, as_set=True)
+    else: found = ComboSearch(card_names(hand), max_len).sets(skater)
+    return tuple(combo for combo, _ in sorted(found, key=lambda item: score(*item), reverse=True)[:keep])
+
+def search_actions(state, root=False):
+    """Actions the search considers: every legal one, except that only the most promising sets are kept."""
+    if state.phase != 'set': return state.legal_actions()
+    seat = state.seats[state.actor]
+    max_len, keep = (AI_MAX_COMBO_LENGTH, SEARCH_ROOT_COMBOS) if root else (3, SEARCH_TREE_COMBOS)
+    actions = [('set', combo) for combo in set_candidates(tuple(sorted(seat.hand)), seat.skater, state.seats[1 - state.actor].letters, max_len, keep)]
+    if SPONSORS in seat.hand: actions.append(('sponsors',))
+    if THRASHER_MAGAZINE in seat.hand: actions.append(('thrasher',))
+    return actions or [('pass',)]
+
+def rollout_action(state):
+    """Fast default policy: best short set (digging first if that's a bare Ollie), always Bail, Focus, spend and Pro Model Deck."""
+    seat = state.seats[state.actor]
+    if state.phase == 'set':
+        combos = set_candidates(tuple(sorted(seat.hand)), seat.skater, state.seats[1 - state.actor].letters, 2, 1)
+        if combos and any(c != OLLIE for c in combos[0]): return ('set', combos[0])
+        if SPONSORS in seat.hand: return ('sponsors',)
+        if THRASHER_MAGAZINE in seat.hand: return ('thrasher',)
+        return ('set', combos[0]) if combos else ('pass',)
+    if state.phase == 'match':
+        spend = next((c for c in state.trick if CARD_CATEGORIES[c] & _TRICK_OR_STANCE and c in seat.hand), None)
+        return ('match', PRO_MODEL_DECK in seat.hand, spend)
+    return (state.phase, True)
+
+def determinize(state, perspective, rng):
+    """A copy of `state` with the hidden cards re-dealt: our own deck order and the opponent's hand and deck."""
+    seats = list(state.seats)
+    mine = list(seats[perspective].deck); rng.shuffle(mine)
+    seats[perspective] = seats[perspective]._replace(deck=tuple(mine))
+    other = seats[1 - perspective]
+    hidden = list(other.deck) + list(other.hand); hidden.remove(OLLIE); rng.shuffle(hidden)
+    split = len(other.hand) - 1
+    seats[1 - perspective] = other._replace(hand=(OLLIE,) + tuple(hidden[:split]), deck=tuple(hidden[split:]), temporary=())
+    return state._replace(seats=tuple(seats))
+
+def state_value(state, perspective):
+    """1 for a win, 0 for a loss; unfinished rollouts are scored by the letter difference."""
+    if state.phase == 'over': return 1.0 if state.winner == perspective else 0.0
+    return 0.5 + (len(state.seats[1 - perspective].letters) - len(state.seats[perspective].letters)) / (2 * MAX_LETTERS)
+
+def search_iteration(root, state, perspective, rng):
+    state = determinize(state, perspective, rng)
+    node, path = root, [root]
+    while state.phase != 'over':
+        actions = search_actions(state, node is root)
+        untried = [a for a in actions if a not in node.children]
+        if untried:
+            action = rng.choice(untried); child = node.children[action] = SearchNode(); node = child
+            state = state.apply(action, rng); path.append(node); break
+        # Values are stored from the searcher's side; the opponent picks what is worst for us.
+        flip = state.actor != perspective
+        log_visits = math.log(node.visits)
+        def uct(action):
+            child = node.children[action]; mean = child.value / child.visits
+            return (1 - mean if flip else mean) + SEARCH_EXPLORATION * math.sqrt(log_visits / child.visits)
+        action = max(actions, key=uct)
+        node = node.children[action]; state = state.apply(action, rng); path.append(node)
+    cutoff = state.turn + SEARCH_ROLLOUT_TURNS
+    while state.phase != 'over' and state.turn < cutoff: state = state.apply(rollout_action(state), rng)
+    value = state_value(state, perspective)
+    for node in path: node.visits += 1; node.value += value
+
+def run_search(state, think_time, rng, root=None):
+    """Searches from `state` for the player about to act until think_time seconds pass. Returns (root, iterations)."""
+    root, perspective, iterations = root or SearchNode(), state.actor, 0
+    deadline = time.perf_counter() + think_time
+    while iterations == 0 or time.perf_counter() < deadline:
+        search_iteration(root, state, perspective, rng); iterations += 1
+    return root, iterations
+
+def _search_worker(state, think_time, seed):
+    """Process-pool entry point. Skaters travel by name so the difficulty cache keeps working in the worker."""
+    by_name = {s.name: s for s in SKATERS}
+    state = state._replace(seats=tuple(seat._replace(skater=by_name[seat.skater]) for seat in state.seats))
+    root, iterations = run_search(state, think_time, random.Random(seed))
+    return {action: (child.visits, child.value) for action, child in root.children.items()}, iterations
+
+_SEARCH_POOL = None
+
+def search_pool(workers):
+    """A shared process pool with at least `workers` processes, created on first use."""
+    global _SEARCH_POOL
+    if _SEARCH_POOL is None or _SEARCH_POOL[0] < workers:
+        if _SEARCH_POOL: _SEARCH_POOL[1].shutdown()
+        _SEARCH_POOL = (workers, ProcessPoolExecutor(max_workers=workers))
+        atexit.register(_SEARCH_POOL[1].shutdown)
+    return _SEARCH_POOL[1]
+
+class SearchAI:
+    """Per-player settings and state for the Monte Carlo search AI.
+
+    think_time is the budget per decision in seconds; workers > 1 adds that many - 1 root-parallel searches in a
+    process pool. The subtree under the chosen move is kept and reused if the same player decides again in the
+    same turn (Sponsors then a set, or a match then Focus)."""
+    def __init__(self, think_time=SEARCH_THINK_TIME, workers=1, seed=None):
+        self.think_time, self.workers = think_time, workers
+        self.rng = random.Random(seed)
+        self.iterations = 0  # Total iterations behind the last decision, across workers.
+        self._reuse = None
+
+    def choose(self, state):
+        perspective = state.actor
+        root = self._reuse[1] if self._reuse and self._reuse[0] == (state.turn, perspective) else SearchNode()
+        futures = []
+        if self.workers > 1:
+            payload = state._replace(seats=tuple(seat._replace(skater=seat.skater.name) for seat in state.seats))
+            pool = search_pool(self.workers - 1)
+            futures = [pool.submit(_search_worker, payload, self.think_time, self.rng.randrange(2**63)) for _ in range(self.workers - 1)]
+        root, self.iterations = run_search(state, self.think_time, self.rng, root)
+        for future in futures:
+            stats, iterations = future.result()
+            self.iterations += iterations
+            for action, (visits, value) in stats.items():
+                child = root.children.setdefault(action, SearchNode())
+                child.visits += visits; child.value += value
+                root.visits += visits; root.value += value
+        legal = search_actions(state, root=True)
+        action = max(legal, key=lambda a: root.children[a].visits if a in root.children else -1)
+        self._reuse = ((state.turn, perspective), root.children.get(action))
+        return action
+
+# --- Profiling ---
+# Zero cost when off: a Profiler swaps the functions in PROFILE_POINTS for timing wrappers only while it runs
+# and puts the originals back when it stops, so the rule code never checks whether it is being profiled.
+
+PROFILE_POINTS = {
+    'deck': ('create_themed_deck', 'SkateGame.deal_cards'),
+    'draw': ('Player.draw_card', 'Player.discard_cards', 'Player.take_from_deck', 'Player.shuffle_hand_into_deck', 'CardPile.shuffle'),
+    'search': ('SkateGame.ai_choose_combo', 'ComboSearch._walk', 'valid_orderings', 'combo_set_scorer', 'SetScorer.choose', 'SearchAI.choose'),
+    'difficulty': ('DifficultyEngine.difficulty_ids', 'combo_difficulty_ids'),
+    'validation': ('validate_combo', 'validate_combo_ids'),
+    'rules': ('roll_dice', 'success_chance', 'Player.has_all_cards_for_trick', 'Player.has_any_cards_for_trick', 'SkateGame.ai_should_bail'),
+    'rendering': ('SkateGame.display_status', 'get_combo_display_name', 'Presenter.show', 'Presenter.clear'),
+    'logging': ('log_event',),
+}
+
+PROFILER = None
+
+def _profile_targets(point):
+    """(owner, attribute, name) for each place a PROFILE_POINTS entry is patched. Methods are also patched on every subclass that overrides them."""
+    if '.' not in point: return [(sys.modules[__name__], point, point)]
+    class_name, attr = point.split('.')
+    targets, classes = [], [globals()[class_name]]
+    while classes:
+        cls = classes.pop(); classes.extend(cls.__subclasses__())
+        if attr in cls.__dict__: targets.append((cls, attr, f"{cls.__name__}.{attr}"))
+    return targets
+
+class Profiler:
+    """Per-function call counts with inclusive and self time, self time per phase and per call stack, plus free-form counters.
+
+    Self time is what a function spent outside the other instrumented functions it called, so the phases add up
+    to the instrumented total without double counting. Use it through profiling()."""
+    def __init__(self, use_cprofile=False):
+        self.calls, self.total, self.own = Counter(), Counter(), Counter()
+        self.phases, self.stacks, self.counters = Counter(), Counter(), Counter()
+        self.cprofile = cProfile.Profile() if use_cprofile else None
+        self.elapsed, self._started, self._patched = 0.0, None, []
+        self._local = threading.local()
+
+    def _probe(self, name, phase):
+        """(enter, leave) callbacks that time one call of `name` on the calling thread's stack."""
+        local, clock = self._local, time.perf_counter
+        calls, total, own, phases, stacks = self.calls, self.total, self.own, self.phases, self.stacks
+        def enter():
+            stack = local.__dict__.setdefault('stack', [])
+            frame = [f"{stack[-1][0]};{name}" if stack else name, 0.0, clock()]
+            stack.append(frame)
+            return frame
+        def leave(frame):
+            elapsed = clock() - frame[2]
+            stack = local.stack; stack.pop()
+            if stack: stack[-1][1] += elapsed
+            self_time = elapsed - frame[1]
+            calls[name] += 1; total[name] += elapsed; own[name] += self_time
+            phases[phase] += self_time; stacks[frame[0]] += self_time
+        return enter, leave
+
+    def _wrap(self, fn, name, phase):
+        enter, leave = self._probe(name, phase)
+        @wraps(fn)
+        def profiled(*args, **kwargs):
+            frame = enter()
+            try: return fn(*args, **kwargs)
+            finally: leave(frame)
+        return profiled
+
+    @contextmanager
+    def timer(self, name, phase='custom'):
+        """Times a block of your own code as if it were an instrumented function called `name`."""
+        enter, leave = self._probe(name, phase)
+        frame = enter()
+        try: yield
+        finally: leave(frame)
+
+    def count(self, name, n=1): self.counters[name] += n
+
+    def start(self):
+        for phase, points in PROFILE_POINTS.items():
+            for point in points:
+                for owner, attr, name in _profile_targets(point):
+                    original = owner.__dict__[attr]
+                    self._patched.append((owner, attr, original))
+                    setattr(owner, attr, self._wrap(original, name, phase))
+        self._started = time.perf_counter()
+        if self.cprofile: self.cprofile.enable()
+
+    def stop(self):
+        if self.cprofile: self.cprofile.disable()
+        self.elapsed += time.perf_counter() - self._started
+        while self._patched:
+            owner, attr, original = self._patched.pop()
+            setattr(owner, attr, original)
+
+    def report(self, top=20):
+        """The phase breakdown, the `top` functions by self time and the counters, as text."""
+        share = lambda seconds: seconds / self.elapsed if self.elapsed else 0.0
+        lines = [f"--- Profile ({self.elapsed:.3f}s) ---", f"{'phase':<14}{'self s':>10}{'share':>8}"]
+        for phase, seconds in self.phases.most_common(): lines.append(f"{phase:<14}{seconds:>10.4f}{share(seconds):>8.1%}")
+        untimed = max(0.0, self.elapsed - sum(self.phases.values()))
+        lines.append(f"{'(elsewhere)':<14}{untimed:>10.4f}{share(untimed):>8.1%}")
+        lines.append(f"\n{'function':<34}{'calls':>10}{'total s':>10}{'self s':>10}{'us/call':>10}")
+        for name, seconds in self.own.most_common(top):
+            lines.append(f"{name:<34}{self.calls[name]:>10}{self.total[name]:>10.4f}{seconds:>10.4f}{self.total[name] / self.calls[name] * 1e6:>10.2f}")
+        if self.counters: lines.append("\n" + ", ".join(f"{name}: {n}" for name, n in sorted(self.counters.items())))
+        return "\n".join(lines)
+
+    def write_folded(self, path):
+        """Writes self time per call stack in the folded format read by flamegraph.pl and speedscope, in microseconds."""
+        with open(path, 'w', encoding='utf-8') as out:
+            for stack, seconds in sorted(self.stacks.items()):
+                if seconds >= 1e-6: out.write(f"{stack} {round(seconds * 1e6)}\n")
+
+    def dump_stats(self, path):
+        """Writes the cProfile data (pstats format, for snakeviz and friends). Needs Profiler(use_cprofile=True)."""
+        if not self.cprofile: raise RuntimeError("This profiler was started without cProfile.")
+        self.cprofile.dump_stats(path)
+
+@contextmanager
+def profiling(use_cprofile=False):
+    """`with profiling() as profiler:` instruments the rule code for the block; read profiler.report() afterwards.
+
+    Only the calling process is instrumented, so SearchAI workers and tournament pools are not covered."""
+    global PROFILER
+    if PROFILER is not None: raise RuntimeError("A profiler is already running.")
+    PROFILER = Profiler(use_cprofile); PROFILER.start()
+    try: yield PROFILER
+    finally: PROFILER.stop(); PROFILER = None
+
+def profile_count(name, n=1):
+    """Adds to a named counter in the running profiler's report; one comparison when profiling is off."""
+    if PROFILER is not None: PROFILER.counters[name] += n
+
+# --- Rule Variants ---
+# The balance knobs as data, so a tool can play under changed rules without editing this file: base trick
+# difficulties, the flip discount, stance costs, the defender penalty and each skater's modifier amounts.
+
+def current_rules():
+    """The knobs set_rules() can turn, at their current values."""
+    return {'base_difficulties': dict(BASE_DIFFICULTIES), 'flip_discount': FLIP_DISCOUNT, 'stances': dict(STANCES),
+            'defender_penalty': DEFENDER_PENALTY,
+            'abilities': {s.name: {'passive': s.passive_ability.get('amount'), 'negative': s.negative_ability.get('amount')} for s in SKATERS}}
+
+def set_rules(base_difficulties=None, flip_discount=None, stances=None, defender_penalty=None, abilities=None):
+    """Changes rule knobs (dicts are merged into the current ones; abilities maps a skater name to new 'passive' and/or
+    'negative' amounts) and rebuilds the card tables and caches derived from them. Only existing cards and skaters can
+    be changed. The combo index is dropped, since its difficulties no longer apply; this process only."""
+    global FLIP_DISCOUNT, DEFENDER_PENALTY, COMBO_INDEX
+    by_name = {s.name: s for s in SKATERS}
+    for table, changes in ((BASE_DIFFICULTIES, base_difficulties), (STANCES, stances), (by_name, abilities)):
+        unknown = set(changes or ()) - set(table)
+        if unknown: raise ValueError(f"Unknown rule target(s): {', '.join(sorted(unknown))}")
+    BASE_DIFFICULTIES.update(base_difficulties or {}); STANCES.update(stances or {})
+    if flip_discount is not None: FLIP_DISCOUNT = flip_discount
+    if defender_penalty is not None: DEFENDER_PENALTY = defender_penalty
+    for name, amounts in (abilities or {}).items():
+        skater = by_name[name]
+        # New dicts rather than in-place edits, so an ability shared with another object is left alone.
+        if amounts.get('passive') is not None: skater.passive_ability = {**skater.passive_ability, 'amount': amounts['passive']}
+        if amounts.get('negative') is not None: skater.negative_ability = {**skater.negative_ability, 'amount': amounts['negative']}
+    TRICKS_DATABASE.update({k: max(1, (v - FLIP_DISCOUNT)) if k in FLIP_TRICKS else v for k, v in BASE_DIFFICULTIES.items()})
+    for i, card in enumerate(CARD_NAMES): CARD_DIFFICULTY[i], STANCE_COST[i] = TRICKS_DATABASE.get(card, 0), STANCES.get(card, 0)
+    DIFFICULTY_ENGINE.clear(); set_orderings.cache_clear(); set_candidates.cache_clear(); modifier_offsets.cache_clear(); COMBO_INDEX = None
+
+@contextmanager
+def rule_variant(**changes):
+    """`with rule_variant(defender_penalty=3):` plays the block under set_rules(**changes), then restores the rules
+    (and the combo index) that were in force before."""
+    global COMBO_INDEX
+    saved, index = current_rules(), COMBO_INDEX
+    set_rules(**changes)
+    try: yield
+    finally: set_rules(**saved); COMBO_INDEX = index
+
+# --- Headless Simulation ---
+
+class ReplayDiverged(RuntimeError):
+    """A replayed game asked for more decisions than were recorded: the rules or the AI no longer play it the same way."""
+
+class ReplayPresenter(Presenter):
+    """Silent front end that answers prompts from a recorded decision log, in order."""
+    def __init__(self, decisions):
+        self.decisions, self.position = list(decisions), 0
+
+    def ask(self, prompt, player=None):
+        if self.position >= len(self.decisions):
+            raise ReplayDiverged(f"Replay ran out of recorded decisions at prompt {prompt!r}")
+        answer = self.decisions[self.position]; self.position += 1
+        return answer
+
+def replay(record, until_turn=None):
+    """Re-runs a game from SkateGame.record() without printing or sleeping, stopping after `until_turn` turns
+    (by default the number of turns recorded). Returns the SkateGame in the state it was in at that point."""
+    by_name = {s.name: s for s in SKATERS}
+    skaters = tuple(by_name[name] for name in record['skaters']) if record.get('skaters') else None
+    limits = {int(index): nodes for index, nodes in record.get('search_limits', {}).items()}
+    game = SkateGame(record['mode'], ui=ReplayPresenter(record['decisions']), skaters=skaters, seed=record['seed'], search_limits=limits,
+                     decks=record.get('decks', {}))
+    # Searched moves are read back from the decision log, so these never actually search.
+    for seat in record.get('search_seats', ()): game.players[seat].search_ai = SearchAI()
+    game.run(max_turns=until_turn if until_turn is not None else record.get('turns'))
+    return game
+
+def check_replays(records):
+    """Replays each record to the end and returns the indices whose outcome (winner, turns) no longer matches.
+
+    Handy for bisecting a rule change against a pile of recorded games."""
+    changed = []
+    for i, record in enumerate(records):
+        try: game = replay(record)
+        except ReplayDiverged: changed.append(i); continue
+        winner = game.players.index(game.winner) if game.winner else None
+        if (winner, game.turn_count) != (record['winner'], record['turns']): changed.append(i)
+    return changed
+
+def play_headless_game(seed=None, skaters=None, max_turns=500, decks=None):
+    """Plays one silent AI-vs-AI game and returns a small result dict."""
+    game = SkateGame('eve', ui=Presenter(), skaters=skaters, seed=seed, decks=decks)
+    winner = game.run(max_turns=max_turns)
+    return {
+        'seed': game.seed,
+        'skaters': tuple(p.skater.name for p in game.players),
+        'winner': game.players.index(winner) if winner else None,
+        'turns': game.turn_count,
+        'letters': tuple(p.letters for p in game.players),
+    }
+
+def simulate(n_games, seed=0, skaters=None, max_turns=500):
+    """Runs n_games headless AI-vs-AI games seeded from `seed` and returns aggregate stats.
+
+    Game i is seeded with seed + i, so any single game can be re-run on its own. One process plays about 100 games a
+    second, or about 150 with the combo index built, which is more than 10x short of the thousands a second this
+    runner was meant for. Setup, the silent presenter and the switched-off event log cost well under a millisecond a
+    game. Over 80% of the time goes on the setter AI, which lists and rates every combo in its hand, about 45 of them
+    for each of some 15 sets a game (see ComboSearch.sets and SetScorer.choose). For bigger batches spread games
+    across processes with sk8_tournament."""
+    wins_by_skater, seat_wins, total_turns, unfinished = Counter(), [0, 0], 0, 0
+    for i in range(n_games):
+        result = play_headless_game(seed + i, skaters, max_turns)
+        total_turns += result['turns']
+        if result['winner'] is None: unfinished += 1; continue
+        seat_wins[result['winner']] += 1
+        wins_by_skater[result['skaters'][result['winner']]] += 1
+    return {
+        'games': n_games, 'unfinished': unfinished, 'seat_wins': seat_wins,
+        'wins_by_skater': dict(wins_by_skater), 'avg_turns': total_turns / n_games if n_games else 0.0,
+    }
 
 if __name__ == "__main__":
-    if setup_logging():
-        clear_screen()
-        print("Welcome to SK8 - v0.7.1")
-        game = SkateGame('pve')
-        game.run()
+    parser = argparse.ArgumentParser(description="Play SK8 in the terminal.")
+    parser.add_argument('--simulate', type=int, metavar='N', help="Play N headless AI-vs-AI games instead and print their stats.")
+    parser.add_argument('--seed', type=int, default=0, help="First seed for --simulate.")
+    parser.add_argument('--pacing', choices=list(PACING), default='fast', help="How long the game pauses between steps.")
+    parser.add_argument('--profile', nargs='?', const='sk8_profile', metavar='PREFIX',
+                        help="Print a profile of the rule code at the end and write flame graph stacks to PREFIX.folded.")
+    parser.add_argument('--cprofile', action='store_true', help="With --profile, also run cProfile and write PREFIX.prof.")
+    parser.add_argument('--build-index', action='store_true', help=f"Enumerate every combo into {COMBO_INDEX_FILE.name} for faster AI turns, then exit.")
+    parser.add_argument('--new-game', action='store_true', help=f"Start a new game even if {JOURNAL_FILE.name} holds an unfinished one.")
+    args = parser.parse_args()
+    if args.build_index: print(f"Combo index written to {build_combo_index()}"); sys.exit()
+    load_combo_index(); load_tuned_decks()
+    with (profiling(args.cprofile) if args.profile else nullcontext()) as profiler:
+        if args.simulate is not None: print(simulate(args.simulate, seed=args.seed))
+        elif setup_logging():
+            clear_screen()
+            print("Welcome to SK8 - v0.7.1")
+            journal, ui = GameJournal(), TerminalPresenter(args.pacing)
+            game = None if args.new_game else SkateGame.resume(journal, ui)
+            if game: print(f"Resuming your unfinished game at turn {game.turn_count + 1}..."); time.sleep(PACING[args.pacing] * 1.5)
+            else: game = SkateGame('pve', ui=ui, journal=journal)
+            game.run()
+    if profiler:
+        print(profiler.report()); profiler.write_folded(f"{args.profile}.folded")
+        if args.cprofile: profiler.dump_stats(f"{args.profile}.prof")
@@ -0,0 +1,155 @@
+# SK8 - Benchmarks
+# Seeded throughput benchmarks for the rule and AI hot paths, written to JSON and checked against a stored baseline.
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+import sk8
+
+BASELINE_FILE = Path(__file__).parent / 'bench_baseline.json'
+DEFAULT_MAX_SLOWDOWN = 2.0  # A benchmark regresses when it runs this many times slower than its baseline.
+HAND_SIZES = (4, 8, 12)
+
+def combo_corpus(n=2000, seed=0):
+    """n combos of 1-5 cards drawn from the combo cards, fixed by `seed`. Roughly a third are valid."""
+    rng = random.Random(seed)
+    pool = [c for c in sk8.CARD_NAMES if sk8.CARD_IDS[c] in sk8.COMBO_CARD_IDS]
+    return [rng.sample(pool, rng.randint(1, 5)) for _ in range(n)]
+
+def deal_hand(size, seed=0):
+    """A hand of `size` cards from a themed deck (plus the Ollie), fixed by `seed`."""
+    rng = random.Random(seed)
+    deck = sk8.create_themed_deck(rng.choice(sk8.SKATERS), rng)
+    return ['ollie'] + deck[:size - 1]
+
+def timed(fn, min_time):
+    """Calls fn() until min_time seconds have passed; returns (calls, seconds)."""
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn(); calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time: return calls, elapsed
+
+# --- Benchmarks ---
+# Each returns (operations per call of the returned function, function). Setup happens outside the timing.
+
+def bench_validate_combo(seed):
+    corpus = combo_corpus(seed=seed)
+    def run():
+        for combo in corpus: sk8.validate_combo(combo)
+    return len(corpus), run
+
+def bench_combo_difficulty(seed):
+    """SkateGame.calculate_combo_difficulty with the difficulty cache warm, as during play."""
+    corpus = combo_corpus(seed=seed)
+    game = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed)
+    player = game.players[0]; player.skater = sk8.SKATERS[0]
+    def run():
+        for combo in corpus: game.calculate_combo_difficulty(combo, player)
+    return len(corpus), run
+
+def bench_combo_difficulty_uncached(seed):
+    corpus = [sk8.card_ids(c) for c in combo_corpus(seed=seed)]
+    skater = sk8.SKATERS[0]
+    def run():
+        for combo in corpus: sk8.combo_difficulty_ids(combo, skater)
+    return len(corpus), run
+
+def bench_display_name(seed):
+    corpus = combo_corpus(seed=seed)
+    def run():
+        for combo in corpus: sk8.get_combo_display_name(combo)
+    return len(corpus), run
+
+def bench_ai_setter_decision(seed, hand_size):
+    """The choice at the heart of ai_setter_turn (ai_choose_combo) for hands of `hand_size` cards."""
+    game = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed)
+    for i, player in enumerate(game.players): player.skater = sk8.SKATERS[i]
+    hands = [sk8.CardPile(deal_hand(hand_size, seed + i)) for i in range(20)]
+    player = game.players[0]
+    def run():
+        for hand in hands: player.hand = hand; game.ai_choose_combo(player)
+    return len(hands), run
+
+def bench_draw_discard(seed):
+    """Draws a card and discards it again, reshuffling whenever the deck runs out."""
+    player = sk8.Player("Bench", rng=random.Random(seed))
+    player.deck = sk8.CardPile(sk8.create_themed_deck(sk8.SKATERS[0], random.Random(seed)))
+    def run():
+        for _ in range(1000):
+            drawn = player.draw_card()
+            player.discard_cards(drawn)
+    return 2000, run
+
+def bench_headless_games(seed):
+    seeds = iter(range(seed, seed + 10**9))
+    return 1, lambda: sk8.play_headless_game(next(seeds))
+
+BENCHMARKS = {
+    'validate_combo': bench_validate_combo,
+    'calculate_combo_difficulty': bench_combo_difficulty,
+    'combo_difficulty_uncached': bench_combo_difficulty_uncached,
+    'get_combo_display_name': bench_display_name,
+    **{f'ai_setter_decision[hand={n}]': (lambda seed, n=n: bench_ai_setter_decision(seed, n)) for n in HAND_SIZES},
+    'draw_discard': bench_draw_discard,
+    'headless_games': bench_headless_games,
+}
+
+def run_benchmarks(names=None, seed=0, min_time=1.0, repeats=3):
+    """Runs each benchmark `repeats` times and keeps the best rate. Returns {name: {'ops_per_sec', 'us_per_op'}}."""
+    results = {}
+    for name in names or BENCHMARKS:
+        ops, fn = BENCHMARKS[name](seed)
+        fn()  # Warm-up: fills caches and lets lazily built tables settle.
+        best = 0.0
+        for _ in range(repeats):
+            calls, elapsed = timed(fn, min_time / repeats)
+            best = max(best, calls * ops / elapsed)
+        results[name] = {'ops_per_sec': best, 'us_per_op': 1e6 / best}
+    return results
+
+def compare(results, baseline, max_slowdown=DEFAULT_MAX_SLOWDOWN):
+    """Benchmarks that got more than max_slowdown times slower than the baseline, as {name: slowdown}."""
+    regressions = {}
+    for name, result in results.items():
+        if name not in baseline: continue
+        slowdown = baseline[name]['ops_per_sec'] / result['ops_per_sec']
+        if slowdown > max_slowdown: regressions[name] = slowdown
+    return regressions
+
+def format_report(results, baseline=None):
+    lines = [f"{'benchmark':<32}{'ops/sec':>14}{'us/op':>12}" + (f"{'vs baseline':>14}" if baseline else "")]
+    for name, result in results.items():
+        line = f"{name:<32}{result['ops_per_sec']:>14,.0f}{result['us_per_op']:>12.2f}"
+        if baseline and name in baseline: line += f"{result['ops_per_sec'] / baseline[name]['ops_per_sec']:>13.2f}x"
+        lines.append(line)
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark SK8's rule and AI hot paths.")
+    parser.add_argument('names', nargs='*', help=f"Benchmarks to run (default: all). Choices: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=1.0, help="Seconds spent timing each benchmark.")
+    parser.add_argument('--output', type=Path, default=Path('bench_results.json'), help="Where to write the results.")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE)
+    parser.add_argument('--max-slowdown', type=float, default=DEFAULT_MAX_SLOWDOWN)
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline.")
+    args = parser.parse_args()
+    unknown = [n for n in args.names if n not in BENCHMARKS]
+    if unknown: parser.error(f"unknown benchmark(s): {', '.join(unknown)}")
+    results = run_benchmarks(args.names, args.seed, args.min_time)
+    report = {'python': platform.python_version(), 'platform': platform.platform(), 'seed': args.seed, 'results': results}
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    baseline = json.loads(args.baseline.read_text())['results'] if args.baseline.exists() and not args.save_baseline else None
+    print(format_report(results, baseline))
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n"); print(f"\nBaseline saved to {args.baseline}")
+    elif baseline:
+        regressions = compare(results, baseline, args.max_slowdown)
+        for name, slowdown in regressions.items(): print(f"REGRESSION: {name} is {slowdown:.2f}x slower than the baseline")
+        if regressions: sys.exit(1)
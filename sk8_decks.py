@@ -0,0 +1,161 @@
+# SK8 - Deck tuner
+# Evolves the filler that pads each skater's deck (see sk8.create_themed_deck) with a genetic algorithm. Candidates are
+# scored by win rate in seeded headless games spread across a process pool, and the best filler per skater is saved to
+# sk8_decks.json, which the game, tournaments and the server load at startup.
+
+import argparse
+import json
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import sk8
+
+VALIDATION_SEED_OFFSET = 10**9  # The final check plays fresh seeds, so the reported win rate isn't the one that was tuned.
+TOURNAMENT_SIZE = 3  # Members drawn per selection, so also the smallest population that can breed.
+
+def canonical(filler):
+    """The cache key for a filler; card order doesn't matter once the deck is shuffled."""
+    return tuple(sorted(filler))
+
+def play_deck_games(skater_name, filler, opponent_names, seeds, max_turns=500, opponent_decks=None):
+    """Worker entry point: plays `skater_name`, padded with `filler` (None: the usual random filler), against each
+    opponent from both seats, once per seed. Returns (wins, finished games)."""
+    sk8.load_combo_index()
+    by_name = {s.name: s for s in sk8.SKATERS}
+    decks = dict(opponent_decks or {})
+    if filler is None: decks.pop(skater_name, None)
+    else: decks[skater_name] = list(filler)
+    wins = finished = 0
+    for opponent in opponent_names:
+        for seat, skaters in enumerate(((by_name[skater_name], by_name[opponent]), (by_name[opponent], by_name[skater_name]))):
+            for seed in seeds:
+                result = sk8.play_headless_game(seed, skaters, max_turns, decks)
+                if result['winner'] is None: continue
+                finished += 1; wins += result['winner'] == seat
+    return wins, finished
+
+class DeckTuner:
+    """A genetic search over one skater's filler: fillers are sets of distinct FILLER_POOL cards, bred by keeping the
+    cards both parents share and drawing the rest from either one, then mutated card by card.
+
+    Every candidate plays the same seeds, so results are comparable across generations and a filler that has already
+    been scored (an elite, or a child identical to an earlier deck) is taken from the cache instead of replayed."""
+    def __init__(self, skater, pool, games=50, population=16, elite=2, mutation_rate=0.15, seed=0, chunk_size=25,
+                 max_turns=500, opponent_decks=None):
+        if population < TOURNAMENT_SIZE: raise ValueError(f"A population needs at least {TOURNAMENT_SIZE} fillers, got {population}")
+        self.skater, self.pool, self.size = skater, pool, sk8.filler_size(skater)
+        self.opponents = [s.name for s in sk8.SKATERS if s is not skater]
+        self.seeds = list(range(seed, seed + games))
+        self.population_size, self.elite, self.mutation_rate = population, elite, mutation_rate
+        self.chunk_size, self.max_turns, self.opponent_decks = chunk_size, max_turns, dict(opponent_decks or {})
+        self.rng = random.Random(seed)
+        self.cache = {}  # canonical filler -> (wins, finished)
+        self.population = []
+
+    def _score(self, fillers, seeds):
+        """(wins, finished) per filler over `seeds`, with the games of all fillers chunked across the pool together."""
+        chunks = [seeds[i:i + self.chunk_size] for i in range(0, len(seeds), self.chunk_size)]
+        futures = [[self.pool.submit(play_deck_games, self.skater.name, filler, self.opponents, chunk, self.max_turns, self.opponent_decks)
+                    for chunk in chunks] for filler in fillers]
+        return [tuple(map(sum, zip(*(f.result() for f in row)))) for row in futures]
+
+    def evaluate(self, fillers):
+        """Win rate of each filler on the tuning seeds; only fillers not seen before are played."""
+        fresh = list(dict.fromkeys(canonical(f) for f in fillers if canonical(f) not in self.cache))
+        self.cache.update(zip(fresh, self._score(fresh, self.seeds)))
+        return [self.win_rate(f) for f in fillers]
+
+    def win_rate(self, filler):
+        wins, finished = self.cache[canonical(filler)]
+        return wins / finished if finished else 0.0
+
+    def random_filler(self): return canonical(self.rng.sample(sk8.FILLER_POOL, self.size))
+
+    def crossover(self, a, b):
+        shared = set(a) & set(b)
+        rest = sorted((set(a) | set(b)) - shared)
+        return canonical(list(shared) + self.rng.sample(rest, self.size - len(shared)))
+
+    def mutate(self, filler):
+        cards = list(filler)
+        for i in range(len(cards)):
+            if self.rng.random() < self.mutation_rate:
+                cards[i] = self.rng.choice([c for c in sk8.FILLER_POOL if c not in cards])
+        return canonical(cards)
+
+    def select(self, scored, k=TOURNAMENT_SIZE):
+        """Tournament selection: the best of k random members."""
+        return max(self.rng.sample(scored, k), key=lambda item: item[1])[0]
+
+    def run(self, generations=10, start=None, on_generation=None):
+        """Evolves the population for `generations` and returns (best filler, its win rate on the tuning seeds).
+        `start` (e.g. the current tuned filler) is seeded into the first generation."""
+        self.population = [canonical(start)] if start else []
+        while len(self.population) < self.population_size: self.population.append(self.random_filler())
+        for generation in range(generations):
+            scored = sorted(zip(self.population, self.evaluate(self.population)), key=lambda item: item[1], reverse=True)
+            if on_generation: on_generation(generation, scored)
+            if generation == generations - 1: break
+            children = [filler for filler, _ in scored[:self.elite]]
+            while len(children) < self.population_size:
+                children.append(self.mutate(self.crossover(self.select(scored), self.select(scored))))
+            self.population = children
+        return scored[0]
+
+    def validate(self, filler, games=None):
+        """Win rates of `filler` and of the usual random filler on fresh seeds, and the finished games behind each, as
+        (tuned, tuned games, random, random games)."""
+        first = self.seeds[0] + VALIDATION_SEED_OFFSET
+        seeds = list(range(first, first + (games or len(self.seeds))))
+        (tuned_wins, tuned_games), (random_wins, random_games) = self._score([filler, None], seeds)
+        return tuned_wins / max(1, tuned_games), tuned_games, random_wins / max(1, random_games), random_games
+
+def difference_half_width(tuned, tuned_games, baseline, baseline_games, z=1.96):
+    """Confidence half-width of tuned - baseline for two independent win rates over their own numbers of games."""
+    if not tuned_games or not baseline_games: return math.inf
+    return z * math.sqrt(tuned * (1 - tuned) / tuned_games + baseline * (1 - baseline) / baseline_games)
+
+def save_decks(path, decks, stats):
+    """Merges `decks` ({skater name: filler}) and their stats into the deck file at `path`, keeping other skaters' entries."""
+    data = json.loads(path.read_text()) if path.exists() else {'decks': {}, 'win_rates': {}}
+    data['decks'].update({name: list(filler) for name, filler in decks.items()})
+    data.setdefault('win_rates', {}).update(stats)
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Evolve each skater's deck filler by win rate in headless games.")
+    parser.add_argument('skaters', nargs='*', help="Skaters to tune (default: all).")
+    parser.add_argument('--generations', type=int, default=10)
+    parser.add_argument('--population', type=int, default=16)
+    parser.add_argument('--games', type=int, default=50, help="Seeds per opponent; each is played from both seats.")
+    parser.add_argument('--mutation-rate', type=float, default=0.15)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--against-tuned', action='store_true', help="Opponents use the decks already in the output file instead of random filler.")
+    parser.add_argument('--output', type=Path, default=sk8.TUNED_DECKS_FILE)
+    args = parser.parse_args()
+    by_name = {s.name: s for s in sk8.SKATERS}
+    unknown = [n for n in args.skaters if n not in by_name]
+    if unknown: parser.error(f"unknown skater(s): {', '.join(unknown)}")
+    if args.population < TOURNAMENT_SIZE: parser.error(f"--population must be at least {TOURNAMENT_SIZE}")
+    current = sk8.load_tuned_decks(args.output)
+    with ProcessPoolExecutor(max_workers=args.workers or os.cpu_count() or 1) as pool:
+        for name in args.skaters or list(by_name):
+            tuner = DeckTuner(by_name[name], pool, args.games, args.population, mutation_rate=args.mutation_rate, seed=args.seed,
+                              opponent_decks=current if args.against_tuned else None)
+            print(f"--- {name} ({tuner.size} filler cards) ---")
+            best, rate = tuner.run(args.generations, current.get(name),
+                                   on_generation=lambda g, scored: print(f"generation {g + 1}: best {scored[0][1]:.1%}, median {scored[len(scored) // 2][1]:.1%}, {len(tuner.cache)} decks scored"))
+            tuned, tuned_games, baseline, baseline_games = tuner.validate(best)
+            print(f"{', '.join(best)}\nfresh seeds: {tuned:.1%} tuned over {tuned_games} games vs "
+                  f"{baseline:.1%} random filler over {baseline_games}")
+            half_width = difference_half_width(tuned, tuned_games, baseline, baseline_games)
+            if tuned - baseline <= half_width:  # Not a clear win over random filler: don't make the AI play it.
+                print(f"Not saved: {tuned - baseline:+.1%} over random filler doesn't clear the ±{half_width:.1%} interval; "
+                      f"{name} keeps {'its previous deck' if name in current else 'random filler'}.\n"); continue
+            save_decks(args.output, {name: best}, {name: {'tuned': tuned, 'tuned_games': tuned_games, 'random_filler': baseline,
+                                                         'random_filler_games': baseline_games}})
+            print(f"Saved to {args.output}.\n")
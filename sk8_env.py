@@ -0,0 +1,198 @@
+# SK8 - Training environment
+# Gym-style environments over sk8.GameState for training a policy to set and match: SkateEnv plays one game,
+# SyncVectorEnv steps N independent games in lockstep and writes every result into flat, preallocated buffers. Like
+# Gym's SyncVectorEnv it steps the games one after another in Python. The rules are not evaluated as arrays: about 85%
+# of a step is the opponent's set choice and the ranking of the agent's combos, both combo searches, while dice rolls
+# and match targets are under 3%, so batching those would not speed up a step.
+#
+# The agent plays one seat against an opponent policy. Observations are fixed-length int16 vectors seen from the
+# agent's side of the table (see OBSERVATION_FIELDS). Actions are ACTION_SIZE discrete slots with a legality mask:
+#   set phase     0 pass, 1 Sponsors, 2 Thrasher Magazine, 3.. the legal combos ranked best first by combo_set_scorer
+#   bail, focus   0 keep the card, 1 play it
+#   match         0 plain roll, 1 Pro Model Deck, 2 spend a trick card for advantage, 3 both
+# Rewards: +letter_reward for every letter the opponent takes, -letter_reward for every letter the agent takes,
+# and +/-win_reward when the game ends.
+# Nothing here needs NumPy, but the buffers are plain arrays, so numpy.frombuffer() can view them without copying.
+
+import random
+from array import array
+
+import sk8
+
+N_CARDS = len(sk8.CARD_NAMES)
+PHASES = ('set', 'bail', 'match', 'focus', 'over')
+SET_SLOTS = 29
+ACTION_SIZE = 3 + SET_SLOTS
+SLOT_PASS, SLOT_SPONSORS, SLOT_THRASHER, SLOT_FIRST_SET = 0, 1, 2, 3
+SLOT_PRO, SLOT_ADVANTAGE = 1, 2  # Match-phase flags; slot 3 is both.
+SCALARS = ('letters', 'opponent_letters', 'setter', 'difficulty', 'roll', 'target', 'temporary', 'opponent_hand', 'opponent_deck', 'turn')
+OBSERVATION_FIELDS = (('hand', N_CARDS), ('deck', N_CARDS), ('discard', N_CARDS), ('opponent_discard', N_CARDS), ('trick', N_CARDS),
+                      ('phase', len(PHASES)), ('skater', len(sk8.SKATERS)), ('opponent_skater', len(sk8.SKATERS)), ('scalars', len(SCALARS)))
+OBS_SIZE = sum(size for _, size in OBSERVATION_FIELDS)
+
+def ranked_sets(state, keep=SET_SLOTS):
+    """The actor's legal combos, best first by expected value (sk8.set_candidates)."""
+    seat = state.seats[state.actor]
+    return sk8.set_candidates(tuple(sorted(seat.hand)), seat.skater, state.seats[1 - state.actor].letters, sk8.AI_MAX_COMBO_LENGTH, keep)
+
+def _advantage_card(state):
+    seat = state.seats[state.actor]
+    return min((c for c in state.trick if sk8.CARD_CATEGORIES[c] & (sk8.CAT_TRICK | sk8.CAT_STANCE) and c in seat.hand), default=None)
+
+def action_mask(state, sets, out=None, offset=0):
+    """Writes the ACTION_SIZE legality flags for the actor into `out` (a new bytearray if None) and returns it."""
+    if out is None: out = bytearray(ACTION_SIZE)
+    out[offset:offset + ACTION_SIZE] = bytes(ACTION_SIZE)
+    hand = state.seats[state.actor].hand
+    if state.phase == 'set':
+        out[offset + SLOT_PASS] = 1
+        out[offset + SLOT_SPONSORS] = sk8.SPONSORS in hand
+        out[offset + SLOT_THRASHER] = sk8.THRASHER_MAGAZINE in hand
+        out[offset + SLOT_FIRST_SET:offset + SLOT_FIRST_SET + len(sets)] = b'\1' * len(sets)
+    elif state.phase in ('bail', 'focus'): out[offset] = out[offset + 1] = 1
+    elif state.phase == 'match':
+        pro, advantage = sk8.PRO_MODEL_DECK in hand, _advantage_card(state) is not None
+        out[offset] = 1; out[offset + SLOT_PRO] = pro; out[offset + SLOT_ADVANTAGE] = advantage; out[offset + 3] = pro and advantage
+    return out
+
+def decode_action(state, slot, sets):
+    """The GameState action for action slot `slot`. Raises ValueError for a slot the mask rules out."""
+    if not action_mask(state, sets)[slot]: raise ValueError(f"Action slot {slot} is not legal in phase {state.phase!r}")
+    if state.phase == 'set':
+        if slot == SLOT_PASS: return ('pass',)
+        if slot == SLOT_SPONSORS: return ('sponsors',)
+        if slot == SLOT_THRASHER: return ('thrasher',)
+        return ('set', sets[slot - SLOT_FIRST_SET])
+    if state.phase in ('bail', 'focus'): return (state.phase, slot == 1)
+    return ('match', bool(slot & SLOT_PRO), _advantage_card(state) if slot & SLOT_ADVANTAGE else None)
+
+def encode_action(state, action, sets):
+    """The action slot for a GameState action, e.g. to imitate default_opponent. Sets outside `sets` raise ValueError."""
+    kind = action[0]
+    if kind == 'set': return SLOT_FIRST_SET + sets.index(action[1])
+    if kind in ('pass', 'sponsors', 'thrasher'): return (SLOT_PASS, SLOT_SPONSORS, SLOT_THRASHER)[('pass', 'sponsors', 'thrasher').index(kind)]
+    if kind in ('bail', 'focus'): return int(action[1])
+    return (SLOT_PRO if action[1] else 0) | (SLOT_ADVANTAGE if action[2] is not None else 0)
+
+def encode_observation(state, seat, out=None, offset=0):
+    """Writes `state` as seen by `seat` into `out` (a new int16 array if None) at `offset` and returns it.
+
+    Card fields are per-card-id counts. The opponent's hand and deck are hidden, apart from their sizes."""
+    if out is None: out = array('h', bytes(2 * OBS_SIZE))
+    out[offset:offset + OBS_SIZE] = array('h', bytes(2 * OBS_SIZE))
+    me, them = state.seats[seat], state.seats[1 - seat]
+    for base, cards in enumerate((me.hand, me.deck, me.discard, them.discard, state.trick or ())):
+        start = offset + base * N_CARDS
+        for card in cards: out[start + card] += 1
+    pos = offset + 5 * N_CARDS
+    out[pos + PHASES.index(state.phase)] = 1; pos += len(PHASES)
+    out[pos + sk8.SKATERS.index(me.skater)] = 1; pos += len(sk8.SKATERS)
+    out[pos + sk8.SKATERS.index(them.skater)] = 1; pos += len(sk8.SKATERS)
+    scalars = (len(me.letters), len(them.letters), state.setter == seat, state.difficulty, state.roll, state.target,
+               len(me.temporary), len(them.hand), len(them.deck), state.turn)
+    out[pos:pos + len(SCALARS)] = array('h', scalars)
+    return out
+
+def default_opponent(state, rng):
+    """The built-in expected-value AI's choices, on a GameState: the best combo up to AI_MAX_COMBO_LENGTH against the
+    other seat (sk8.SetScorer, digging with Sponsors or Thrasher Magazine before settling for a bare Ollie), and
+    sk8.rollout_action for everything else."""
+    if state.phase != 'set': return sk8.rollout_action(state)
+    seat = state.seats[state.actor]
+    combo, _ = sk8.SetScorer(seat.skater, state.seats[1 - state.actor]).best(seat.hand)
+    if any(c != sk8.OLLIE for c in combo): return ('set', combo)
+    if sk8.SPONSORS in seat.hand: return ('sponsors',)
+    if sk8.THRASHER_MAGAZINE in seat.hand: return ('thrasher',)
+    return ('set', combo) if combo else ('pass',)
+
+class SkateEnv:
+    """One game against `opponent`, a function (GameState, rng) -> GameState action, e.g. a frozen copy of the policy
+    being trained. `seat` fixes the agent's seat (None picks one at random each episode), `skaters` fixes both seats'
+    Skaters (None deals two different ones), and episodes are truncated after max_turns."""
+    def __init__(self, seed=None, seat=None, skaters=None, opponent=default_opponent, max_turns=500, letter_reward=1.0, win_reward=1.0):
+        self.rng = random.Random(seed)
+        self.fixed_seat, self.fixed_skaters, self.opponent = seat, skaters, opponent
+        self.max_turns, self.letter_reward, self.win_reward = max_turns, letter_reward, win_reward
+        self.state, self.seat, self.sets = None, 0, ()
+        sk8.load_combo_index(); sk8.load_tuned_decks()
+
+    def reset(self, seed=None):
+        """Starts a new game and plays the opponent up to the agent's first decision. Returns (observation, info)."""
+        if seed is not None: self.rng.seed(seed)
+        self.seat = self.rng.randrange(2) if self.fixed_seat is None else self.fixed_seat
+        skaters = self.fixed_skaters or tuple(self.rng.sample(sk8.SKATERS, 2))
+        self.state = self._play_opponent(sk8.GameState.new(skaters, self.rng))
+        self.sets = ranked_sets(self.state) if self.state.phase == 'set' else ()
+        return self.observation(), self.info()
+
+    def step(self, slot):
+        """Plays action slot `slot`, then the opponent until it is the agent's turn again.
+        Returns (observation, reward, terminated, truncated, info)."""
+        before = self.state
+        self.state = self._play_opponent(before.apply(decode_action(before, slot, self.sets), self.rng))
+        self.sets = ranked_sets(self.state) if self.state.phase == 'set' and self.state.actor == self.seat else ()
+        return self.observation(), self._reward(before, self.state), self.terminated, self.truncated, self.info()
+
+    def _play_opponent(self, state):
+        while state.phase != 'over' and state.actor != self.seat and state.turn <= self.max_turns:
+            state = state.apply(self.opponent(state, self.rng), self.rng)
+        return state
+
+    def _reward(self, before, after):
+        mine = len(after.seats[self.seat].letters) - len(before.seats[self.seat].letters)
+        theirs = len(after.seats[1 - self.seat].letters) - len(before.seats[1 - self.seat].letters)
+        reward = (theirs - mine) * self.letter_reward
+        if after.winner is not None: reward += self.win_reward if after.winner == self.seat else -self.win_reward
+        return reward
+
+    @property
+    def terminated(self): return self.state.phase == 'over'
+
+    @property
+    def truncated(self): return not self.terminated and self.state.turn > self.max_turns
+
+    def observation(self, out=None, offset=0): return encode_observation(self.state, self.seat, out, offset)
+    def action_mask(self, out=None, offset=0): return action_mask(self.state, self.sets, out, offset)
+    def info(self): return {'action_mask': self.action_mask(), 'seat': self.seat, 'turn': self.state.turn, 'winner': self.state.winner}
+
+class SyncVectorEnv:
+    """n SkateEnvs stepped in lockstep, game i seeded with seed + i. A finished game is reset on the spot (its final
+    observation goes into infos[i]['final_observation']), so every step returns n live games.
+
+    observations (n x OBS_SIZE int16), action_masks (n x ACTION_SIZE bytes), rewards (float32) and the terminated /
+    truncated flags are flat buffers allocated once and overwritten by each reset() and step(). Only the buffers are
+    batched: step() runs each game's SkateEnv.step in turn, so a core manages about 1,300 agent steps a second (1,800
+    with the combo index), most of it in default_opponent's set choice. For millions of steps, run one SyncVectorEnv
+    per process."""
+    def __init__(self, n, seed=0, **env_options):
+        self.envs = [SkateEnv(seed=seed + i, **env_options) for i in range(n)]
+        self.observations = array('h', bytes(2 * n * OBS_SIZE))
+        self.action_masks = bytearray(n * ACTION_SIZE)
+        self.rewards = array('f', bytes(4 * n))
+        self.terminated, self.truncated = bytearray(n), bytearray(n)
+
+    def __len__(self): return len(self.envs)
+
+    def _write(self, i, env):
+        env.observation(self.observations, i * OBS_SIZE); env.action_mask(self.action_masks, i * ACTION_SIZE)
+
+    def reset(self):
+        """Returns (observations, action_masks)."""
+        for i, env in enumerate(self.envs): env.reset(); self._write(i, env)
+        return self.observations, self.action_masks
+
+    def step(self, slots):
+        """Steps game i with slots[i]. Returns (observations, rewards, terminated, truncated, infos)."""
+        infos = [{} for _ in self.envs]
+        for i, (env, slot) in enumerate(zip(self.envs, slots)):
+            _, reward, terminated, truncated, _ = env.step(slot)
+            self.rewards[i], self.terminated[i], self.truncated[i] = reward, terminated, truncated
+            if terminated or truncated:
+                infos[i] = {'final_observation': env.observation(), 'winner': env.state.winner, 'turns': env.state.turn}
+                env.reset()
+            self._write(i, env)
+        return self.observations, self.rewards, self.terminated, self.truncated, infos
+
+def random_legal_slots(masks, rng, width=ACTION_SIZE):
+    """A random legal slot per game from a flat mask buffer, e.g. for smoke tests and baselines."""
+    return [rng.choice([s for s in range(width) if masks[i + s]]) for i in range(0, len(masks), width)]
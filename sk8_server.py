@@ -0,0 +1,214 @@
+# SK8 - Match server
+# Hosts many concurrent SK8 matches over a JSON-lines TCP protocol, with a terminal client and a load generator.
+#
+# Protocol: the client sends one hello line, {"mode": "pve" | "pvp", "seed": optional int}. pvp clients are paired
+# in arrival order. The server then sends {"type": "show", "text"}, {"type": "clear"} and {"type": "ask", "prompt"}
+# messages, one JSON object per line; every ask is answered with one plain line of text. The match ends with
+# {"type": "over", "winner", "turns"}. In pvp, a player's hand, menus and prompts are sent to that player alone.
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+import sk8
+
+DEFAULT_HOST, DEFAULT_PORT = "127.0.0.1", 8765
+
+class Connection:
+    """One client socket. send() is only ever called on the event loop."""
+    def __init__(self, reader, writer):
+        self.reader, self.writer = reader, writer
+
+    def send(self, message):
+        if not self.writer.is_closing(): self.writer.write((json.dumps(message) + "\n").encode())
+
+    async def ask(self, prompt):
+        self.send({'type': 'ask', 'prompt': prompt})
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line: raise ConnectionError("client disconnected")
+        return line.decode().rstrip("\r\n")
+
+    @property
+    def closed(self):
+        """True once the client has hung up, even if nothing has read from it since."""
+        return self.reader.at_eof() or self.writer.is_closing()
+
+    async def close(self):
+        self.writer.close()
+        try: await self.writer.wait_closed()
+        except ConnectionError: pass
+
+class MatchPresenter(sk8.Presenter):
+    """Sends a match's output to its clients: the table to everyone, a player's own lines only to their connection
+    (`seats` maps each human Player to theirs). Game steps run on executor threads, so messages are handed to the loop."""
+    def __init__(self, loop, connections):
+        self.loop, self.connections, self.seats = loop, connections, {}
+
+    def _send_all(self, message):
+        for conn in self.connections: self.loop.call_soon_threadsafe(conn.send, message)
+
+    def show(self, text="", player=None):
+        if player is None: self._send_all({'type': 'show', 'text': text})
+        elif player in self.seats: self.loop.call_soon_threadsafe(self.seats[player].send, {'type': 'show', 'text': text})
+    def clear(self): self._send_all({'type': 'clear'})
+
+def advance(steps, answer):
+    """One step of a SkateGame.play() generator: (next Decision, None) or (None, winner) once the game is over."""
+    try: return steps.send(answer), None
+    except StopIteration as stop: return None, stop.value
+
+class GameServer:
+    """Accepts clients, pairs pvp players and drives each match's SkateGame.play() generator.
+
+    The rule and AI code between two decisions runs on a small executor, so it never holds up the event loop,
+    and a match waiting on a client is just a paused generator: no thread sits blocked on the network."""
+    def __init__(self, max_turns=500, workers=None):
+        self.max_turns = max_turns
+        sk8.load_combo_index(); sk8.load_tuned_decks()
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="sk8-match")
+        self.waiting = None  # (connection, future) of a pvp client waiting for an opponent
+        self.active, self.finished = 0, 0
+
+    async def handle(self, reader, writer):
+        conn, waiting = Connection(reader, writer), None
+        try:
+            hello = json.loads(await reader.readline() or b"{}")
+            mode, seed = hello.get('mode', 'pve'), hello.get('seed')
+            if mode != 'pvp': await self.play([conn], 'pve', seed); return
+            if self.waiting is not None and self.waiting[0].closed:  # It hung up while waiting: release it, take its place.
+                self.waiting[1].set_exception(ConnectionError("client disconnected")); self.waiting = None
+            if self.waiting is None:
+                waiting = self.waiting = (conn, asyncio.get_running_loop().create_future())
+                conn.send({'type': 'show', 'text': "Waiting for an opponent..."})
+                await waiting[1]; return
+            (first, done), self.waiting = self.waiting, None
+            try: await self.play([first, conn], 'pvp', seed)
+            finally: done.set_result(None)
+        except (ConnectionError, json.JSONDecodeError): pass
+        finally:
+            if waiting is not None and self.waiting is waiting: self.waiting = None
+            await conn.close()
+
+    async def play(self, connections, mode, seed=None):
+        loop = asyncio.get_running_loop()
+        ui = MatchPresenter(loop, connections)
+        game = sk8.SkateGame(mode, ui=ui, seed=seed)
+        humans = [p for p in game.players if not p.is_ai]
+        ui.seats = dict(zip(humans, connections))
+        steps = game.play(self.max_turns)
+        self.active += 1
+        try:
+            decision, winner = await loop.run_in_executor(self.executor, advance, steps, None)
+            while decision is not None:
+                # Prompts addressed to nobody in particular ("Press Enter to start") don't wait on the network.
+                answer = await connections[humans.index(decision.player)].ask(decision.prompt) if decision.player in humans else ""
+                decision, winner = await loop.run_in_executor(self.executor, advance, steps, answer)
+        except ConnectionError: winner = None; steps.close()
+        finally: self.active -= 1; self.finished += 1
+        for conn in connections:
+            conn.send({'type': 'over', 'winner': winner.name if winner else None, 'turns': game.turn_count})
+            try: await conn.writer.drain()
+            except ConnectionError: pass
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        """Starts listening and returns the asyncio Server (port 0 picks a free port)."""
+        return await asyncio.start_server(self.handle, host, port)
+
+# --- Clients ---
+
+def scripted_answer(prompt, rng):
+    """A plausible, not especially smart, answer to any prompt the game asks."""
+    if "card numbers" in prompt:
+        if rng.random() < 0.05: return 'a'
+        return ' '.join(str(rng.randint(1, 8)) for _ in range(rng.randint(1, 2)))
+    if "(y/n)" in prompt: return rng.choice('yn')
+    if "Press Enter" in prompt: return ''
+    return str(rng.randint(1, 3))
+
+async def scripted_client(host, port, mode, rng, latencies, started=None, seed=None):
+    """Plays one match with scripted answers, recording the time from each answer to the server's next message."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({'mode': mode, 'seed': seed}) + "\n").encode())
+    sent_at, result = None, None
+    while line := await reader.readline():
+        if sent_at is not None: latencies.append(time.perf_counter() - sent_at); sent_at = None
+        message = json.loads(line)
+        if message['type'] == 'ask':
+            if started is not None: started.add(id(writer))
+            writer.write((scripted_answer(message['prompt'], rng) + "\n").encode()); await writer.drain()
+            sent_at = time.perf_counter()
+        elif message['type'] == 'over': result = message; break
+    writer.close()
+    return result
+
+async def terminal_client(host, port, mode):
+    """Plays a match from this terminal, drawn by the same renderer as a local game."""
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((json.dumps({'mode': mode}) + "\n").encode())
+    loop, ui = asyncio.get_running_loop(), sk8.TerminalPresenter('instant')
+    while line := await reader.readline():
+        message = json.loads(line)
+        if message['type'] == 'show': ui.show(message['text'])
+        elif message['type'] == 'clear': ui.clear()
+        elif message['type'] == 'ask':
+            answer = await loop.run_in_executor(None, ui.ask, message['prompt'])
+            writer.write((answer + "\n").encode()); await writer.drain()
+        elif message['type'] == 'over': ui.show(f"\nMatch over. Winner: {message['winner'] or 'nobody'}"); ui.pause(0); break
+    writer.close()
+
+async def load_test(matches=200, mode='pve', max_turns=60, seed=0, measure_memory=True):
+    """Runs a server and `matches` simultaneous matches of scripted clients in this process.
+
+    Memory is the traced Python allocation per match once every match is under way; tracing is then switched off
+    so it doesn't slow the latency measurements."""
+    server = GameServer(max_turns=max_turns)
+    listener = await server.serve(port=0)
+    host, port = listener.sockets[0].getsockname()[:2]
+    clients = matches * (2 if mode == 'pvp' else 1)
+    latencies, started, per_match_bytes = [], set(), None
+    if measure_memory: tracemalloc.start(); baseline = tracemalloc.get_traced_memory()[0]
+    began = time.perf_counter()
+    tasks = [asyncio.create_task(scripted_client(host, port, mode, random.Random(seed + i), latencies, started, seed + i // 2 if mode == 'pvp' else seed + i))
+             for i in range(clients)]
+    if measure_memory:
+        while len(started) < clients and not all(t.done() for t in tasks): await asyncio.sleep(0.05)
+        per_match_bytes = (tracemalloc.get_traced_memory()[0] - baseline) / matches
+        tracemalloc.stop()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - began
+    listener.close(); await listener.wait_closed(); server.executor.shutdown()
+    ordered = sorted(latencies)
+    def percentile(q): return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+    return {
+        'matches': matches, 'mode': mode, 'finished': sum(r is not None for r in results) // (2 if mode == 'pvp' else 1),
+        'moves': len(latencies), 'seconds': elapsed, 'moves_per_second': len(latencies) / elapsed if elapsed else 0.0,
+        'latency_ms': {'mean': statistics.fmean(ordered) * 1000 if ordered else 0.0, 'p50': percentile(0.5) * 1000,
+                       'p95': percentile(0.95) * 1000, 'p99': percentile(0.99) * 1000, 'max': percentile(1.0) * 1000},
+        'bytes_per_match': per_match_bytes,
+    }
+
+async def _serve_forever(host, port, max_turns):
+    server = GameServer(max_turns=max_turns)
+    listener = await server.serve(host, port)
+    print(f"SK8 server listening on {host}:{port}")
+    async with listener: await listener.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Host SK8 matches over TCP, join one, or load-test the server.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    serve = sub.add_parser('serve'); serve.add_argument('--host', default=DEFAULT_HOST); serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve.add_argument('--max-turns', type=int, default=500)
+    play = sub.add_parser('play'); play.add_argument('--host', default=DEFAULT_HOST); play.add_argument('--port', type=int, default=DEFAULT_PORT)
+    play.add_argument('--mode', choices=('pve', 'pvp'), default='pve')
+    bench = sub.add_parser('bench'); bench.add_argument('--matches', type=int, default=200); bench.add_argument('--mode', choices=('pve', 'pvp'), default='pve')
+    bench.add_argument('--max-turns', type=int, default=60); bench.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if args.command == 'serve': asyncio.run(_serve_forever(args.host, args.port, args.max_turns))
+    elif args.command == 'play': asyncio.run(terminal_client(args.host, args.port, args.mode))
+    else: print(json.dumps(asyncio.run(load_test(args.matches, args.mode, args.max_turns, args.seed)), indent=2))
@@ -0,0 +1,260 @@
+# SK8 - Log analytics
+# Streams sk8.log event files (one JSON object per line, see sk8.EventLog) and aggregates per-skater stats: set and
+# match success by difficulty, letters, reshuffles, card usage and win rates. Files are read line by line, so memory
+# stays flat however large the archive, and many files are spread across a process pool. A LogTail reads a log together
+# with its rotated backups and remembers how far it has read each file, so a growing log (or a --state file across
+# runs) only ever parses the new lines.
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+UNKNOWN_SKATER = '?'  # Events from a game whose start is in an older, rotated file.
+EVENT_KEY = b'"event": "'
+TRACKED_EVENTS = frozenset({'game_start', 'game_resumed', 'deck', 'game_over', 'turn_start', 'combo_attempt', 'set_result', 'pass', 'match_target',
+                            'match_result', 'letter', 'last_chance', 'advantage', 'reshuffle', 'special', 'ability'})
+
+class SkaterStats:
+    """Totals for one skater. Outcome tables map a difficulty to [attempts, landed]."""
+    def __init__(self):
+        self.games, self.wins, self.losses, self.setter_turns, self.passes = 0, 0, 0, 0, 0
+        self.sets, self.matches = {}, {}
+        self.letters, self.reshuffles, self.penalties, self.advantages, self.last_chances = 0, 0, 0, 0, 0
+        self.cards, self.specials, self.abilities = Counter(), Counter(), Counter()
+
+    def merge(self, other):
+        for name in ('games', 'wins', 'losses', 'setter_turns', 'passes', 'letters', 'reshuffles', 'penalties', 'advantages', 'last_chances'):
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for mine, theirs in ((self.sets, other.sets), (self.matches, other.matches)):
+            for difficulty, (attempts, landed) in theirs.items():
+                row = mine.setdefault(difficulty, [0, 0]); row[0] += attempts; row[1] += landed
+        self.cards.update(other.cards); self.specials.update(other.specials); self.abilities.update(other.abilities)
+
+    def to_dict(self):
+        return {**{k: v for k, v in vars(self).items() if not isinstance(v, dict)},
+                'sets': {str(d): row for d, row in sorted(self.sets.items())}, 'matches': {str(d): row for d, row in sorted(self.matches.items())},
+                'cards': dict(self.cards), 'specials': dict(self.specials), 'abilities': dict(self.abilities)}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        for name, value in data.items():
+            if name in ('sets', 'matches'): value = {int(d): row for d, row in value.items()}
+            elif name in ('cards', 'specials', 'abilities'): value = Counter(value)
+            setattr(stats, name, value)
+        return stats
+
+    def rate(self, table, min_difficulty=None, max_difficulty=None):
+        """(attempts, landed) over the difficulties in range, from self.sets or self.matches."""
+        rows = [row for d, row in table.items() if (min_difficulty is None or d >= min_difficulty) and (max_difficulty is None or d <= max_difficulty)]
+        return sum(r[0] for r in rows), sum(r[1] for r in rows)
+
+class LogStats:
+    """Per-skater stats built from a stream of event records, in log order.
+
+    Events name players, not skaters, so each game's 'deck' events map its player names to skaters until the next
+    game_start, and a 'game_resumed' event brings a resumed game's mapping back. That mapping is part of the state, so records can be fed in any number of batches."""
+    def __init__(self):
+        self.skaters, self.players = {}, {}
+        self.records, self.bad_lines = 0, 0
+
+    def skater(self, player):
+        name = self.players.get(player, UNKNOWN_SKATER)
+        stats = self.skaters.get(name)
+        if stats is None: stats = self.skaters[name] = SkaterStats()
+        return stats
+
+    def feed_line(self, raw):
+        """Feeds one raw log line. Lines for events nobody aggregates are skipped before they are parsed."""
+        start = raw.find(EVENT_KEY)
+        if start < 0: self.bad_lines += 1; return
+        start += len(EVENT_KEY)
+        if raw[start:raw.find(b'"', start)].decode('ascii', 'replace') not in TRACKED_EVENTS: return
+        try: record = json.loads(raw)
+        except ValueError: self.bad_lines += 1; return
+        self.feed(record)
+
+    def feed(self, record):
+        self.records += 1
+        event, player = record.get('event'), record.get('player')
+        if event == 'game_start': self.players = {}
+        elif event == 'game_resumed': self.players = dict(record['skaters'])  # Already counted when it started.
+        elif event == 'deck': self.players[player] = record['skater']; self.skater(player).games += 1
+        elif event == 'game_over': self.skater(record['winner']).wins += 1; self.skater(record['loser']).losses += 1
+        elif event == 'turn_start':
+            if record.get('role') == 'setter': self.skater(player).setter_turns += 1
+        elif event == 'combo_attempt': self.skater(player).cards.update(c for c in record.get('combo') or () if c != 'ollie')
+        elif event in ('set_result', 'match_result'):
+            stats = self.skater(player)
+            row = (stats.sets if event == 'set_result' else stats.matches).setdefault(record['difficulty'], [0, 0])
+            row[0] += 1; row[1] += bool(record['landed'])
+        elif event == 'pass': self.skater(player).passes += 1
+        elif event == 'match_target':
+            if record.get('penalty'): self.skater(player).penalties += 1
+        elif event == 'letter': self.skater(player).letters += 1
+        elif event == 'reshuffle': self.skater(player).reshuffles += 1
+        elif event == 'advantage': self.skater(player).advantages += 1
+        elif event == 'last_chance': self.skater(player).last_chances += 1
+        elif event == 'special': self.skater(player).specials[record['card']] += 1
+        elif event == 'ability': self.skater(player).abilities[record['kind']] += 1
+
+    def merge(self, other):
+        """Adds another stream's totals (e.g. another file). The game in progress stays this stream's."""
+        for name, stats in other.skaters.items(): self.skaters.setdefault(name, SkaterStats()).merge(stats)
+        self.records += other.records; self.bad_lines += other.bad_lines
+
+    def to_dict(self):
+        return {'skaters': {name: s.to_dict() for name, s in self.skaters.items()}, 'players': self.players,
+                'records': self.records, 'bad_lines': self.bad_lines}
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls()
+        stats.skaters = {name: SkaterStats.from_dict(s) for name, s in data['skaters'].items()}
+        stats.players, stats.records, stats.bad_lines = dict(data['players']), data['records'], data['bad_lines']
+        return stats
+
+def file_id(path):
+    """A file's identity across renames, "device:inode", or None if it doesn't exist."""
+    try: st = os.stat(path)
+    except FileNotFoundError: return None
+    return f"{st.st_dev}:{st.st_ino}"
+
+HEAD_BYTES = 64  # Enough of a log's first line (its timestamp) to tell a reused inode from the file that had it.
+
+class LogTail:
+    """Reads the complete lines added to one log and its rotated backups (path.1, path.2, ...) since the last poll.
+
+    Progress is kept per file by inode, so rotation (sk8.log becoming sk8.log.1) never reads a line twice or drops
+    one: the backups are read oldest first, each from where it was left, then the live log. A line still being
+    written is left for the next poll."""
+    def __init__(self, path):
+        self.path, self.files, self.stats = Path(path), {}, LogStats()  # files: file_id -> [offset, head]
+
+    def members(self):
+        """The log's backups, oldest first, then the log itself."""
+        backups = [p for p in self.path.parent.glob(glob.escape(self.path.name) + '.*') if p.suffix[1:].isdigit()]
+        return sorted(backups, key=lambda p: -int(p.suffix[1:])) + [self.path]
+
+    def _read(self, path, offset, head):
+        """Feeds the complete lines after `offset`; returns (where it started, where it stopped, the file's head). A
+        file that is shorter than `offset` or no longer starts with `head` (a new file on a reused inode) is read from the top."""
+        with open(path, 'rb') as f:
+            current = f.read(HEAD_BYTES).decode('latin-1')
+            if f.seek(0, os.SEEK_END) < offset or not current.startswith(head): offset = 0
+            start = offset
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b'\n'): break
+                offset += len(raw); self.stats.feed_line(raw)
+        return start, offset, current
+
+    def poll(self):
+        """Feeds the new lines into self.stats; returns how many bytes were read."""
+        read, files = 0, {}
+        for path in self.members():
+            ident = file_id(path)
+            if ident is None: continue
+            offset, head = self.files.get(ident, (0, ''))
+            try: start, end, head = self._read(path, offset, head)
+            except FileNotFoundError: continue  # Rotated away mid-poll: it's read under its new name next time.
+            read += end - start; files[ident] = [end, head]
+        self.files = files  # Backups that rotated out for good are forgotten.
+        return read
+
+    def to_dict(self): return {'path': str(self.path), 'files': self.files, 'stats': self.stats.to_dict()}
+
+    @classmethod
+    def from_dict(cls, data):
+        tail = cls(data['path'])
+        tail.files, tail.stats = dict(data['files']), LogStats.from_dict(data['stats'])
+        return tail
+
+def distinct_logs(paths):
+    """`paths` without repeats: a file named twice, or a rotated backup (sk8.log.1) of another log given, which that
+    log's LogTail already reads."""
+    idents = [file_id(path) for path in paths]
+    families = [{file_id(member) for member in LogTail(path).members()[:-1]} for path in paths]
+    kept, seen = [], set()
+    for path, ident in zip(paths, idents):
+        if ident is not None and (ident in seen or any(ident in family for family in families)): continue
+        seen.add(ident); kept.append(path)
+    return kept
+
+def poll_tail(tail):
+    """Worker entry point: polls one LogTail and sends it back with its updated offsets and stats."""
+    tail.poll()
+    return tail
+
+def poll_all(tails, workers=None):
+    """Polls every tail, across a process pool when there is more than one file. Returns the updated tails."""
+    workers = min(len(tails), workers or os.cpu_count() or 1)
+    if workers <= 1: return [poll_tail(tail) for tail in tails]
+    with ProcessPoolExecutor(max_workers=workers) as pool: return list(pool.map(poll_tail, tails))
+
+def combined(tails):
+    stats = LogStats()
+    for tail in tails: stats.merge(tail.stats)
+    return stats
+
+def _pct(landed, attempts): return f"{landed / attempts:6.1%}" if attempts else "     -"
+
+def format_report(stats, skaters=None, top_cards=8):
+    lines = [f"{stats.records:,} records ({stats.bad_lines:,} unreadable lines)"]
+    for name in sorted(stats.skaters):
+        if skaters and name not in skaters: continue
+        s = stats.skaters[name]
+        set_attempts, set_landed = s.rate(s.sets); match_attempts, match_landed = s.rate(s.matches)
+        games = max(1, s.games)
+        lines.append(f"\n--- {name}: {s.games} games, {s.wins} won, {s.losses} lost ---")
+        lines.append(f"sets {set_attempts} ({_pct(set_landed, set_attempts).strip()} landed), matches {match_attempts} "
+                     f"({_pct(match_landed, match_attempts).strip()} landed), passes {s.passes}")
+        lines.append(f"per game: letters {s.letters / games:.2f}, reshuffles {s.reshuffles / games:.2f}, setter turns {s.setter_turns / games:.1f}; "
+                     f"defender penalties {s.penalties}, advantage rolls {s.advantages}, last chances {s.last_chances}")
+        lines.append(f"{'difficulty':>10}{'sets':>8}{'landed':>8}{'matches':>9}{'landed':>8}")
+        for d in sorted(set(s.sets) | set(s.matches)):
+            (sa, sl), (ma, ml) = s.sets.get(d, (0, 0)), s.matches.get(d, (0, 0))
+            lines.append(f"{d:>10}{sa:>8}{_pct(sl, sa):>8}{ma:>9}{_pct(ml, ma):>8}")
+        if s.cards: lines.append("cards set: " + ", ".join(f"{c} {n}" for c, n in s.cards.most_common(top_cards)))
+        if s.specials: lines.append("specials: " + ", ".join(f"{c} {n}" for c, n in s.specials.most_common()))
+        if s.abilities: lines.append("abilities: " + ", ".join(f"{c} {n}" for c, n in s.abilities.most_common()))
+    return "\n".join(lines)
+
+def to_json(stats):
+    return {name: s.to_dict() for name, s in stats.skaters.items()}
+
+def load_state(path):
+    """The tails saved by save_state, by resolved log path."""
+    return {key: LogTail.from_dict(data) for key, data in json.loads(path.read_text()).items()} if path.exists() else {}
+
+def save_state(path, tails):
+    temporary = path.with_name(path.name + '.tmp')
+    temporary.write_text(json.dumps({str(t.path): t.to_dict() for t in tails}))
+    temporary.replace(path)  # A run killed mid-write leaves the previous state intact.
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate per-skater stats from sk8.log event files.")
+    parser.add_argument('paths', nargs='+', type=Path, help="Log files, e.g. sk8.log archive/*.log. A log's rotated backups "
+                                                            "(sk8.log.1, ...) are read with it.")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--skater', action='append', help="Only report these skaters.")
+    parser.add_argument('--state', type=Path, help="Keep read offsets and totals in this JSON file, so the next run only reads new lines.")
+    parser.add_argument('--follow', type=float, nargs='?', const=5.0, metavar='SECONDS', help="Keep reading new lines, reporting every SECONDS.")
+    parser.add_argument('--json', action='store_true', help="Print the totals as JSON.")
+    args = parser.parse_args()
+    try: saved = load_state(args.state) if args.state else {}
+    except (ValueError, KeyError): parser.error(f"{args.state} is not a sk8_stats state file")
+    tails = [saved.get(str(path.resolve())) or LogTail(path.resolve()) for path in distinct_logs(args.paths)]
+    while True:
+        tails = poll_all(tails, args.workers)
+        if args.state: save_state(args.state, tails)
+        stats = combined(tails)
+        print(json.dumps(to_json(stats), indent=2) if args.json else format_report(stats, args.skater))
+        if args.follow is None: break
+        sys.stdout.flush(); time.sleep(args.follow)
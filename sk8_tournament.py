@@ -0,0 +1,149 @@
+# SK8 - Tournament runner
+# Spreads seeded headless games for every skater pairing across a process pool and builds a win-rate matrix.
+
+import argparse
+import math
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+import sk8
+
+SEEDS_PER_PAIRING = 10**9  # Seed space reserved per pairing so pairings never share games.
+
+def wilson_interval(successes, trials, z=1.96):
+    """Wilson score interval for a binomial proportion, as (low, high)."""
+    if trials == 0: return 0.0, 1.0
+    p = successes / trials
+    denom = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denom
+    half = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denom
+    return max(0.0, centre - half), min(1.0, centre + half)
+
+class MatchupStats:
+    """Running totals for one seat-ordered pairing. Partial results from workers are merged in."""
+    def __init__(self, skaters):
+        self.skaters = skaters
+        self.games, self.unfinished, self.seat_wins, self.total_turns = 0, 0, [0, 0], 0
+        self.winner_letters = Counter()
+
+    def add_result(self, result):
+        self.games += 1; self.total_turns += result['turns']
+        if result['winner'] is None: self.unfinished += 1; return
+        self.seat_wins[result['winner']] += 1
+        self.winner_letters[len(result['letters'][result['winner']])] += 1
+
+    def merge(self, other):
+        self.games += other.games; self.unfinished += other.unfinished; self.total_turns += other.total_turns
+        self.seat_wins = [a + b for a, b in zip(self.seat_wins, other.seat_wins)]
+        self.winner_letters.update(other.winner_letters)
+
+    @property
+    def finished(self): return self.games - self.unfinished
+
+    @property
+    def win_rate(self):
+        """Seat 0's win rate over finished games."""
+        return self.seat_wins[0] / self.finished if self.finished else 0.0
+
+    @property
+    def interval(self): return wilson_interval(self.seat_wins[0], self.finished)
+
+    @property
+    def avg_turns(self): return self.total_turns / self.games if self.games else 0.0
+
+def play_chunk(skater_names, first_seed, n_games, max_turns=500):
+    """Worker entry point: plays n_games seeded games for one pairing and returns their MatchupStats."""
+    sk8.load_combo_index()  # Mapped once per worker; every worker shares the same pages.
+    sk8.load_tuned_decks()
+    by_name = {s.name: s for s in sk8.SKATERS}
+    skaters = tuple(by_name[name] for name in skater_names)
+    stats = MatchupStats(skater_names)
+    for seed in range(first_seed, first_seed + n_games):
+        stats.add_result(sk8.play_headless_game(seed, skaters, max_turns))
+    return stats
+
+def all_pairings(skaters=None):
+    """Every ordered pair of distinct skaters, so each matchup is played from both seats."""
+    names = [s.name for s in (skaters or sk8.SKATERS)]
+    return [(a, b) for a in names for b in names if a != b]
+
+def run_tournament(max_games=100000, min_games=2000, ci_half_width=0.01, chunk_size=500, workers=None, seed=0, on_progress=None):
+    """Plays every pairing until its seat-0 win-rate interval is within ci_half_width or max_games is reached.
+
+    Chunks are submitted round-robin to a process pool and merged as they finish, so early-stopped pairings
+    free their workers for the rest. Returns {(skater_a, skater_b): MatchupStats}."""
+    workers = workers or os.cpu_count() or 1
+    pairings = all_pairings()
+    results = {p: MatchupStats(p) for p in pairings}
+    next_seed = {p: seed + i * SEEDS_PER_PAIRING for i, p in enumerate(pairings)}
+    submitted = Counter()
+
+    def needs_more(pairing):
+        stats = results[pairing]
+        if submitted[pairing] >= max_games: return False
+        if stats.finished < min_games: return True
+        low, high = stats.interval
+        return (high - low) / 2 > ci_half_width
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = {}
+        def top_up():
+            active = [p for p in pairings if needs_more(p)]
+            while active and len(in_flight) < workers * 2:
+                for pairing in list(active):
+                    if len(in_flight) >= workers * 2: break
+                    n = min(chunk_size, max_games - submitted[pairing])
+                    if n <= 0: active.remove(pairing); continue
+                    future = pool.submit(play_chunk, pairing, next_seed[pairing], n)
+                    in_flight[future] = pairing
+                    next_seed[pairing] += n; submitted[pairing] += n
+                active = [p for p in active if needs_more(p)]
+        top_up()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                pairing = in_flight.pop(future)
+                results[pairing].merge(future.result())
+                if on_progress: on_progress(pairing, results[pairing])
+            top_up()
+    return results
+
+def matchup_matrix(results):
+    """Collapses seat orders into {(a, b): (a's win rate vs b, games)} across both seats."""
+    matrix = {}
+    for (a, b), stats in results.items():
+        reverse = results.get((b, a))
+        wins = stats.seat_wins[0] + (reverse.seat_wins[1] if reverse else 0)
+        games = stats.finished + (reverse.finished if reverse else 0)
+        matrix[(a, b)] = (wins / games if games else 0.0, games)
+    return matrix
+
+def format_report(results):
+    names = [s.name for s in sk8.SKATERS]
+    lines = ["--- Seat-ordered pairings (seat 0 vs seat 1) ---"]
+    for (a, b), stats in results.items():
+        low, high = stats.interval
+        letters = ', '.join(f"{n}:{stats.winner_letters[n] / stats.finished:.1%}" for n in sorted(stats.winner_letters)) if stats.finished else '-'
+        lines.append(f"{a:>16} vs {b:<16} games {stats.games:>8}  win {stats.win_rate:6.1%} [{low:.1%}, {high:.1%}]  "
+                     f"avg turns {stats.avg_turns:5.1f}  winner letters {letters}")
+    lines.append("\n--- Win-rate matrix (row vs column, both seats) ---")
+    lines.append(" " * 17 + "".join(f"{n:>18}" for n in names))
+    matrix = matchup_matrix(results)
+    for a in names:
+        cells = "".join(f"{'-':>18}" if a == b else f"{matrix[(a, b)][0]:>18.1%}" for b in names)
+        lines.append(f"{a:>16} {cells}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run a seeded SK8 skater tournament across a process pool.")
+    parser.add_argument('--max-games', type=int, default=100000, help="Game cap per seat-ordered pairing.")
+    parser.add_argument('--min-games', type=int, default=2000, help="Games per pairing before early stopping is allowed.")
+    parser.add_argument('--ci', type=float, default=0.01, help="Stop a pairing once its 95%% interval half-width is below this.")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    results = run_tournament(args.max_games, args.min_games, args.ci, args.chunk_size, args.workers, args.seed,
+                             on_progress=lambda p, s: print(f"\r{p[0]} vs {p[1]}: {s.games} games", end="", flush=True))
+    print("\n" + format_report(results))
@@ -0,0 +1,143 @@
+# SK8 - What-if analyzer
+# Measures what a rule change does to balance. Every seed is played under the baseline rules and again under each
+# variant (see sk8.rule_variant) with common random numbers: a SkateGame gives each seat its own streams for deck
+# shuffles, set rolls and match rolls, so both runs deal a seat the same cards and the same luck on its n-th set or
+# match even after their choices differ. Results are the per-seed differences, whose spread is smaller than that of
+# two independent samples, so an effect shows up in fewer games. The gain shrinks as a variant changes more of how
+# games go. A sweep shares one baseline run per seed.
+
+import argparse
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import sk8
+from sk8_tournament import SEEDS_PER_PAIRING, all_pairings
+
+RULE_KEYS = {'base': 'base_difficulties', 'stances': 'stances'}  # Prefixes of the per-card knobs.
+
+def parse_variant(text):
+    """A variant spec such as "defender_penalty=3,stances.nollie=4,base.kickflip=4,flip_discount=0,Flip Pro.passive=-2"
+    as keyword arguments for sk8.set_rules. Raises ValueError for a malformed assignment."""
+    changes = {}
+    for assignment in filter(None, (part.strip() for part in text.split(','))):
+        key, sep, value = assignment.partition('=')
+        if not sep: raise ValueError(f"Expected key=value, got {assignment!r}")
+        key, value = key.strip(), int(value)
+        if key in ('flip_discount', 'defender_penalty'): changes[key] = value; continue
+        target, _, knob = key.rpartition('.')
+        if target in RULE_KEYS: changes.setdefault(RULE_KEYS[target], {})[knob] = value
+        elif target and knob in ('passive', 'negative'): changes.setdefault('abilities', {}).setdefault(target, {})[knob] = value
+        else: raise ValueError(f"Unknown rule {key!r}")
+    return changes
+
+class PairedStat:
+    """Running sums for one paired measurement: baseline and variant values and their per-seed difference."""
+    def __init__(self):
+        self.n, self.sums, self.squares = 0, [0.0, 0.0, 0.0], [0.0, 0.0, 0.0]
+
+    def add(self, baseline, variant):
+        self.n += 1
+        for i, x in enumerate((baseline, variant, variant - baseline)): self.sums[i] += x; self.squares[i] += x * x
+
+    def merge(self, other):
+        self.n += other.n
+        self.sums = [a + b for a, b in zip(self.sums, other.sums)]; self.squares = [a + b for a, b in zip(self.squares, other.squares)]
+
+    def mean(self, i): return self.sums[i] / self.n if self.n else 0.0
+
+    def variance(self, i):
+        if self.n < 2: return 0.0
+        return max(0.0, (self.squares[i] - self.sums[i] ** 2 / self.n) / (self.n - 1))
+
+    @property
+    def baseline(self): return self.mean(0)
+
+    @property
+    def variant(self): return self.mean(1)
+
+    @property
+    def change(self): return self.mean(2)
+
+    def half_width(self, z=1.96):
+        """Confidence half-width of the change from the paired differences."""
+        return z * math.sqrt(self.variance(2) / self.n) if self.n else math.inf
+
+    def independent_half_width(self, z=1.96):
+        """The half-width two independent samples of the same size would give, for comparison."""
+        return z * math.sqrt((self.variance(0) + self.variance(1)) / self.n) if self.n else math.inf
+
+class VariantStats:
+    """Paired results for one variant: game length and each skater's win rate. Seeds that either run left unfinished
+    are skipped, so both sides always cover the same games."""
+    def __init__(self, label):
+        self.label, self.games, self.unfinished = label, 0, 0
+        self.turns, self.wins = PairedStat(), {}
+
+    def add(self, baseline, variant):
+        if baseline['winner'] is None or variant['winner'] is None: self.unfinished += 1; return
+        self.games += 1; self.turns.add(baseline['turns'], variant['turns'])
+        for seat, name in enumerate(baseline['skaters']):
+            self.wins.setdefault(name, PairedStat()).add(baseline['winner'] == seat, variant['winner'] == seat)
+
+    def merge(self, other):
+        self.games += other.games; self.unfinished += other.unfinished; self.turns.merge(other.turns)
+        for name, stat in other.wins.items(): self.wins.setdefault(name, PairedStat()).merge(stat)
+
+def play_paired_chunk(variants, skater_names, first_seed, n_games, max_turns=500):
+    """Worker entry point: plays n_games seeds of one pairing under the baseline rules, then again under each of
+    `variants` ((label, set_rules changes) pairs). Returns a VariantStats per variant."""
+    sk8.load_combo_index(); sk8.load_tuned_decks()
+    sk8.AI_SEARCH_TIME_BUDGET = None  # Unbounded searches, so a seed plays out the same however loaded the machine is.
+    by_name = {s.name: s for s in sk8.SKATERS}
+    skaters = tuple(by_name[name] for name in skater_names)
+    seeds = range(first_seed, first_seed + n_games)
+    baseline = [sk8.play_headless_game(seed, skaters, max_turns) for seed in seeds]
+    results = []
+    for label, changes in variants:
+        stats = VariantStats(label)
+        with sk8.rule_variant(**changes):
+            for seed, base in zip(seeds, baseline): stats.add(base, sk8.play_headless_game(seed, skaters, max_turns))
+        results.append(stats)
+    return results
+
+def run_whatif(variants, games=500, chunk_size=100, workers=None, seed=0, max_turns=500):
+    """Plays `games` seeds per ordered skater pairing under the baseline and every variant, spread across a process
+    pool. `variants` maps a label to set_rules changes. Returns {label: VariantStats}."""
+    variants = list(variants.items())
+    for _, changes in variants:  # Fail here rather than in every worker.
+        with sk8.rule_variant(**changes): pass
+    results = {label: VariantStats(label) for label, _ in variants}
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        futures = [pool.submit(play_paired_chunk, variants, pairing, seed + i * SEEDS_PER_PAIRING + start, min(chunk_size, games - start), max_turns)
+                   for i, pairing in enumerate(all_pairings()) for start in range(0, games, chunk_size)]
+        for future in as_completed(futures):
+            for stats in future.result(): results[stats.label].merge(stats)
+    return results
+
+def format_report(stats):
+    lines = [f"--- {stats.label}: {stats.games} paired games ({stats.unfinished} skipped as unfinished) ---",
+             f"{'':<24}{'baseline':>9}{'variant':>9}{'change':>9}{'paired 95%':>12}{'independent':>13}"]
+    t = stats.turns
+    lines.append(f"{'game length (turns)':<24}{t.baseline:>9.1f}{t.variant:>9.1f}{t.change:>+9.2f}{'±' + format(t.half_width(), '.2f'):>12}{'±' + format(t.independent_half_width(), '.2f'):>13}")
+    for name in sorted(stats.wins):
+        w = stats.wins[name]
+        lines.append(f"{name + ' win rate':<24}{w.baseline:>9.1%}{w.variant:>9.1%}{w.change:>+9.1%}{'±' + format(w.half_width(), '.1%'):>12}{'±' + format(w.independent_half_width(), '.1%'):>13}")
+    return "\n".join(lines)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare rule variants against the baseline rules on common random numbers.")
+    parser.add_argument('variants', nargs='+', metavar='VARIANT',
+                        help='Comma-separated rule changes, e.g. "defender_penalty=3" "stances.nollie=4,base.kickflip=4" '
+                             '"flip_discount=0" "Flip Pro.passive=-2,Flip Pro.negative=2".')
+    parser.add_argument('--games', type=int, default=500, help="Seeds per ordered skater pairing.")
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-turns', type=int, default=500)
+    args = parser.parse_args()
+    try: variants = {text: parse_variant(text) for text in args.variants}
+    except ValueError as e: parser.error(str(e))
+    try: results = run_whatif(variants, args.games, args.chunk_size, args.workers, args.seed, args.max_turns)
+    except ValueError as e: parser.error(str(e))
+    print("\n\n".join(format_report(results[label]) for label in variants))
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# The game is a set of top-level scripts rather than a package, so make them importable from here.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,84 @@
+"""The rule functions as they were before cards became ids and bitmasks, kept verbatim (bar `self`) as the oracle the
+id-based versions are tested against."""
+from collections import Counter
+
+from sk8 import (CORE_TRICKS, FLIP_TRICKS, GRIND_SURFACES, GRINDS_SLIDES, OBSTACLES, SHUVIT_TRICKS, STAIRS, STANCES,
+                 TRICKS_DATABASE, get_combo_display_name_single)
+
+
+def calculate_combo_difficulty(combo, skater, ignore_negative_ability=False):
+    total_difficulty, explanation = 0, []
+    combo_worklist = list(combo)
+
+    late_bonus = 0
+    late_trick_type = ""
+    # Check for stanced and regular late tricks
+    if len(combo_worklist) >= 3 and combo_worklist[0] in STANCES and combo_worklist[1] == 'ollie' and (combo_worklist[2] in FLIP_TRICKS or combo_worklist[2] in SHUVIT_TRICKS):
+        trick = combo_worklist[2]
+        late_bonus = TRICKS_DATABASE.get(trick, 0)
+        late_trick_type = "Flip" if trick in FLIP_TRICKS else "Shuvit"
+    elif len(combo_worklist) >= 2 and combo_worklist[0] == 'ollie' and (combo_worklist[1] in FLIP_TRICKS or combo_worklist[1] in SHUVIT_TRICKS):
+        trick = combo_worklist[1]
+        late_bonus = TRICKS_DATABASE.get(trick, 0)
+        late_trick_type = "Flip" if trick in FLIP_TRICKS else "Shuvit"
+
+    if late_bonus > 0:
+        total_difficulty += late_bonus
+        explanation.append(f"  - Late {late_trick_type} Bonus (x2 {trick.replace('_',' ').title()}): +{late_bonus}")
+
+    card_counts = Counter(combo_worklist)
+    stance = next((c for c in combo_worklist if c in STANCES), None)
+
+    if stance:
+        total_difficulty += STANCES[stance]
+        explanation.append(f"  - {stance.title()} Stance: +{STANCES[stance]}")
+
+    if any(c in GRINDS_SLIDES for c in combo_worklist) and not any(c in GRIND_SURFACES for c in combo_worklist):
+        total_difficulty += 2; explanation.append("  - Flatground Grind (Low Ledge): +2")
+
+    for card, count in card_counts.items():
+        if card not in TRICKS_DATABASE: continue
+        base_difficulty, current_mods, mod_explanation = TRICKS_DATABASE[card], 0, []
+        if (card in STAIRS or card in FLIP_TRICKS) and count > 1:
+            bonus = sum(range(2, count + 1)); current_mods += bonus; mod_explanation.append(f"Duplicate: +{bonus}")
+        passive = skater.passive_ability
+        if passive['type'] == 'difficulty_modifier' and card in passive['category']:
+            current_mods += passive['amount']; mod_explanation.append(f"Passive: {passive['amount']}")
+        if not ignore_negative_ability:
+            neg = skater.negative_ability
+            if neg['type'] == 'difficulty_modifier' and card in neg['category']:
+                current_mods += neg['amount']; mod_explanation.append(f"Negative: +{neg['amount']}")
+        total_difficulty += (base_difficulty * count) + current_mods
+        explanation.append(f"  - {get_combo_display_name_single(card, count)}: {base_difficulty}{' x' + str(count) if count > 1 else ''}{' (' + ', '.join(mod_explanation) + ')' if mod_explanation else ''}")
+
+    if 'wax' in combo: total_difficulty -= 2; explanation.append("  - Wax Card: -2")
+    return max(1, total_difficulty), explanation
+
+
+def validate_combo(combo):
+    if not any(c in TRICKS_DATABASE or c in STANCES for c in combo):
+        return False, "You must select at least one trick card."
+
+    if any(c in OBSTACLES for c in combo):
+        if not any(c in CORE_TRICKS for c in combo):
+            return False, "You must perform a trick (like an Ollie, Flip, etc.) to use an Obstacle."
+
+    stance_cards = [c for c in combo if c in STANCES]
+    if len(stance_cards) > 1: return False, "Cannot use more than one Stance."
+    if stance_cards and combo.index(stance_cards[0]) != 0: return False, "A Stance card must be played first."
+    if stance_cards and len(combo) == 1: return False, "A stance card must modify a trick."
+    if stance_cards and len(combo) > 1 and combo[1] not in CORE_TRICKS:
+        return False, "A Stance must be followed by a valid trick card."
+
+    if len(set(c for c in combo if c in STAIRS)) > 1: return False, "Cannot combine different stair sets."
+    if sum(1 for c in combo if c in GRIND_SURFACES) > 1: return False, "Cannot use more than one grind surface."
+    if 'kicker_ramp' in combo and any(c in STAIRS for c in combo): return False, "Cannot combine a kicker with stairs."
+    if len(set(c for c in combo if c in GRINDS_SLIDES)) > 1: return False, "Can't do more than one type of grind."
+    if 'wax' in combo and not any(c in GRINDS_SLIDES for c in combo): return False, "'Wax' only works with grinds or slides."
+    if len(set(c for c in combo if c in SHUVIT_TRICKS)) > 1: return False, "Cannot combine more than one type of Shuvit."
+    if any(c in FLIP_TRICKS for c in combo) and any(c in SHUVIT_TRICKS for c in combo):
+        # This allows late flips and late shuvits (which contain an ollie), but not a flip card and shuvit card together
+        if 'ollie' not in combo:
+            return False, "Cannot combine a Flip and a Shuvit card. Use Varial Flips instead."
+
+    return True, "Valid combo!"
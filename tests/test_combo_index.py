@@ -0,0 +1,55 @@
+"""The on-disk combo index against ComboSearch. Uses the built sk8_combos.idx if it is current, else builds one
+(about 20 seconds)."""
+import random
+
+import pytest
+
+import sk8
+
+
+@pytest.fixture(scope='module')
+def index(tmp_path_factory):
+    index = sk8.ComboIndex(sk8.COMBO_INDEX_FILE) if sk8.COMBO_INDEX_FILE.exists() else None
+    if index is None or index.stale:
+        if index is not None: index.close()
+        index = sk8.ComboIndex(sk8.build_combo_index(tmp_path_factory.mktemp('index') / 'sk8_combos.idx'))
+    yield index
+    index.close()
+
+
+def random_hand(rng):
+    return rng.sample(sk8.CARD_NAMES, 8) + rng.sample(sk8.CARD_NAMES, 2)
+
+
+def test_index_lists_what_the_search_finds(index):
+    rng = random.Random(1)
+    for _ in range(400):
+        hand, skater, ignore = random_hand(rng), rng.choice(sk8.SKATERS), rng.random() < 0.3
+        search = sk8.ComboSearch(hand, sk8.AI_MAX_COMBO_LENGTH)
+        assert index.all(hand, skater, as_set=True) == search.sets(skater)
+        assert index.all(hand, skater, ignore) == [(c, sk8.combo_difficulty_ids(c, skater, ignore)) for c in search.all()]
+
+
+def test_max_len_and_card_piles(index):
+    rng = random.Random(2)
+    for _ in range(200):
+        hand, skater = random_hand(rng), rng.choice(sk8.SKATERS)
+        assert index.all(hand, skater, max_len=3, as_set=True) == sk8.ComboSearch(hand, 3).sets(skater)
+        assert index.all(sk8.CardPile(hand), skater) == index.all(hand, skater)
+
+
+def test_games_play_the_same_with_and_without_the_index(index, monkeypatch):
+    records = []
+    for seed in range(8):
+        game = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed); game.run(max_turns=300); records.append(game.record())
+    monkeypatch.setattr(sk8, 'COMBO_INDEX', index)
+    for seed, record in enumerate(records):
+        game = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed); game.run(max_turns=300)
+        assert game.record() == record
+
+
+def test_a_rule_change_makes_the_index_stale(index):
+    assert not index.stale
+    with sk8.rule_variant(defender_penalty=sk8.DEFENDER_PENALTY, base_difficulties={'kickflip': sk8.BASE_DIFFICULTIES['kickflip'] + 1}):
+        assert index.stale and sk8.load_combo_index(index.path) is None
+    assert not index.stale
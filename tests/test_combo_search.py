@@ -0,0 +1,63 @@
+"""ComboSearch against brute force over every ordering of every sub-multiset of a hand."""
+import itertools
+import random
+
+import sk8
+
+COMBO_NAMES = [sk8.CARD_NAMES[c] for c in sorted(sk8.COMBO_CARD_IDS)]
+
+
+def random_hand(rng, size=7):
+    """Mostly combo cards, some repeated, plus the odd card that never goes into a combo."""
+    pool = COMBO_NAMES + ['focus', 'bail', 'sponsors']
+    hand = [rng.choice(pool) for _ in range(size - 2)]
+    return hand + [rng.choice(hand), 'ollie']
+
+
+def brute_force(hand, max_len):
+    """{sorted multiset: {ordering: set difficulty per skater}} over every valid ordering of the hand's combo cards."""
+    ids = [c for c in sk8.card_ids(hand) if c in sk8.COMBO_CARD_IDS]
+    found = {}
+    for size in range(1, max_len + 1):
+        for combo in set(itertools.permutations(ids, size)):
+            if sk8.validate_combo_ids(combo)[0]:
+                found.setdefault(tuple(sorted(combo)), set()).add(tuple(sk8.set_difficulty_ids(combo, s) for s in sk8.SKATERS))
+    return found
+
+
+def test_search_finds_every_multiset_and_difficulty():
+    rng = random.Random(11)
+    for _ in range(60):
+        hand, max_len = random_hand(rng), rng.choice((3, 4))
+        expected = brute_force(hand, max_len)
+        found = {}
+        for combo in sk8.ComboSearch(hand, max_len).all():
+            assert sk8.validate_combo_ids(combo)[0] and len(combo) <= max_len
+            found.setdefault(tuple(sorted(combo)), set()).add(tuple(sk8.set_difficulty_ids(combo, s) for s in sk8.SKATERS))
+        assert found == expected, hand
+
+
+def test_best_matches_the_brute_force_best():
+    rng = random.Random(12)
+    for _ in range(60):
+        hand, skater = random_hand(rng), rng.choice(sk8.SKATERS)
+        def score(combo): return sk8.set_difficulty_ids(combo, skater) - len(combo)
+        combo, value = sk8.ComboSearch(hand, 4).best(score)
+        best = max((max(d[sk8.SKATERS.index(skater)] for d in ds) - len(m) for m, ds in brute_force(hand, 4).items()), default=None)
+        assert value == best and (combo == () or score(combo) == value)
+
+
+def test_sets_pairs_each_combo_with_its_set_difficulty():
+    rng = random.Random(13)
+    for _ in range(30):
+        hand, skater = random_hand(rng), rng.choice(sk8.SKATERS)
+        search = sk8.ComboSearch(hand, 4)
+        sets = search.sets(skater)
+        assert [combo for combo, _ in sets] == search.all()
+        assert all(difficulty == sk8.set_difficulty_ids(combo, skater) for combo, difficulty in sets)
+
+
+def test_node_limit_stops_the_search():
+    search = sk8.ComboSearch(COMBO_NAMES[:12], 4, max_nodes=10)
+    search.all()
+    assert search.timed_out and search.nodes == 10
@@ -0,0 +1,42 @@
+"""DeckTuner's breeding and the interval that decides whether a tuned deck is saved."""
+import math
+import random
+
+import pytest
+
+import sk8
+import sk8_decks
+
+
+def tuner(population=16):
+    return sk8_decks.DeckTuner(sk8.SKATERS[0], pool=None, population=population, seed=1)
+
+
+def test_difference_half_width_uses_each_sample_size():
+    assert sk8_decks.difference_half_width(0.6, 400, 0.5, 400) == pytest.approx(1.96 * math.sqrt(0.24 / 400 + 0.25 / 400))
+    assert sk8_decks.difference_half_width(0.6, 100, 0.5, 10000) == pytest.approx(1.96 * math.sqrt(0.24 / 100 + 0.25 / 10000))
+    assert sk8_decks.difference_half_width(0.6, 0, 0.5, 100) == math.inf
+
+
+def test_half_width_covers_the_difference_of_simulated_win_rates():
+    rng, covered = random.Random(0), 0
+    for _ in range(400):
+        a, b = sum(rng.random() < 0.55 for _ in range(300)) / 300, sum(rng.random() < 0.5 for _ in range(1200)) / 1200
+        covered += abs((a - b) - 0.05) <= sk8_decks.difference_half_width(a, 300, b, 1200)
+    assert 0.92 < covered / 400 < 0.98
+
+
+def test_population_must_fill_a_tournament():
+    with pytest.raises(ValueError):
+        tuner(population=sk8_decks.TOURNAMENT_SIZE - 1)
+    small = tuner(population=sk8_decks.TOURNAMENT_SIZE)
+    scored = [(small.random_filler(), rate) for rate in (0.2, 0.5, 0.8)]
+    assert small.select(scored) == scored[2][0]
+
+
+def test_children_are_valid_fillers():
+    t = tuner()
+    for _ in range(200):
+        child = t.mutate(t.crossover(t.random_filler(), t.random_filler()))
+        assert len(child) == t.size == len(set(child)) and set(child) <= set(sk8.FILLER_POOL)
+        assert child == sk8_decks.canonical(child)
@@ -0,0 +1,41 @@
+"""The memoized DifficultyEngine against the original string-based difficulty rules."""
+import random
+
+import sk8
+from reference_rules import calculate_combo_difficulty
+
+
+def random_combos(rng, n):
+    for _ in range(n):
+        yield tuple(rng.choice(sk8.CARD_NAMES) for _ in range(rng.randint(1, 5)))
+
+
+def test_engine_matches_the_original_rules():
+    rng, engine = random.Random(3), sk8.DifficultyEngine()
+    for combo in random_combos(rng, 20000):
+        skater, ignore = rng.choice(sk8.SKATERS), rng.random() < 0.3
+        expected, explanation = calculate_combo_difficulty(combo, skater, ignore)
+        assert engine.difficulty(combo, skater, ignore) == expected
+        assert engine.explain(combo, skater, ignore) == explanation
+
+
+def test_cache_hits_repeats_and_stays_bounded():
+    engine, skater = sk8.DifficultyEngine(maxsize=50), sk8.SKATERS[0]
+    combos = [combo for combo in random_combos(random.Random(1), 200)]
+    first = [engine.difficulty(c, skater) for c in combos[:40]]
+    assert engine.cache_info()['hits'] == 40 - len(set(combos[:40]))
+    assert [engine.difficulty(c, skater) for c in combos[:40]] == first
+    assert engine.cache_info()['hits'] >= 40
+    for combo in combos: engine.difficulty(combo, skater)
+    assert engine.cache_info()['size'] == 50
+    engine.clear()
+    assert engine.cache_info() == {'hits': 0, 'misses': 0, 'size': 0, 'maxsize': 50}
+
+
+def test_explanation_is_only_built_when_read():
+    game = sk8.SkateGame('eve', ui=sk8.Presenter(), skaters=tuple(sk8.SKATERS[:2]), seed=0)
+    list(game.setup_game())
+    combo = ['fakie', 'ollie', 'kickflip', 'tall_ledge']
+    difficulty, explanation = game.calculate_combo_difficulty(combo, game.players[0])
+    assert explanation._lines is None
+    assert (difficulty, list(explanation)) == calculate_combo_difficulty(combo, game.players[0].skater)
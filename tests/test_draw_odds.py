@@ -0,0 +1,53 @@
+"""The hypergeometric draw odds against counting every deal."""
+import itertools
+import math
+from fractions import Fraction
+
+import pytest
+
+import sk8
+
+
+def test_hypergeometric_odds_match_counting():
+    for population in range(1, 9):
+        for successes in range(population + 1):
+            for draws in range(population + 2):
+                cards = [True] * successes + [False] * (population - successes)
+                hands = list(itertools.combinations(range(population), min(draws, population)))
+                table = sk8.hypergeometric_odds(population, successes, draws)
+                for k in range(len(table)):
+                    expected = Fraction(sum(sum(cards[i] for i in hand) >= k for hand in hands), len(hands))
+                    assert table[k] == pytest.approx(float(expected), abs=1e-12)
+
+
+class Order:
+    """An rng whose shuffle deals a pile out in a fixed order."""
+    def __init__(self, order): self.order = order
+    def shuffle(self, cards): cards[:] = [cards[i] for i in self.order]
+
+
+def test_next_draw_chance_matches_every_deal_through_a_reshuffle():
+    deck, discard = ['kickflip', 'ollie', 'heelflip', 'fakie', 'bail'], ['treflip', 'wax', 'focus']
+    for draws in range(1, len(deck) + len(discard) + 1):
+        for at_least in range(1, 4):
+            hits = total = 0
+            for deck_order in itertools.permutations(deck):
+                for discard_order in itertools.permutations(range(len(discard))):
+                    player = sk8.Player("P", rng=Order(discard_order))
+                    player.deck, player.discard_pile = sk8.CardPile(deck_order), sk8.CardPile(discard)
+                    drawn = player.draw_card(draws)
+                    hits += sum(card in sk8.FLIP_TRICKS for card in drawn) >= at_least; total += 1
+            player = sk8.Player("P"); player.deck, player.discard_pile = sk8.CardPile(deck), sk8.CardPile(discard)
+            assert sk8.next_draw_chance(player, sk8.FLIP_TRICKS, draws, at_least) == pytest.approx(hits / total, abs=1e-12)
+            assert sk8.next_draw_chance(player, sk8.CAT_FLIP, draws, at_least) == pytest.approx(hits / total, abs=1e-12)
+
+
+def test_hold_all_chance_matches_counting():
+    # A pile of 3 kickflips, 2 ollies and 4 other cards, dealt 4 at a time.
+    pile = ['k'] * 3 + ['o'] * 2 + ['x'] * 4
+    hands = list(itertools.combinations(range(len(pile)), 4))
+    for wanted in ({'k': 1}, {'k': 2, 'o': 1}, {'k': 3, 'o': 1}, {'o': 2}):
+        expected = sum(all(sum(pile[i] == card for i in hand) >= n for card, n in wanted.items()) for hand in hands)
+        needs = tuple((pile.count(card), n) for card, n in wanted.items())
+        assert sk8.hold_all_chance(len(pile), 4, needs) == pytest.approx(expected / len(hands))
+    assert sk8.hold_all_chance(5, 5, ((2, 2),)) == 1.0 and math.isclose(sk8.hold_all_chance(5, 5, ((2, 3),)), 0.0)
@@ -0,0 +1,49 @@
+"""The training environments: action slots, and SyncVectorEnv agreeing with the SkateEnvs it steps."""
+import random
+
+import pytest
+
+import sk8
+import sk8_env
+
+
+def test_vector_env_matches_separate_envs():
+    n, rng = 4, random.Random(2)
+    vector, singles = sk8_env.SyncVectorEnv(n, seed=10), [sk8_env.SkateEnv(seed=10 + i) for i in range(n)]
+    observations, masks = vector.reset()
+    for env in singles: env.reset()
+    finished = 0
+    for _ in range(150):
+        slots = sk8_env.random_legal_slots(masks, rng)
+        observations, rewards, terminated, truncated, infos = vector.step(slots)
+        for i, (env, slot) in enumerate(zip(singles, slots)):
+            _, reward, done, cut, _ = env.step(slot)
+            assert (rewards[i], terminated[i], truncated[i]) == (pytest.approx(reward), done, cut)
+            if done or cut:
+                assert list(infos[i]['final_observation']) == list(env.observation()); env.reset(); finished += 1
+            width = sk8_env.OBS_SIZE
+            assert list(observations[i * width:(i + 1) * width]) == list(env.observation())
+            assert masks[i * sk8_env.ACTION_SIZE:(i + 1) * sk8_env.ACTION_SIZE] == env.action_mask()
+    assert finished
+
+
+def test_slots_round_trip_the_default_opponents_actions():
+    rng, checked = random.Random(5), 0
+    for seed in range(8):
+        state = sk8.GameState.new(tuple(rng.sample(sk8.SKATERS, 2)), rng)
+        while state.phase != 'over' and state.turn < 60:
+            action = sk8_env.default_opponent(state, rng)
+            sets = sk8_env.ranked_sets(state) if state.phase == 'set' else ()
+            if action[0] == 'set' and action[1] not in sets:  # Ranked without seeing the opponent's hand, as the agent is.
+                with pytest.raises(ValueError): sk8_env.encode_action(state, action, sets)
+                state = state.apply(action, rng); continue
+            slot = sk8_env.encode_action(state, action, sets)
+            mask = sk8_env.action_mask(state, sets)
+            expected, decoded = action, sk8_env.decode_action(state, slot, sets)
+            if action[0] == 'match':  # A slot says whether to spend a card for advantage, not which one.
+                expected, decoded = action[:2] + (action[2] is None,), decoded[:2] + (decoded[2] is None,)
+            assert mask[slot] and decoded == expected
+            for illegal in (s for s in range(sk8_env.ACTION_SIZE) if not mask[s]):
+                with pytest.raises(ValueError): sk8_env.decode_action(state, illegal, sets)
+            state = state.apply(action, rng); checked += 1
+    assert checked > 100
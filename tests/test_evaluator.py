@@ -0,0 +1,43 @@
+"""ComboEvaluator against the from-scratch rule functions on the same ordered combo."""
+import random
+
+import sk8
+
+
+def random_walk(rng, steps=4000):
+    """Yields an evaluator and the combo it should hold after each random push or pop."""
+    skater = rng.choice(sk8.SKATERS)
+    evaluator, combo = sk8.ComboEvaluator(skater), []
+    ids = sorted(sk8.COMBO_CARD_IDS)
+    for _ in range(steps):
+        if combo and (len(combo) >= 6 or rng.random() < 0.4):
+            assert evaluator.pop() == combo.pop()
+        else:
+            cid = rng.choice(ids); evaluator.push(cid); combo.append(cid)
+        yield skater, evaluator, tuple(combo)
+
+
+def test_evaluator_agrees_with_validate_and_difficulty():
+    rng = random.Random(17)
+    for _ in range(5):
+        for skater, evaluator, combo in random_walk(rng):
+            assert evaluator.combo == combo and len(evaluator) == len(combo)
+            assert evaluator.check() == sk8.validate_combo_ids(combo)
+            if combo: assert evaluator.difficulty == sk8.combo_difficulty_ids(combo, skater)
+
+
+def test_can_extend_only_rules_out_combos_that_stay_broken():
+    rng = random.Random(3)
+    ids = sorted(sk8.COMBO_CARD_IDS)
+    for skater, evaluator, combo in random_walk(rng, 1500):
+        for cid in ids:
+            if evaluator.can_extend(cid): continue
+            for _ in range(5):
+                tail = rng.sample(ids, rng.randint(0, 2))
+                assert not sk8.validate_combo_ids(combo + (cid, *tail))[0]
+
+
+def test_display_name_matches_the_string_version():
+    rng = random.Random(5)
+    for skater, evaluator, combo in random_walk(rng, 1000):
+        assert evaluator.display_name() == sk8.get_combo_display_name(sk8.card_names(combo))
@@ -0,0 +1,53 @@
+"""GameJournal and SkateGame.resume: a crashed game picks up where it stopped and plays on exactly as it would have."""
+import json
+import random
+
+import pytest
+
+import sk8
+import sk8_server
+
+
+class Scripted(sk8.Presenter):
+    def __init__(self, seed): self.rng = random.Random(seed)
+    def ask(self, prompt, player=None): return sk8_server.scripted_answer(prompt, self.rng)
+
+
+def crashed_game(path, seed, stop):
+    """A full pve game's record, and a journal at `path` of the same game left unfinished after `stop` turns."""
+    game = sk8.SkateGame('pve', ui=Scripted(seed), seed=seed); game.run(max_turns=300); record = game.record()
+    journal = sk8.GameJournal(path, snapshot_every=10)
+    sk8.SkateGame('pve', ui=sk8.ReplayPresenter(record['decisions']), seed=seed, journal=journal).run(max_turns=stop)
+    journal.close()
+    return record
+
+
+@pytest.mark.parametrize('seed,stop', [(1, 3), (2, 11), (5, 17), (1, 25)])
+def test_resumed_game_plays_on_like_the_original(tmp_path, seed, stop):
+    record = crashed_game(tmp_path / 'sk8.journal', seed, stop)
+    assert stop < record['turns']
+    game = sk8.SkateGame.resume(sk8.GameJournal(tmp_path / 'sk8.journal'), sk8.ReplayPresenter([]))
+    assert game is not None and game.turn_count == stop
+    game.set_ui(sk8.ReplayPresenter(record['decisions'][len(game.decisions):]))
+    game.run(max_turns=300)
+    assert game.record()['decisions'] == record['decisions']
+    assert (game.turn_count, game.players.index(game.winner) if game.winner else None) == (record['turns'], record['winner'])
+    assert sk8.GameJournal(tmp_path / 'sk8.journal').read() is None  # Finished, so never resumed again.
+
+
+def test_journal_that_no_longer_replays_is_not_resumed(tmp_path):
+    path = tmp_path / 'sk8.journal'
+    crashed_game(path, 2, 11)
+    lines = path.read_text().splitlines(keepends=True)
+    answers = [i for i, line in enumerate(lines) if json.loads(line)['k'] == 'a']
+    path.write_text(''.join(line for i, line in enumerate(lines) if i not in answers[len(answers) // 2:]))
+    assert sk8.SkateGame.resume(sk8.GameJournal(path), sk8.ReplayPresenter([])) is None
+
+
+def test_errors_other_than_divergence_propagate(tmp_path, monkeypatch):
+    path = tmp_path / 'sk8.journal'
+    crashed_game(path, 2, 11)
+    def broken(*args, **kwargs): raise KeyError('bug')
+    monkeypatch.setattr(sk8, 'roll_dice', broken)
+    with pytest.raises(KeyError):
+        sk8.SkateGame.resume(sk8.GameJournal(path), sk8.ReplayPresenter([]))
@@ -0,0 +1,44 @@
+"""The exact dice odds tables against every way roll_dice can come up."""
+import itertools
+from collections import Counter
+
+import pytest
+
+import sk8
+
+
+class Faces:
+    """An rng whose randint hands out fixed faces, so every outcome of roll_dice can be enumerated."""
+    def __init__(self, faces): self.faces = iter(faces)
+    def randint(self, low, high): return next(self.faces)
+
+
+def roll_counts(advantage):
+    dice = 3 if advantage else 2
+    outcomes = [sk8.roll_dice(advantage, rng=Faces(faces)) for faces in itertools.product(range(1, sk8.DIE_SIDES + 1), repeat=dice)]
+    return Counter(outcomes), len(outcomes)
+
+
+@pytest.mark.parametrize('advantage', [False, True])
+def test_roll_chance_matches_every_roll(advantage):
+    counts, total = roll_counts(advantage)
+    for target in range(-2, 2 * sk8.DIE_SIDES + 3):
+        expected = sum(n for result, n in counts.items() if result >= target) / total
+        assert sk8.roll_chance(target, advantage) == pytest.approx(expected, abs=1e-12)
+
+
+@pytest.mark.parametrize('advantage', [False, True])
+def test_state_roll_draws_like_roll_dice(advantage):
+    dice = 3 if advantage else 2
+    for faces in itertools.product(range(1, sk8.DIE_SIDES + 1), repeat=dice):
+        assert sk8._state_roll(advantage, Faces(faces)) == sk8.roll_dice(advantage, rng=Faces(faces))
+
+
+def test_rerolls_and_bails():
+    counts, total = roll_counts(False)
+    for target in range(2, 2 * sk8.DIE_SIDES + 1):
+        p = sum(n for result, n in counts.items() if result >= target) / total
+        # Two tries land unless both miss; a Bail makes a landed set land twice.
+        assert sk8.success_chance(target, rerolls=1) == pytest.approx(1 - (1 - p) ** 2)
+        assert sk8.success_chance(target, rerolls=2) == pytest.approx(1 - (1 - p) ** 3)
+        assert sk8.set_chance(target, bailed=True) == pytest.approx(p * p) and sk8.set_chance(target) == pytest.approx(p)
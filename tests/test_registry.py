@@ -0,0 +1,40 @@
+"""The card registry: ids, category bitmasks and tables agree with the named card sets, and the id-based rules with
+the original string-based ones."""
+import random
+
+import sk8
+import reference_rules
+
+NAMED = (('FLIP', sk8.FLIP_TRICKS), ('SHUVIT', sk8.SHUVIT_TRICKS), ('SPIN', sk8.SPIN_TRICKS), ('GRIND', sk8.GRINDS_SLIDES),
+         ('OBSTACLE', sk8.OBSTACLES), ('STAIR', sk8.STAIRS), ('SURFACE', sk8.GRIND_SURFACES), ('STANCE', sk8.STANCES),
+         ('SPECIAL', sk8.SPECIAL_CARDS), ('CORE', sk8.CORE_TRICKS), ('TRICK', sk8.TRICKS_DATABASE))
+
+
+def test_ids_round_trip_and_tables_match_the_card_data():
+    assert len(set(sk8.CARD_NAMES)) == len(sk8.CARD_NAMES)
+    assert sk8.card_names(sk8.card_ids(sk8.CARD_NAMES)) == list(sk8.CARD_NAMES)
+    for cid, card in enumerate(sk8.CARD_NAMES):
+        assert sk8.CARD_DIFFICULTY[cid] == sk8.TRICKS_DATABASE.get(card, 0)
+        assert sk8.STANCE_COST[cid] == sk8.STANCES.get(card, 0)
+        assert sk8.CARD_DISPLAY_NAMES[cid] == card.replace('_', ' ').title()
+        for name, group in NAMED:
+            assert bool(sk8.CARD_CATEGORIES[cid] & getattr(sk8, f'CAT_{name}')) == (card in group), (card, name)
+
+
+def test_category_bits_match_membership():
+    for category in [group for _, group in NAMED] + [s.passive_ability['category'] for s in sk8.SKATERS]:
+        bits = sk8.category_bits(category)
+        assert all((bits >> cid & 1) == (card in category) for cid, card in enumerate(sk8.CARD_NAMES))
+
+
+def test_validate_matches_the_original_rules():
+    rng, valid = random.Random(5), 0
+    names = list(sk8.CARD_NAMES)
+    for _ in range(30000):
+        combo = [rng.choice(names) for _ in range(rng.randint(1, 5))]
+        if rng.random() < 0.3: combo.insert(0, rng.choice(list(sk8.STANCES)))
+        if rng.random() < 0.3: combo.insert(rng.randint(0, 1), 'ollie')
+        expected = reference_rules.validate_combo(combo)
+        assert sk8.validate_combo(combo) == expected == sk8.validate_combo_ids(sk8.card_ids(combo)), combo
+        valid += expected[0]
+    assert valid > 1000
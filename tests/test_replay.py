@@ -0,0 +1,40 @@
+"""Seeded games and their records: replay() re-runs a game exactly, and check_replays() flags the ones that don't."""
+import random
+
+import sk8
+import sk8_server
+
+
+class Scripted(sk8.Presenter):
+    def __init__(self, seed): self.rng = random.Random(seed)
+    def ask(self, prompt, player=None): return sk8_server.scripted_answer(prompt, self.rng)
+
+
+def played(seed, mode='pve'):
+    game = sk8.SkateGame(mode, ui=Scripted(seed) if mode != 'eve' else sk8.Presenter(), seed=seed)
+    game.run(max_turns=300)
+    return game
+
+
+def test_replay_reproduces_the_game():
+    for seed in range(12):
+        game = played(seed, 'pve' if seed % 2 else 'eve')
+        again = sk8.replay(game.record())
+        assert again.record() == game.record()
+        assert [(p.letters, list(p.hand), list(p.deck), list(p.discard_pile)) for p in again.players] == \
+               [(p.letters, list(p.hand), list(p.deck), list(p.discard_pile)) for p in game.players]
+
+
+def test_replay_can_stop_part_way():
+    game = played(3)
+    partial = sk8.replay(game.record(), until_turn=5)
+    assert partial.turn_count == 5 and not partial.game_over
+    assert partial.decisions == game.decisions[:len(partial.decisions)]
+
+
+def test_check_replays_flags_changed_outcomes():
+    records = [played(seed).record() for seed in range(6)]
+    assert sk8.check_replays(records) == []
+    records[1]['winner'] = 1 - records[1]['winner'] if records[1]['winner'] is not None else 0
+    records[4]['decisions'] = records[4]['decisions'][:len(records[4]['decisions']) // 2]
+    assert sk8.check_replays(records) == [1, 4]
@@ -0,0 +1,73 @@
+"""The setter AI's opponent-aware SetScorer against the match rules, and its pruned choose() against scoring all."""
+import random
+from collections import Counter
+
+import pytest
+
+import sk8
+
+
+def random_seat(rng, skater, size=6):
+    names = [sk8.CARD_NAMES[c] for c in sorted(sk8.COMBO_CARD_IDS)] + ['focus', 'pro_model_deck', 'bail']
+    hand = sk8.card_ids(['ollie'] + [rng.choice(names) for _ in range(size)])
+    deck = sk8.card_ids([rng.choice(names) for _ in range(20)])
+    return sk8.SeatState(skater, sk8.LETTERS[:rng.randint(0, sk8.MAX_LETTERS - 1)], hand, deck, (), ())
+
+
+def known_hand_value(combo, skater, defender):
+    """A set's expected value worked out from the match rules for a defender whose hand is known."""
+    held = Counter(defender.hand)
+    rerolls = int(len(defender.letters) == sk8.MAX_LETTERS - 1) + (sk8.FOCUS in held)
+    advantage = sk8.OLLIE in combo or any(held[c] for c in combo if c in sk8.MATCH_CARD_IDS)
+    def match(relieved):
+        target = sk8.DIFFICULTY_ENGINE.difficulty_ids(combo, defender.skater, relieved) + sk8.defender_penalty(combo, held)
+        return sk8.success_chance(target, advantage, rerolls)
+    landed = max(match(False), match(True)) if held[sk8.PRO_MODEL_DECK] else match(False)
+    difficulty = sk8.set_difficulty_ids(combo, skater)
+    land, lost = sk8.roll_chance(difficulty), len(combo) - combo.count(sk8.OLLIE)
+    letter = sk8.AI_LAST_LETTER_VALUE if len(defender.letters) == sk8.MAX_LETTERS - 1 else sk8.AI_LETTER_VALUE
+    return land * (1 - landed) * letter - sk8.AI_DEFAULT_CARD_VALUE * (land * min(lost, 1) + (1 - land) * lost)
+
+
+def test_score_follows_the_match_rules_for_a_known_hand():
+    rng, checked = random.Random(25), 0
+    for _ in range(150):
+        skater, other = rng.sample(sk8.SKATERS, 2)
+        defender, hand = random_seat(rng, other), random_seat(rng, skater).hand
+        scorer = sk8.SetScorer(skater, defender, known=True)
+        for combo in sk8.ComboSearch(sk8.card_names(hand), 4).all():
+            assert scorer.score(combo) == pytest.approx(known_hand_value(combo, skater, defender), abs=1e-9), sk8.card_names(combo)
+            checked += 1
+    assert checked > 1000
+
+
+def test_defender_targets_match_the_engine():
+    rng = random.Random(7)
+    for _ in range(150):
+        skater, other = rng.sample(sk8.SKATERS, 2)
+        scorer = sk8.SetScorer(skater, random_seat(rng, other))
+        for combo, difficulty in sk8.ComboSearch(sk8.card_names(random_seat(rng, skater).hand), 4).sets(skater):
+            expected = (sk8.DIFFICULTY_ENGINE.difficulty_ids(combo, other), sk8.DIFFICULTY_ENGINE.difficulty_ids(combo, other, True))
+            assert scorer._targets(combo, difficulty, set(combo)) == expected
+
+
+def test_choose_finds_the_best_score_and_bound_is_an_upper_bound():
+    rng = random.Random(9)
+    for _ in range(150):
+        skater, other = rng.sample(sk8.SKATERS, 2)
+        scorer = sk8.SetScorer(skater, random_seat(rng, other), known=rng.random() < 0.5)
+        candidates = sk8.ComboSearch(sk8.card_names(random_seat(rng, skater, 8).hand), 5).sets(skater)
+        scores = [scorer.score(*candidate) for candidate in candidates]
+        assert all(scorer.bound(*candidate) >= score - 1e-9 for candidate, score in zip(candidates, scores))
+        combo, value = scorer.choose(candidates)
+        if not candidates: assert (combo, value) == ((), None); continue
+        assert value == pytest.approx(max(scores)) and combo == candidates[scores.index(max(scores))][0]
+
+
+def test_combo_set_scorer_takes_a_known_difficulty():
+    rng = random.Random(4)
+    for _ in range(50):
+        skater = rng.choice(sk8.SKATERS)
+        score = sk8.combo_set_scorer(skater, sk8.LETTERS[:rng.randint(0, sk8.MAX_LETTERS - 1)])
+        for combo, difficulty in sk8.ComboSearch(sk8.card_names(random_seat(rng, skater).hand), 4).sets(skater):
+            assert score(combo, difficulty) == score(combo)
@@ -0,0 +1,40 @@
+"""Seeded games: one seed plays one game, and its per-seat streams survive a rule change (common random numbers)."""
+import sk8
+
+
+def dealt(game):
+    list(game.setup_game())
+    return [(p.skater.name, list(p.deck), list(p.hand)) for p in game.players]
+
+
+def test_a_seed_plays_the_same_game_twice(monkeypatch):
+    # Only the AI's search time budget depends on the clock; lift it so a loaded machine cannot cut a search short.
+    monkeypatch.setattr(sk8, 'AI_SEARCH_TIME_BUDGET', None)
+    for seed in range(10):
+        first, second = (sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed) for _ in range(2))
+        first.run(max_turns=300); second.run(max_turns=300)
+        assert first.record() == second.record()
+
+
+def test_seats_get_the_same_cards_and_dice_under_a_rule_variant():
+    for seed in range(10):
+        baseline = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed)
+        with sk8.rule_variant(defender_penalty=5, flip_discount=0):
+            variant = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=seed)
+            assert dealt(variant) == dealt(baseline)
+        for a, b in zip(baseline.players, variant.players):
+            assert [a.set_dice.random() for _ in range(20)] == [b.set_dice.random() for _ in range(20)]
+            assert [a.match_dice.random() for _ in range(20)] == [b.match_dice.random() for _ in range(20)]
+
+
+def test_seat_streams_do_not_share_state():
+    game = sk8.SkateGame('eve', ui=sk8.Presenter(), seed=3)
+    streams = [s.getstate() for p in game.players for s in (p.rng, p.set_dice, p.match_dice)] + [game.rng.getstate()]
+    assert len(set(map(repr, streams))) == len(streams)
+
+
+def test_rule_variant_restores_the_rules():
+    before = sk8.current_rules()
+    with sk8.rule_variant(defender_penalty=before['defender_penalty'] + 2, base_difficulties={'kickflip': 9}):
+        assert sk8.DEFENDER_PENALTY == before['defender_penalty'] + 2 and sk8.BASE_DIFFICULTIES['kickflip'] == 9
+    assert sk8.current_rules() == before
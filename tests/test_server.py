@@ -0,0 +1,51 @@
+"""The match server: pvp players see the table and their own hand, never each other's."""
+import asyncio
+import random
+import re
+
+import sk8
+import sk8_server
+
+
+class Inbox:
+    def __init__(self): self.lines = []
+    def send(self, message):
+        if message['type'] == 'show': self.lines.append(message['text'])
+
+
+class ImmediateLoop:
+    def call_soon_threadsafe(self, callback, *args): callback(*args)
+
+
+CARD_LINE = re.compile(r"^  \d+: ")  # Hand, ability and trade listings.
+
+
+def test_pvp_hands_go_only_to_their_player():
+    """Everything shown before a decision belongs to whoever makes it, so the other player's new lines never list cards."""
+    rng, inboxes = random.Random(4), [Inbox(), Inbox()]
+    ui = sk8_server.MatchPresenter(ImmediateLoop(), inboxes)
+    listed = 0
+    for seed in range(6):
+        game = sk8.SkateGame('pvp', ui=ui, seed=seed, skaters=tuple(sk8.SKATERS[:2]))
+        ui.seats = dict(zip(game.players, inboxes))
+        steps, seen = game.play(60), [0, 0]
+        try:
+            decision = next(steps)
+            while True:
+                new = [inbox.lines[start:] for inbox, start in zip(inboxes, seen)]
+                seen = [len(inbox.lines) for inbox in inboxes]
+                if decision.player is not None:
+                    actor = game.players.index(decision.player)
+                    assert not any(CARD_LINE.match(line) for line in new[1 - actor])
+                    if decision.kind == 'set':
+                        hand = new[actor][-len(decision.player.hand) - 1:-1]
+                        assert all(CARD_LINE.match(line) for line in hand); listed += 1
+                decision = steps.send(sk8_server.scripted_answer(decision.prompt, rng))
+        except StopIteration: pass
+    assert listed > 20
+    assert all(any(line.startswith("Trick: ") for line in inbox.lines) for inbox in inboxes)  # Sets are public.
+
+
+def test_pvp_match_over_the_network():
+    result = asyncio.run(sk8_server.load_test(matches=2, mode='pvp', max_turns=20, measure_memory=False))
+    assert result['finished'] == 2 and result['moves'] > 0
@@ -0,0 +1,72 @@
+"""GameState, the copyable model the search AI plays on, against the live SkateGame rules."""
+import random
+from collections import Counter
+
+import sk8
+
+
+class Transcript(sk8.Presenter):
+    def __init__(self): self.lines = []
+    def show(self, text="", player=None): self.lines.append(text)
+
+
+LIVE_AI_MATCHER_TURN = sk8.SkateGame.ai_matcher_turn
+
+
+def check_ai_match(game, player):
+    """Plays the AI matcher's turn, then the same turn through GameState.apply with the matcher's own dice stream and
+    the choices the AI made, and expects the same target, letters and next setter."""
+    state, dice = sk8.GameState.from_game(game), random.Random()
+    dice.setstate(player.match_dice.getstate())
+    start = len(game.ui.lines)
+    LIVE_AI_MATCHER_TURN(game, player)
+    shown = game.ui.lines[start:]
+    pro = any(line.endswith("plays Pro Model Deck!") for line in shown)
+    spent = next((line.split(" spends a ")[1][:-len(" for advantage!")] for line in shown if " spends a " in line), None)
+    focus = any(line.endswith("uses Focus to re-roll!") for line in shown)
+    target = int(next(line for line in shown if line.startswith("Final Target: "))[len("Final Target: "):])
+    assert state.match_target(pro) == target, (sk8.card_names(state.trick), sk8.card_names(state.seats[state.actor].hand))
+    after = state.apply(('match', pro, sk8.CARD_IDS[spent] if spent else None), dice)
+    if after.phase == 'focus': after = after.apply(('focus', focus), dice)
+    else: assert not focus
+    assert after.seats[game.players.index(player)].letters == player.letters
+    assert after.setter == game.setter_index
+
+
+def test_defender_penalty_counts_only_trick_and_stance_cards():
+    trick = sk8.card_ids(['ollie', 'boardslide', 'wax', 'pro_model_deck'])
+    assert sk8.defender_penalty(trick, Counter(sk8.card_ids(['ollie', 'boardslide']))) == 0
+    assert sk8.defender_penalty(trick, Counter(sk8.card_ids(['ollie', 'wax', 'pro_model_deck']))) == sk8.DEFENDER_PENALTY
+    assert sk8.defender_penalty(sk8.card_ids(['3_stair', '3_stair', 'ollie']), Counter(sk8.card_ids(['3_stair']))) == sk8.DEFENDER_PENALTY
+
+
+def test_apply_matches_the_live_ai_matcher_in_played_games(monkeypatch):
+    turns = []
+    monkeypatch.setattr(sk8.SkateGame, 'ai_matcher_turn', lambda game, player: turns.append(check_ai_match(game, player)))
+    for seed in range(40):
+        sk8.SkateGame('eve', ui=Transcript(), seed=seed).run(max_turns=200)
+    assert len(turns) > 200
+
+
+def test_apply_matches_the_live_ai_matcher_on_wax_and_pro_model_deck_sets():
+    """Played games rarely leave the matcher holding every trick card of a Wax or Pro Model Deck set, so deal those
+    positions directly."""
+    rng = random.Random(7)
+    specials = [c for c in sk8.CARD_NAMES if sk8.CARD_IDS[c] in sk8.MATCH_CARD_IDS]
+    for seed in range(300):
+        skaters = tuple(rng.sample(sk8.SKATERS, 2))
+        game = sk8.SkateGame('eve', ui=Transcript(), skaters=skaters, seed=seed)
+        list(game.setup_game())
+        hand = rng.sample(specials, 6) + [rng.choice(['wax', 'pro_model_deck']), 'ollie']
+        combos = [c for c in sk8.ComboSearch(hand, 4).all() if sk8.WAX in c or sk8.PRO_MODEL_DECK in c]
+        if not combos: continue
+        trick = rng.choice(combos)
+        game.setter_index, game.trick_to_match = 0, sk8.card_names(trick)
+        game.difficulty_to_beat = sk8.set_difficulty_ids(trick, skaters[0])
+        needed = [sk8.CARD_NAMES[c] for c in trick if c in sk8.MATCH_CARD_IDS]
+        held = needed if rng.random() < 0.7 else needed[1:]
+        extras = rng.sample(['focus', 'pro_model_deck', 'bail', 'kickflip', 'boardslide'], rng.randint(0, 3))
+        matcher = game.players[1]
+        matcher.hand = sk8.CardPile(['ollie'] + held + extras)
+        matcher.letters = sk8.LETTERS[:rng.randint(0, sk8.MAX_LETTERS - 1)]
+        check_ai_match(game, matcher)
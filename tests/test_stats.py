@@ -0,0 +1,64 @@
+"""Log analytics: a LogTail reads a rotating log exactly once, however often it polls and across saved state."""
+import json
+
+import sk8
+import sk8_stats
+
+
+def play_logged(path, seeds, monkeypatch, max_bytes=40_000):
+    """Plays AI games with the event log at `path`, rotating every `max_bytes`; returns (games, finished games)."""
+    log = sk8.EventLog(path, max_bytes=max_bytes, backup_count=50)
+    monkeypatch.setattr(sk8, 'EVENT_LOG', log)
+    results = [sk8.play_headless_game(seed, max_turns=150) for seed in seeds]
+    log.close(); monkeypatch.setattr(sk8, 'EVENT_LOG', None)
+    return len(results), sum(r['winner'] is not None for r in results)
+
+
+def read_all(path):
+    """Stats from every line of the log and its backups, read in one go, oldest first."""
+    stats = sk8_stats.LogStats()
+    for member in sk8_stats.LogTail(path).members():
+        for raw in open(member, 'rb'): stats.feed_line(raw)
+    return stats
+
+
+def totals(stats):
+    skaters = stats.skaters.values()
+    return sum(s.games for s in skaters), sum(s.wins for s in skaters), sum(s.losses for s in skaters)
+
+
+def test_polling_through_rotations_reads_every_line_once(tmp_path, monkeypatch):
+    path, played, finished = tmp_path / 'sk8.log', 0, 0
+    tail = sk8_stats.LogTail(path)
+    for batch in range(5):
+        games, done = play_logged(path, range(batch * 4, batch * 4 + 4), monkeypatch)
+        played, finished = played + games, finished + done
+        tail.poll()
+        if batch == 2: tail = sk8_stats.LogTail.from_dict(json.loads(json.dumps(tail.to_dict())))  # As a --state file would.
+    assert len(tail.members()) > 3  # The log did rotate.
+    assert tail.poll() == 0
+    assert tail.stats.to_dict() == read_all(path).to_dict()
+    assert totals(tail.stats) == (2 * played, finished, finished)
+    assert tail.stats.bad_lines == 0 and sk8_stats.UNKNOWN_SKATER not in tail.stats.skaters
+
+
+def test_a_line_still_being_written_waits_for_the_next_poll(tmp_path):
+    path = tmp_path / 'sk8.log'
+    deck = json.dumps({'t': 1.0, 'level': 'INFO', 'event': 'deck', 'player': 'AI 1', 'skater': 'Flip Pro'})
+    path.write_text(deck + '\n' + deck[:20])
+    tail = sk8_stats.LogTail(path)
+    tail.poll()
+    assert tail.stats.skaters['Flip Pro'].games == 1
+    with open(path, 'a') as f: f.write(deck[20:] + '\n')
+    tail.poll()
+    assert tail.stats.skaters['Flip Pro'].games == 2 and tail.stats.bad_lines == 0
+
+
+def test_a_new_file_on_a_reused_inode_is_read_from_the_top(tmp_path):
+    path = tmp_path / 'sk8.log'
+    line = lambda t, skater: json.dumps({'t': t, 'level': 'INFO', 'event': 'deck', 'player': 'P', 'skater': skater}) + '\n'
+    path.write_text(line(1.0, 'Flip Pro') * 3)
+    tail = sk8_stats.LogTail(path); tail.poll()
+    with open(path, 'w') as f: f.write(line(2.0, 'Grind Specialist') * 5)  # Same inode, new contents, longer.
+    tail.poll()
+    assert tail.stats.skaters['Flip Pro'].games == 3 and tail.stats.skaters['Grind Specialist'].games == 5